@@ -0,0 +1,238 @@
+"""
+Mergeable aggregate state for video-level analysis results.
+
+Sentiment is counted exactly. Topics and keywords go into bounded Space-Saving
+heavy-hitter sketches, so memory stays fixed however many comments a video
+has, and partial results from parallel chunks or incremental runs can be
+merged without revisiting individual comments.
+"""
+import heapq
+from collections import Counter
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+# Number of distinct items each sketch tracks
+TOPIC_CAPACITY = 64
+KEYWORD_CAPACITY = 256
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch holding at most ``capacity`` items.
+
+    Each tracked item has an estimated count that never underestimates its
+    true frequency, and an error bound: the true count lies within
+    ``[count - error, count]``. Any item whose true frequency exceeds
+    ``total / capacity`` is guaranteed to be tracked.
+
+    Updates are buffered exactly and folded into the sketch in batches, so
+    the per-item cost stays constant.
+    """
+
+    def __init__(self, capacity, counts=None, errors=None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+        self.errors = dict(errors or {})
+        self._pending = Counter()
+
+    def add(self, item, count=1):
+        """Record ``count`` occurrences of ``item``."""
+        self._pending[item] += count
+        if len(self._pending) > 4 * self.capacity:
+            self._compact()
+
+    def update(self, items):
+        """Record one occurrence of every item in ``items``."""
+        for item in items:
+            self.add(item)
+
+    def _floor(self):
+        """Smallest tracked count, or 0 while the sketch still has room."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def _compact(self):
+        """Fold buffered exact counts into the sketch."""
+        if self._pending:
+            pending, self._pending = self._pending, Counter()
+            self._absorb(pending, {}, 0)
+
+    def _absorb(self, counts_b, errors_b, floor_b):
+        """
+        Merge another summary into this one in place.
+
+        Items missing from a full sketch may have occurred up to that
+        sketch's minimum count (its floor), so the floor is added to both
+        their count and their error before the top ``capacity`` items are
+        kept. Exact counts have a floor of 0.
+        """
+        floor_a = self._floor()
+
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(counts_b):
+            counts[item] = self.counts.get(item, floor_a) + counts_b.get(item, floor_b)
+            errors[item] = (
+                (self.errors.get(item, 0) if item in self.counts else floor_a)
+                + (errors_b.get(item, 0) if item in counts_b else floor_b)
+            )
+
+        keep = heapq.nlargest(self.capacity, counts, key=counts.get)
+        self.counts = {item: counts[item] for item in keep}
+        self.errors = {item: errors[item] for item in keep}
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other (SpaceSaving): Sketch to fold in
+
+        Returns:
+            SpaceSaving: ``self``, for chaining
+        """
+        self._compact()
+        other._compact()
+        self._absorb(other.counts, other.errors, other._floor())
+        return self
+
+    def top(self, n=10):
+        """
+        Return the ``n`` most frequent items.
+
+        Returns:
+            list: (item, estimated count) pairs, most frequent first
+        """
+        self._compact()
+        return heapq.nlargest(n, self.counts.items(), key=lambda x: (x[1], x[0]))
+
+    def to_dict(self):
+        """Serialize the sketch to a JSON-compatible dict."""
+        self._compact()
+        return {
+            'capacity': self.capacity,
+            'counts': self.counts,
+            'errors': {item: e for item, e in self.errors.items() if e},
+        }
+
+    @classmethod
+    def from_dict(cls, data, capacity):
+        """
+        Rebuild a sketch serialized with ``to_dict``.
+
+        Args:
+            data (dict): Serialized sketch, or an empty dict
+            capacity (int): Capacity to use if ``data`` does not record one
+        """
+        return cls(
+            data.get('capacity', capacity),
+            data.get('counts'),
+            data.get('errors'),
+        )
+
+
+class VideoAggregate:
+    """
+    Mergeable analysis state of one video (or one chunk of its comments).
+
+    Attributes:
+        total (int): Number of comments analyzed
+        sentiment_counts (dict): Exact count per sentiment label
+        topics (SpaceSaving): Topic frequency sketch
+        keywords (SpaceSaving): Keyword frequency sketch
+    """
+
+    def __init__(self, total=0, sentiment_counts=None, topics=None, keywords=None):
+        self.total = total
+        self.sentiment_counts = {sentiment: 0 for sentiment in SENTIMENTS}
+        self.sentiment_counts.update(sentiment_counts or {})
+        self.topics = topics or SpaceSaving(TOPIC_CAPACITY)
+        self.keywords = keywords or SpaceSaving(KEYWORD_CAPACITY)
+
+    def add(self, sentiment, topics, keywords):
+        """
+        Record the analysis result of one comment.
+
+        Args:
+            sentiment (str): Sentiment label
+            topics (list): Topic labels
+            keywords (list): Extracted keywords
+        """
+        self.total += 1
+        self.sentiment_counts[sentiment] += 1
+        self.topics.update(topics)
+        self.keywords.update(keywords)
+
+    def merge(self, other):
+        """
+        Merge another aggregate into this one.
+
+        Args:
+            other (VideoAggregate): Aggregate to fold in
+
+        Returns:
+            VideoAggregate: ``self``, for chaining
+        """
+        self.total += other.total
+        for sentiment, count in other.sentiment_counts.items():
+            self.sentiment_counts[sentiment] = self.sentiment_counts.get(sentiment, 0) + count
+        self.topics.merge(other.topics)
+        self.keywords.merge(other.keywords)
+        return self
+
+    @property
+    def overall_sentiment(self):
+        """Most frequent sentiment label."""
+        return max(self.sentiment_counts.items(), key=lambda x: x[1])[0]
+
+    def top_topics(self, n=10):
+        """Return the ``n`` most frequent topics as a {topic: count} dict."""
+        return dict(self.topics.top(n))
+
+    def top_keywords(self, n=10):
+        """Return the ``n`` most frequent keywords as a {keyword: count} dict."""
+        return dict(self.keywords.top(n))
+
+    def to_dict(self):
+        """Serialize the aggregate to a JSON-compatible dict."""
+        return {
+            'total': self.total,
+            'sentiment_counts': dict(self.sentiment_counts),
+            'topics': self.topics.to_dict(),
+            'keywords': self.keywords.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild an aggregate serialized with ``to_dict``.
+
+        Args:
+            data (dict): Serialized aggregate, or an empty dict
+
+        Returns:
+            VideoAggregate: Rebuilt aggregate
+        """
+        data = data or {}
+        return cls(
+            total=data.get('total', 0),
+            sentiment_counts=data.get('sentiment_counts'),
+            topics=SpaceSaving.from_dict(data.get('topics', {}), TOPIC_CAPACITY),
+            keywords=SpaceSaving.from_dict(data.get('keywords', {}), KEYWORD_CAPACITY),
+        )
+
+    @classmethod
+    def merge_all(cls, aggregates):
+        """
+        Merge serialized aggregates into one.
+
+        Args:
+            aggregates (list): Dicts produced by ``to_dict``
+
+        Returns:
+            VideoAggregate: Combined aggregate
+        """
+        merged = cls()
+        for data in aggregates:
+            merged.merge(cls.from_dict(data))
+        return merged
@@ -0,0 +1,28 @@
+"""
+Helpers for running texts through transformer pipelines in micro-batches.
+"""
+
+# Default number of texts sent through a pipeline in one forward pass
+DEFAULT_BATCH_SIZE = 32
+
+
+def iter_length_sorted_batches(texts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Group texts into micro-batches of similar length.
+
+    Sorting by length before batching keeps the padding added by the
+    tokenizer to a minimum, since every batch is padded to its longest item.
+
+    Args:
+        texts (list): Texts to batch
+        batch_size (int): Maximum number of texts per batch
+
+    Yields:
+        tuple: (list of original indices, list of texts) for each batch
+    """
+    batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        yield indices, [texts[i] for i in indices]
@@ -0,0 +1,229 @@
+"""
+Content-hash cache for per-comment NLP results.
+
+Results are keyed on a hash of the normalized comment text plus a namespace
+that names the model and result version, so duplicate comments ("first",
+copy-paste spam) and re-analyzed videos skip inference. Lookups go through a
+bounded in-process LRU first and, when configured, a shared Redis tier.
+"""
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from .conf import setting
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when Django settings are not configured
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_TTL = 60 * 60 * 24 * 30
+
+
+def normalize_text(text):
+    """
+    Normalize text so trivially different comments share a cache entry.
+
+    Applies Unicode NFKC folding, lower-casing and whitespace collapsing.
+
+    Args:
+        text (str): Raw comment text
+
+    Returns:
+        str: Normalized text
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    return ' '.join(text.lower().split())
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serializable results keyed by text content.
+
+    Attributes:
+        namespace (str): Model name and result version baked into every key
+        stats (dict): Hit/miss counters for each tier
+    """
+
+    def __init__(self, namespace, max_entries=None, redis_url=None, ttl=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._configured = False
+
+    def _configure(self):
+        """Resolve settings on first use so importing this module stays cheap."""
+        if self._configured:
+            return
+        if self.max_entries is None:
+            self.max_entries = setting('ANALYSIS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        if self.redis_url is None:
+            self.redis_url = setting('ANALYSIS_CACHE_REDIS_URL', '')
+        if self.ttl is None:
+            self.ttl = setting('ANALYSIS_CACHE_TTL', DEFAULT_TTL)
+        if self.redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(self.redis_url)
+            except Exception as e:
+                logger.warning("Shared NLP cache disabled: %s", e)
+        self._configured = True
+
+    def key(self, text):
+        """Return the cache key for ``text`` in this namespace."""
+        digest = hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"nlp:{self.namespace}:{digest}"
+
+    def get_many(self, keys):
+        """
+        Look up many keys, checking the local tier before the shared tier.
+
+        Args:
+            keys (list): Keys produced by ``key()``
+
+        Returns:
+            dict: Found keys mapped to their cached values
+        """
+        self._configure()
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                if key in self._local:
+                    self._local.move_to_end(key)
+                    found[key] = self._local[key]
+                    self.stats['local_hits'] += 1
+                else:
+                    missing.append(key)
+
+        if missing and self._redis is not None:
+            try:
+                values = self._redis.mget(missing)
+            except Exception as e:
+                logger.warning("Shared NLP cache read failed: %s", e)
+                values = [None] * len(missing)
+
+            shared = {
+                key: json.loads(value)
+                for key, value in zip(missing, values)
+                if value is not None
+            }
+            self.stats['shared_hits'] += len(shared)
+            self._store_local(shared)
+            found.update(shared)
+            missing = [key for key in missing if key not in shared]
+
+        self.stats['misses'] += len(missing)
+        return found
+
+    def set_many(self, items):
+        """
+        Store computed results in both tiers.
+
+        Args:
+            items (dict): Keys mapped to JSON-serializable values
+        """
+        self._configure()
+        self._store_local(items)
+
+        if items and self._redis is not None:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for key, value in items.items():
+                    pipe.set(key, json.dumps(value), ex=self.ttl)
+                pipe.execute()
+            except Exception as e:
+                logger.warning("Shared NLP cache write failed: %s", e)
+
+    def _store_local(self, items):
+        """Insert items into the LRU tier, evicting the oldest beyond the bound."""
+        with self._lock:
+            for key, value in items.items():
+                self._local[key] = value
+                self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def map(self, texts, compute):
+        """
+        Return cached results for ``texts``, computing only the misses.
+
+        Duplicate texts in the same call are computed once.
+
+        Args:
+            texts (list): Texts to look up
+            compute (callable): Takes a list of texts and returns a list of
+                results in the same order, with None for failed items
+
+        Returns:
+            list: Results in the same order as ``texts``
+        """
+        if not setting('ANALYSIS_CACHE_ENABLED', True):
+            return compute(list(texts))
+
+        keys = [self.key(text) for text in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+
+        # One representative text per missing key
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+
+        if pending:
+            computed = compute(list(pending.values()))
+            fresh = dict(zip(pending, computed))
+            # None marks a failed computation, which must not be cached
+            self.set_many({
+                key: value for key, value in fresh.items() if value is not None
+            })
+            found.update(fresh)
+
+        return [found[key] for key in keys]
+
+    def clear(self):
+        """Drop every entry from the local tier and reset the counters."""
+        with self._lock:
+            self._local.clear()
+            for counter in self.stats:
+                self.stats[counter] = 0
+
+
+# Caches registered by the analysis modules, keyed by namespace
+_caches = {}
+
+
+def get_cache(namespace):
+    """
+    Return the process-wide cache for ``namespace``, creating it if needed.
+
+    Args:
+        namespace (str): Model name and result version
+
+    Returns:
+        ResultCache: Shared cache instance
+    """
+    if namespace not in _caches:
+        _caches[namespace] = ResultCache(namespace)
+    return _caches[namespace]
+
+
+def cache_stats():
+    """
+    Return hit/miss counters for every cache used in this process.
+
+    Returns:
+        dict: Namespace mapped to its counters and local tier size
+    """
+    return {
+        namespace: dict(cache.stats, local_entries=len(cache._local))
+        for namespace, cache in _caches.items()
+    }
@@ -0,0 +1,24 @@
+"""
+Access to the analysis package's Django settings.
+
+The analysis modules are also used outside a configured Django process
+(benchmarks, notebooks), so settings are read with a fallback default.
+"""
+
+
+def setting(name, default):
+    """
+    Read an optional Django setting, falling back outside a Django process.
+
+    Args:
+        name (str): Setting name
+        default: Value returned when the setting or Django itself is missing
+
+    Returns:
+        The setting's value, or ``default``
+    """
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
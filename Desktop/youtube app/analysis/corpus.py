@@ -0,0 +1,83 @@
+"""
+Fixed sample of YouTube-style comments used by the benchmark commands.
+"""
+
+SAMPLE_COMMENTS = [
+    "This is the best explanation of the topic I have ever seen, thank you!",
+    "The audio is really bad in the second half, I could barely hear anything.",
+    "first",
+    "🔥🔥🔥",
+    "Could you make a follow-up video about deploying this to production?",
+    "How did you get the config file to load at 4:32? Mine keeps failing.",
+    "Terrible video, you skipped all the important parts and rushed the ending.",
+    "Subscribe to my channel for free giftcards http://spam.example.com",
+    "I love how calm and clear your voice is, makes learning so much easier.",
+    "The code on screen is blurry at 1080p, please upload in higher resolution.",
+    "Not sure I agree with the conclusion, the benchmark setup looks flawed.",
+    "Anyone else watching this in 2024?",
+    "lol",
+    "Great content as always, keep it up!",
+    "You should consider adding chapters, the video is really long to navigate.",
+    "Why does the example crash when the list is empty? Is that a bug?",
+    "My cat walked across the keyboard while I was watching this haha",
+    "This helped me pass my exam, I owe you one.",
+    "The intro music is way too loud compared to the rest of the video.",
+    "Honestly this was a waste of twenty minutes.",
+    "Can you share the slides or the source code somewhere?",
+    "I tried this and it worked perfectly on the first attempt, amazing.",
+    "The thumbnail is misleading, none of this is covered in the video.",
+    "Please do a video comparing this approach with the older one.",
+    "👍",
+    "Who is here after the update broke everything?",
+    "Your editing has improved so much since the early videos.",
+    "It keeps buffering for me, is the upload broken?",
+    "Meh, it was okay I guess.",
+    "The explanation at the start was confusing but the examples made it click.",
+    "Check out my channel for similar videos!!!",
+    "What microphone are you using? The sound quality is excellent.",
+    "I disagree with almost everything said here and the sources are weak.",
+    "Thanks for the shoutout at the end, made my day!",
+    "The subtitles are out of sync by about two seconds.",
+    "Would love a longer deep dive into the performance section.",
+    "This channel deserves way more subscribers.",
+    "Is there a written version of this tutorial somewhere?",
+    "The background noise makes it really hard to concentrate.",
+    "Watched it twice and still learned something new the second time.",
+]
+
+# Hand-labelled comments for sentiment regression checks, including
+# borderline cases where TextBlob polarity alone is not decisive
+LABELLED_COMMENTS = [
+    ("This is the best explanation of the topic I have ever seen, thank you!", 'positive'),
+    ("The audio is really bad in the second half, I could barely hear anything.", 'negative'),
+    ("Terrible video, you skipped all the important parts and rushed the ending.", 'negative'),
+    ("I love how calm and clear your voice is, makes learning so much easier.", 'positive'),
+    ("Great content as always, keep it up!", 'positive'),
+    ("This helped me pass my exam, I owe you one.", 'positive'),
+    ("Honestly this was a waste of twenty minutes.", 'negative'),
+    ("I tried this and it worked perfectly on the first attempt, amazing.", 'positive'),
+    ("The thumbnail is misleading, none of this is covered in the video.", 'negative'),
+    ("Can you share the slides or the source code somewhere?", 'neutral'),
+    ("Please do a video comparing this approach with the older one.", 'neutral'),
+    ("Is there a written version of this tutorial somewhere?", 'neutral'),
+    ("The background noise makes it really hard to concentrate.", 'negative'),
+    ("Watched it twice and still learned something new the second time.", 'positive'),
+    ("This channel deserves way more subscribers.", 'positive'),
+    ("Why does the example crash when the list is empty? Is that a bug?", 'negative'),
+    ("The code on screen is blurry at 1080p, please upload in higher resolution.", 'negative'),
+    ("Not sure I agree with the conclusion, the benchmark setup looks flawed.", 'negative'),
+    ("My cat walked across the keyboard while I was watching this haha", 'neutral'),
+    ("The intro music is way too loud compared to the rest of the video.", 'negative'),
+    ("Could you make a follow-up video about deploying this to production?", 'neutral'),
+    ("Finally someone who explains this without skipping steps.", 'positive'),
+    ("I followed every step and it still does not work.", 'negative'),
+    ("What microphone are you using for these recordings?", 'neutral'),
+    ("You lost me at the part about decorators.", 'negative'),
+    ("Saved me hours of debugging, thanks a lot.", 'positive'),
+    ("The video starts at 2:15 if you want to skip the intro.", 'neutral'),
+    ("Wow, did not expect it to be this simple.", 'positive'),
+    ("Everything after the first example went over my head.", 'negative'),
+    ("Part two is out on the channel now.", 'neutral'),
+    ("Absolutely brilliant walkthrough, subscribed.", 'positive'),
+    ("The sound keeps cutting out, unwatchable.", 'negative'),
+]
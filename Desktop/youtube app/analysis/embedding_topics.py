@@ -0,0 +1,248 @@
+"""
+Embedding-based topic classifier.
+
+An alternative to zero-shot NLI, which runs one BART-MNLI forward pass per
+(comment, candidate label) pair. Here each comment is encoded once by a
+small sentence-embedding model (mean-pooled MiniLM), and all labels are
+scored with a single NumPy matrix multiply against label embeddings computed
+once per process.
+
+Cosine similarities are mapped to probabilities with a per-label logistic
+calibration fitted against the zero-shot model (see the
+``calibrate_topics`` command), so the ``confidence_threshold`` of
+``extract_topics`` keeps its meaning whichever engine is used.
+"""
+import hashlib
+import json
+import logging
+import threading
+
+import numpy as np
+
+from .batching import DEFAULT_BATCH_SIZE, iter_length_sorted_batches
+from .conf import setting
+from .registry import get_pipeline, model_tag
+
+logger = logging.getLogger(__name__)
+
+# What each candidate topic means, phrased like the comments it should match
+TOPIC_DESCRIPTIONS = {
+    "content quality": "the quality of the video content, explanation or production",
+    "technical issues": "technical problems such as bad audio, blurry video or errors that do not work",
+    "suggestions": "a suggestion or request for a future video or improvement",
+    "questions": "a question asking how, why or what about something in the video",
+    "praise": "praise, thanks and compliments for a great video",
+    "criticism": "criticism and complaints that the video is bad, wrong or disappointing",
+    "spam": "spam, self-promotion, giveaways, links or subscribe to my channel",
+    "off-topic": "an off-topic remark unrelated to the video",
+}
+
+# Logistic calibration used until one is fitted: (slope, intercept) applied
+# to the cosine similarity. Places the 0.3 threshold near cosine 0.22.
+DEFAULT_CALIBRATION = (10.0, -3.0)
+
+_lock = threading.Lock()
+_label_matrices = {}
+_calibration = None
+
+
+def encode(texts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Encode texts into L2-normalized sentence embeddings.
+
+    Token embeddings are mean-pooled over the attention mask, as the
+    sentence-transformers models are trained to be used.
+
+    Args:
+        texts (list): Texts to encode
+        batch_size (int): Number of texts per forward pass
+
+    Returns:
+        numpy.ndarray: Array of shape (len(texts), embedding size)
+    """
+    import torch
+
+    encoder = get_pipeline('embedding')
+    vectors = [None] * len(texts)
+
+    for indices, batch in iter_length_sorted_batches(texts, batch_size):
+        inputs = encoder.tokenizer(
+            batch, padding=True, truncation=True, return_tensors='pt'
+        )
+        with torch.no_grad():
+            hidden = encoder.model(**inputs)[0]
+        mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)).numpy()
+        for index, vector in zip(indices, pooled):
+            vectors[index] = vector
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    matrix = np.vstack(vectors).astype(np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+
+
+def label_matrix(labels):
+    """
+    Return the embeddings of ``labels``' descriptions, computed once.
+
+    Args:
+        labels (list): Topic labels, keys of ``TOPIC_DESCRIPTIONS``
+
+    Returns:
+        numpy.ndarray: Array of shape (len(labels), embedding size)
+    """
+    key = (model_tag('embedding'), tuple(labels))
+    matrix = _label_matrices.get(key)
+    if matrix is None:
+        with _lock:
+            if key not in _label_matrices:
+                _label_matrices[key] = encode(
+                    [TOPIC_DESCRIPTIONS.get(label, label) for label in labels]
+                )
+            matrix = _label_matrices[key]
+    return matrix
+
+
+def load_calibration():
+    """
+    Return the per-label (slope, intercept) calibration in use.
+
+    Read once from the JSON file named by ANALYSIS_TOPIC_CALIBRATION; labels
+    missing from it, or a missing file, use ``DEFAULT_CALIBRATION``.
+
+    Returns:
+        dict: Label mapped to (slope, intercept)
+    """
+    global _calibration
+    if _calibration is None:
+        calibration = {}
+        path = setting('ANALYSIS_TOPIC_CALIBRATION', '')
+        if path:
+            try:
+                with open(path) as f:
+                    calibration = {
+                        label: tuple(params)
+                        for label, params in json.load(f)['labels'].items()
+                    }
+            except FileNotFoundError:
+                logger.info("No topic calibration at %s; using defaults", path)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Ignoring invalid topic calibration %s: %s", path, e)
+        _calibration = calibration
+    return _calibration
+
+
+def calibration_version():
+    """Short fingerprint of the calibration, for result cache namespaces."""
+    payload = json.dumps(sorted(load_calibration().items()))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:8]
+
+
+def similarities(texts, labels, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Return the cosine similarity of every text to every label.
+
+    Args:
+        texts (list): Texts to score
+        labels (list): Topic labels
+        batch_size (int): Number of texts per forward pass
+
+    Returns:
+        numpy.ndarray: Array of shape (len(texts), len(labels))
+    """
+    if not texts:
+        return np.zeros((0, len(labels)), dtype=np.float32)
+    # Both sides are normalized, so one matmul gives every cosine similarity
+    return encode(texts, batch_size) @ label_matrix(labels).T
+
+
+def calibrate(scores, labels):
+    """
+    Map cosine similarities to topic probabilities.
+
+    Args:
+        scores (numpy.ndarray): Output of ``similarities``
+        labels (list): Labels of the columns of ``scores``
+
+    Returns:
+        numpy.ndarray: Probabilities with the same shape as ``scores``
+    """
+    calibration = load_calibration()
+    params = np.array([calibration.get(label, DEFAULT_CALIBRATION) for label in labels])
+    return 1.0 / (1.0 + np.exp(-(scores * params[:, 0] + params[:, 1])))
+
+
+def score_topics(texts, labels, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Score texts against topic labels in the zero-shot result format.
+
+    Args:
+        texts (list): Cleaned texts to classify
+        labels (list): Candidate topic labels
+        batch_size (int): Number of texts per forward pass
+
+    Returns:
+        list: One {'labels', 'scores'} dict per text, labels sorted by
+            descending probability like the zero-shot pipeline's output
+    """
+    probabilities = calibrate(similarities(texts, labels, batch_size), labels)
+    results = []
+    for row in probabilities:
+        order = np.argsort(-row)
+        results.append({
+            'labels': [labels[i] for i in order],
+            'scores': [float(row[i]) for i in order],
+        })
+    return results
+
+
+def fit_calibration(scores, targets, steps=500, learning_rate=0.5):
+    """
+    Fit a logistic calibration for one label by gradient descent.
+
+    Targets may be probabilities rather than 0/1 decisions, so the fitted
+    curve reproduces the reference model's scores and not just its
+    decisions at one threshold.
+
+    Args:
+        scores (numpy.ndarray): Cosine similarities of one label
+        targets (numpy.ndarray): Reference probabilities for the same texts
+        steps (int): Gradient descent iterations
+        learning_rate (float): Step size
+
+    Returns:
+        tuple: (slope, intercept)
+    """
+    slope, intercept = DEFAULT_CALIBRATION
+    # Standardize for stable steps, then map the parameters back
+    mean, std = float(scores.mean()), float(scores.std()) or 1.0
+    x = (scores - mean) / std
+    a, b = slope * std, intercept + slope * mean
+
+    for _ in range(steps):
+        predicted = 1.0 / (1.0 + np.exp(-(a * x + b)))
+        error = predicted - targets
+        a -= learning_rate * float((error * x).mean())
+        b -= learning_rate * float(error.mean())
+
+    return a / std, b - a * mean / std
+
+
+def save_calibration(path, calibration, metadata=None):
+    """
+    Write a calibration file and make it the one in use.
+
+    Args:
+        path (str): Destination JSON file
+        calibration (dict): Label mapped to (slope, intercept)
+        metadata (dict): Extra fields to record, e.g. the corpus size
+    """
+    global _calibration
+    with open(path, 'w') as f:
+        json.dump(dict(
+            metadata or {},
+            model=model_tag('embedding'),
+            labels={label: list(params) for label, params in calibration.items()},
+        ), f, indent=2)
+    _calibration = {label: tuple(params) for label, params in calibration.items()}
@@ -0,0 +1,117 @@
+"""
+Management command comparing per-comment and batched analysis throughput.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from analysis.cache import cache_stats
+from analysis.corpus import SAMPLE_COMMENTS
+from analysis.registry import registry
+from analysis.sentiment import analyze_sentiment, analyze_sentiment_batch, cascade_stats
+from analysis.topic_modeling import TOPIC_ENGINES, extract_topics, extract_topics_batch
+from analysis.triage import reset_triage_stats, triage_batch, triage_stats
+
+
+class Command(BaseCommand):
+    """
+    Run the sentiment and topic models over the same comments one at a time
+    and in micro-batches, and report comments/sec for each path.
+
+    Usage:
+        python manage.py benchmark_analysis --count 500 --batch-size 32
+        python manage.py benchmark_analysis --video 12
+        python manage.py benchmark_analysis --topic-engine embedding
+    """
+    help = 'Benchmark per-comment vs batched NLP analysis throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=200,
+            help='Number of comments to analyze (sample corpus is repeated as needed)'
+        )
+        parser.add_argument(
+            '--video', type=int, default=None,
+            help='Benchmark on stored comments of this Video ID instead of the sample corpus'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ANALYSIS_BATCH_SIZE,
+            help='Micro-batch size for the batched path'
+        )
+        parser.add_argument(
+            '--topic-engine', choices=TOPIC_ENGINES, default=settings.ANALYSIS_TOPIC_ENGINE,
+            help='Topic engine to benchmark'
+        )
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help='Leave the NLP result cache enabled (by default it is bypassed)'
+        )
+
+    def handle(self, *args, **options):
+        texts = self._load_texts(options['video'], options['count'])
+        if not texts:
+            self.stderr.write('No comments to benchmark.')
+            return
+
+        batch_size = options['batch_size']
+        engine = options['topic_engine']
+        self.stdout.write(
+            f"Benchmarking {len(texts)} comments "
+            f"(batch size {batch_size}, {engine} topics)"
+        )
+
+        # Warm both pipelines up so model loading is not timed
+        analyze_sentiment(texts[0])
+        extract_topics(texts[0], engine=engine)
+        for name, stats in registry.stats()['models'].items():
+            self.stdout.write(
+                f"Loaded {name} in {stats['load_seconds']}s "
+                f"(+{stats['rss_delta_mb']} MB resident)"
+            )
+
+        with override_settings(ANALYSIS_CACHE_ENABLED=options['with_cache']):
+            single = self._time(lambda: [
+                (analyze_sentiment(text), extract_topics(text, engine=engine))
+                for text in texts
+            ])
+            batched = self._time(lambda: (
+                analyze_sentiment_batch(texts, batch_size=batch_size),
+                extract_topics_batch(texts, batch_size=batch_size, engine=engine)
+            ))
+            # Batched, with obvious comments labelled by triage rules
+            reset_triage_stats()
+            triaged = self._time(lambda: triage_batch(texts, lambda ambiguous: list(zip(
+                analyze_sentiment_batch(ambiguous, batch_size=batch_size),
+                extract_topics_batch(ambiguous, batch_size=batch_size, engine=engine)
+            ))))
+
+        for name, elapsed in (('per-comment', single), ('batched', batched), ('triaged', triaged)):
+            self.stdout.write(
+                f"{name:>12}: {elapsed:8.2f}s  {len(texts) / elapsed:8.1f} comments/sec"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {single / batched:.2f}x"))
+        self.stdout.write(f"Triage: {triage_stats()}")
+        self.stdout.write(f"Sentiment cascade: {cascade_stats()}")
+
+        for namespace, stats in cache_stats().items():
+            self.stdout.write(f"Cache {namespace}: {stats}")
+
+    def _load_texts(self, video_id, count):
+        """Return the texts to benchmark, from the database or the sample corpus."""
+        if video_id is not None:
+            from comments.models import Comment
+            return list(
+                Comment.objects.filter(video_id=video_id)
+                .values_list('text', flat=True)[:count]
+            )
+        repeats = count // len(SAMPLE_COMMENTS) + 1
+        return (SAMPLE_COMMENTS * repeats)[:count]
+
+    @staticmethod
+    def _time(func):
+        """Return the wall-clock seconds taken by ``func()``."""
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
@@ -0,0 +1,126 @@
+"""
+Management command benchmarking text cleaning and keyword extraction.
+"""
+import re
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis.corpus import SAMPLE_COMMENTS
+from analysis.text import clean_text, extract_keywords, tokenize
+
+
+def legacy_clean_text(text):
+    """``clean_text`` as it was: three uncompiled substitutions and a split/join."""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    return ' '.join(text.split())
+
+
+def legacy_keywords(cleaned_text):
+    """Keyword extraction as it was: TextBlob noun phrases plus frequent words."""
+    from textblob import TextBlob
+
+    keywords = list(TextBlob(cleaned_text).noun_phrases)
+    for word, freq in Counter(cleaned_text.split()).most_common(5):
+        if len(word) > 3 and word not in keywords and freq > 1:
+            keywords.append(word)
+    return keywords[:5]
+
+
+class Command(BaseCommand):
+    """
+    Time the cleaning and keyword steps of topic extraction, previous code
+    against ``analysis.text``, and report seconds per 10k comments.
+
+    Also checks that ``clean_text`` still produces exactly the old output
+    on every comment, and shows sample keywords from both extractors.
+
+    Usage:
+        python manage.py benchmark_text
+        python manage.py benchmark_text --video 12 --count 10000
+    """
+    help = 'Benchmark text cleaning and keyword extraction against the previous code'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=10000,
+            help='Number of comments (the sample corpus is repeated as needed)'
+        )
+        parser.add_argument(
+            '--video', type=int, default=None,
+            help='Benchmark stored comments of this Video ID instead of the sample corpus'
+        )
+        parser.add_argument(
+            '--samples', type=int, default=5,
+            help='Number of comments to show keywords for'
+        )
+
+    def handle(self, *args, **options):
+        texts = self._load_texts(options['video'], options['count'])
+        if not texts:
+            raise CommandError('No comments to benchmark.')
+        per_10k = 10000 / len(texts)
+        self.stdout.write(f"Benchmarking {len(texts)} comments")
+
+        legacy_clean, legacy_clean_seconds = self._time(lambda: [legacy_clean_text(t) for t in texts])
+        cleaned, clean_seconds = self._time(lambda: [clean_text(t) for t in texts])
+        mismatches = sum(a != b for a, b in zip(legacy_clean, cleaned))
+
+        try:
+            legacy, legacy_seconds = self._time(lambda: [
+                legacy_keywords(c) for c in legacy_clean if len(c.split()) >= 3
+            ])
+        except Exception as e:
+            # TextBlob's noun phrase extractor needs its corpora downloaded
+            self.stderr.write(f"Previous keyword extraction failed: {e}")
+            legacy, legacy_seconds = None, None
+        current, current_seconds = self._time(lambda: [
+            extract_keywords(tokens) for tokens in map(tokenize, texts) if len(tokens) >= 3
+        ])
+
+        self.stdout.write(
+            f"clean_text: previous {legacy_clean_seconds * per_10k:.3f}s, "
+            f"now {clean_seconds * per_10k:.3f}s per 10k comments "
+            f"({legacy_clean_seconds / clean_seconds:.2f}x), {mismatches} differing outputs"
+        )
+        if legacy_seconds is not None:
+            self.stdout.write(
+                f"tokenize + keywords: previous {legacy_seconds * per_10k:.3f}s, "
+                f"now {current_seconds * per_10k:.3f}s per 10k comments "
+                f"({legacy_seconds / current_seconds:.1f}x)"
+            )
+        else:
+            self.stdout.write(
+                f"tokenize + keywords: now {current_seconds * per_10k:.3f}s per 10k comments"
+            )
+
+        long_enough = [t for t in texts if len(tokenize(t)) >= 3]
+        for index, text in enumerate(long_enough[:options['samples']]):
+            self.stdout.write(f"  {text[:60]!r}")
+            if legacy is not None:
+                self.stdout.write(f"    previous: {legacy[index]}")
+            self.stdout.write(f"    now:      {current[index]}")
+
+        if mismatches:
+            raise CommandError(f"clean_text output changed for {mismatches} comments")
+
+    def _load_texts(self, video_id, count):
+        """Return the comments to benchmark, from the database or the sample corpus."""
+        if video_id is not None:
+            from comments.models import Comment
+            return list(
+                Comment.objects.filter(video_id=video_id)
+                .values_list('text', flat=True)[:count]
+            )
+        repeats = count // len(SAMPLE_COMMENTS) + 1
+        return (SAMPLE_COMMENTS * repeats)[:count]
+
+    @staticmethod
+    def _time(run):
+        """Return the result of ``run`` and its wall-clock duration."""
+        start = time.perf_counter()
+        result = run()
+        return result, time.perf_counter() - start
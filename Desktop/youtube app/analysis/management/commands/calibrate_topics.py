@@ -0,0 +1,133 @@
+"""
+Management command calibrating the embedding topic engine against zero-shot.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analysis import embedding_topics
+from analysis.corpus import SAMPLE_COMMENTS
+from analysis.registry import get_pipeline
+from analysis.text import clean_text
+from analysis.topic_modeling import CANDIDATE_TOPICS
+
+
+class Command(BaseCommand):
+    """
+    Fit the per-label logistic calibration of the embedding topic engine so
+    that its probabilities track the zero-shot model's, then report how
+    often both engines assign the same topics and how long each takes.
+
+    The zero-shot scores are the targets, so a ``confidence_threshold`` of
+    0.3 selects roughly the same topics with either engine. Calibrate on
+    real comments (``--video``) where possible; the sample corpus is small.
+
+    Usage:
+        python manage.py calibrate_topics
+        python manage.py calibrate_topics --video 12 --count 2000
+    """
+    help = 'Calibrate embedding topic scores against the zero-shot classifier'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=len(SAMPLE_COMMENTS),
+            help='Number of comments to calibrate on'
+        )
+        parser.add_argument(
+            '--video', type=int, default=None,
+            help='Calibrate on stored comments of this Video ID instead of the sample corpus'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ANALYSIS_BATCH_SIZE,
+            help='Micro-batch size for both engines'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.3,
+            help='Confidence threshold used to compare topic assignments'
+        )
+        parser.add_argument(
+            '--output', default=settings.ANALYSIS_TOPIC_CALIBRATION,
+            help='Calibration file to write'
+        )
+
+    def handle(self, *args, **options):
+        texts = [
+            cleaned for cleaned in map(clean_text, self._load_texts(options))
+            # Texts this short are never classified by either engine
+            if len(cleaned.split()) >= 3
+        ]
+        if not texts:
+            raise CommandError('No comments long enough to calibrate on.')
+        batch_size = options['batch_size']
+        threshold = options['threshold']
+        self.stdout.write(f"Calibrating on {len(texts)} comments")
+
+        start = time.perf_counter()
+        reference = self._zero_shot_scores(texts, batch_size)
+        zero_shot_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        similarities = embedding_topics.similarities(texts, CANDIDATE_TOPICS, batch_size)
+        embedding_seconds = time.perf_counter() - start
+
+        before = embedding_topics.calibrate(similarities, CANDIDATE_TOPICS)
+        calibration = {
+            label: embedding_topics.fit_calibration(similarities[:, i], reference[:, i])
+            for i, label in enumerate(CANDIDATE_TOPICS)
+        }
+        embedding_topics.save_calibration(
+            options['output'], calibration, {'comments': len(texts), 'threshold': threshold}
+        )
+        after = embedding_topics.calibrate(similarities, CANDIDATE_TOPICS)
+
+        self.stdout.write(
+            f"zero-shot: {len(texts) / zero_shot_seconds:8.1f} comments/sec "
+            f"({len(CANDIDATE_TOPICS)} forward passes per comment)"
+        )
+        self.stdout.write(
+            f"embedding: {len(texts) / embedding_seconds:8.1f} comments/sec "
+            "(1 forward pass per comment)"
+        )
+        for name, probabilities in (('before', before), ('after', after)):
+            exact, jaccard = self._agreement(reference > threshold, probabilities > threshold)
+            self.stdout.write(
+                f"Agreement with zero-shot {name} calibration: "
+                f"exact {exact:.1%}, Jaccard {jaccard:.3f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def _load_texts(self, options):
+        """Return the texts to calibrate on, from the database or the sample corpus."""
+        if options['video'] is not None:
+            from comments.models import Comment
+            return list(
+                Comment.objects.filter(video_id=options['video'])
+                .values_list('text', flat=True)[:options['count']]
+            )
+        repeats = options['count'] // len(SAMPLE_COMMENTS) + 1
+        return (SAMPLE_COMMENTS * repeats)[:options['count']]
+
+    @staticmethod
+    def _zero_shot_scores(texts, batch_size):
+        """Return zero-shot probabilities as an array of (texts, CANDIDATE_TOPICS)."""
+        results = get_pipeline('zero_shot')(
+            texts, candidate_labels=CANDIDATE_TOPICS, multi_label=True, batch_size=batch_size
+        )
+        if isinstance(results, dict):
+            results = [results]
+        scores = np.zeros((len(texts), len(CANDIDATE_TOPICS)), dtype=np.float32)
+        for row, result in enumerate(results):
+            for label, score in zip(result['labels'], result['scores']):
+                scores[row, CANDIDATE_TOPICS.index(label)] = score
+        return scores
+
+    @staticmethod
+    def _agreement(expected, actual):
+        """Return the exact-match rate and mean Jaccard index of two label masks."""
+        exact = float((expected == actual).all(axis=1).mean())
+        union = (expected | actual).sum(axis=1)
+        overlap = (expected & actual).sum(axis=1)
+        jaccard = np.where(union > 0, overlap / np.maximum(union, 1), 1.0)
+        return exact, float(jaccard.mean())
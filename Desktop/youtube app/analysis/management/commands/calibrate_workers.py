@@ -0,0 +1,191 @@
+"""
+Management command finding the fastest split of worker processes and threads.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from analysis.corpus import SAMPLE_COMMENTS
+from analysis.threads import available_cores, configure_threads
+
+
+def _powers_of_two(limit):
+    """Return 1, 2, 4, ... up to and including ``limit`` if it is not a power of two."""
+    values = []
+    value = 1
+    while value < limit:
+        values.append(value)
+        value *= 2
+    values.append(limit)
+    return values
+
+
+def _parse_counts(value, default):
+    """Parse a comma-separated list of positive integers."""
+    if not value:
+        return default
+    try:
+        counts = sorted({int(item) for item in value.split(',') if item})
+    except ValueError:
+        raise CommandError(f"Expected comma-separated numbers, got '{value}'")
+    if not counts or counts[0] < 1:
+        raise CommandError(f"Counts must be positive, got '{value}'")
+    return counts
+
+
+def _worker(index, threads, pin, texts, batch_size, barrier, results):
+    """
+    Run in each benchmark process: configure threads, load the models, wait
+    for every process to be ready, then analyze ``texts``.
+    """
+    from analysis.registry import registry
+    from analysis.sentiment import analyze_sentiment_batch
+    from analysis.topic_modeling import extract_topics_batch
+
+    try:
+        configure_threads(threads, index=index, pin=pin)
+        with override_settings(ANALYSIS_CACHE_ENABLED=False):
+            registry.warm_up(['sentiment', 'zero_shot'])
+            # Untimed pass so lazy initialisation is not measured
+            analyze_sentiment_batch(texts[:batch_size], batch_size=batch_size)
+            extract_topics_batch(texts[:batch_size], batch_size=batch_size)
+            barrier.wait()
+
+            start = time.perf_counter()
+            analyze_sentiment_batch(texts, batch_size=batch_size)
+            extract_topics_batch(texts, batch_size=batch_size)
+            results.put((index, time.perf_counter() - start))
+    except Exception as e:
+        # Release the other processes and report instead of hanging them
+        barrier.abort()
+        results.put((index, e))
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the analysis functions with every combination of worker
+    processes and threads per process, and recommend the fastest for this
+    host.
+
+    Each combination runs the given number of processes side by side, as a
+    prefork worker would, each limited to its threads (and pinned to its own
+    cores with ``--pin``) and analyzing an equal share of the comments.
+    Models are loaded before timing, and the result cache is disabled.
+
+    By default only combinations that fit the cores are tried; add
+    ``--oversubscribe`` to see how throughput collapses when they do not.
+    Every process loads its own copy of the models, so mind the memory.
+
+    Usage:
+        python manage.py calibrate_workers
+        python manage.py calibrate_workers --processes 1,2,4 --threads 1,2,4 --count 256
+    """
+    help = 'Find the fastest processes x threads split for inference workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', default='',
+            help='Comma-separated process counts (default: powers of two up to the core count)'
+        )
+        parser.add_argument(
+            '--threads', default='',
+            help='Comma-separated threads per process (default: powers of two up to the core count)'
+        )
+        parser.add_argument(
+            '--count', type=int, default=128,
+            help='Comments analyzed per combination, split over its processes'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ANALYSIS_BATCH_SIZE,
+            help='Micro-batch size'
+        )
+        parser.add_argument(
+            '--pin', action='store_true',
+            help='Pin each process to its own cores, as INFERENCE_CPU_AFFINITY does'
+        )
+        parser.add_argument(
+            '--oversubscribe', action='store_true',
+            help='Also try combinations using more threads than there are cores'
+        )
+
+    def handle(self, *args, **options):
+        cores = len(available_cores())
+        process_counts = _parse_counts(options['processes'], _powers_of_two(cores))
+        thread_counts = _parse_counts(options['threads'], _powers_of_two(cores))
+        combinations = [
+            (processes, threads)
+            for processes in process_counts
+            for threads in thread_counts
+            if options['oversubscribe'] or processes * threads <= cores
+        ]
+        if not combinations:
+            raise CommandError(f"No combination fits {cores} cores; try --oversubscribe")
+
+        repeats = options['count'] // len(SAMPLE_COMMENTS) + 1
+        texts = (SAMPLE_COMMENTS * repeats)[:options['count']]
+        self.stdout.write(
+            f"Calibrating on {cores} cores with {len(texts)} comments per combination"
+        )
+        self.stdout.write(f"{'processes':>9} {'threads':>7} {'comments/sec':>13}")
+
+        # Fork, as Celery's prefork pool does
+        context = multiprocessing.get_context('fork')
+        results = {}
+        for processes, threads in combinations:
+            rate = self._run(context, processes, threads, texts, options)
+            results[(processes, threads)] = rate
+            marker = ' (oversubscribed)' if processes * threads > cores else ''
+            self.stdout.write(f"{processes:>9} {threads:>7} {rate:>13.1f}{marker}")
+
+        (processes, threads), rate = max(results.items(), key=lambda item: item[1])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fastest: {processes} processes x {threads} threads ({rate:.1f} comments/sec)"
+        ))
+        self.stdout.write(
+            f"  INFERENCE_THREADS={threads}"
+            f"{' INFERENCE_CPU_AFFINITY=True' if options['pin'] else ''} "
+            f"celery -A youtube_analyzer worker -Q inference,celery -P prefork -c {processes}"
+        )
+
+    def _run(self, context, processes, threads, texts, options):
+        """Run one combination and return its aggregate throughput."""
+        shares = [texts[i::processes] for i in range(processes)]
+        barrier = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=_worker,
+                args=(index, threads, options['pin'], share, options['batch_size'], barrier, results)
+            )
+            for index, share in enumerate(shares)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            # Every process has loaded its models once the barrier opens
+            barrier.wait(timeout=1800)
+            start = time.perf_counter()
+            for _ in workers:
+                _, outcome = results.get(timeout=3600)
+                if isinstance(outcome, Exception):
+                    raise outcome
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            if isinstance(e, threading.BrokenBarrierError):
+                # A process failed before the start; it reports why
+                try:
+                    _, e = results.get(timeout=10)
+                except queue.Empty:
+                    pass
+            raise CommandError(f"Benchmark with {processes}x{threads} failed: {e!r}")
+        finally:
+            for worker in workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+        return len(texts) / elapsed
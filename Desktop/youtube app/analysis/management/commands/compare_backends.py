@@ -0,0 +1,197 @@
+"""
+Management command comparing inference backends for parity, latency and memory.
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from analysis.corpus import SAMPLE_COMMENTS
+from analysis.registry import BACKENDS, DEFAULT_BACKEND, registry
+from analysis.sentiment import analyze_sentiment, analyze_sentiment_batch
+from analysis.topic_modeling import CANDIDATE_TOPICS, extract_topics_batch
+
+
+class Command(BaseCommand):
+    """
+    Run the sentiment and zero-shot models under each inference backend on
+    the same comments and report, per backend:
+
+    - label agreement with the fp32 PyTorch reference, for both the final
+      labels the app stores and the raw top label of each model
+    - batched throughput and single-comment latency
+    - model load time and resident memory
+
+    The reference backend always runs first. With ``--min-agreement`` the
+    command fails if any backend agrees less often than that, so it can be
+    used as a parity check before switching ANALYSIS_INFERENCE_BACKEND.
+
+    Memory is measured in one process, so each backend's load delta excludes
+    the models loaded before it; run one backend at a time for absolute
+    figures.
+
+    Usage:
+        python manage.py compare_backends --backends pytorch,quantized,onnx
+        python manage.py compare_backends --backends quantized --min-agreement 0.95
+    """
+    help = 'Compare label parity, latency and memory of the inference backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends', default=','.join(BACKENDS),
+            help='Comma-separated backends to compare against the PyTorch reference'
+        )
+        parser.add_argument(
+            '--count', type=int, default=len(SAMPLE_COMMENTS),
+            help='Number of comments (the sample corpus is repeated as needed)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ANALYSIS_BATCH_SIZE,
+            help='Micro-batch size for the throughput measurement'
+        )
+        parser.add_argument(
+            '--latency-samples', type=int, default=20,
+            help='Comments analyzed one at a time for the latency measurement'
+        )
+        parser.add_argument(
+            '--min-agreement', type=float, default=None,
+            help='Fail if final sentiment or topic agreement drops below this fraction'
+        )
+
+    def handle(self, *args, **options):
+        backends = [name for name in options['backends'].split(',') if name]
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(sorted(unknown))}")
+        # The reference is needed to measure agreement
+        backends = [DEFAULT_BACKEND] + [name for name in backends if name != DEFAULT_BACKEND]
+
+        repeats = options['count'] // len(SAMPLE_COMMENTS) + 1
+        texts = (SAMPLE_COMMENTS * repeats)[:options['count']]
+        self.stdout.write(
+            f"Comparing {', '.join(backends)} on {len(texts)} comments "
+            f"(batch size {options['batch_size']})"
+        )
+
+        results = {}
+        for backend in backends:
+            # Bypass the result cache so every backend actually runs inference
+            with override_settings(
+                ANALYSIS_INFERENCE_BACKEND=backend, ANALYSIS_CACHE_ENABLED=False
+            ):
+                try:
+                    results[backend] = self._run(texts, options)
+                except ImportError as e:
+                    if backend == DEFAULT_BACKEND:
+                        raise
+                    self.stderr.write(f"Skipping {backend}: {e}")
+
+        reference = results[DEFAULT_BACKEND]
+        failures = []
+        for backend, result in results.items():
+            parity = self._parity(reference, result)
+            self._report(backend, result, parity)
+            if backend != DEFAULT_BACKEND and options['min_agreement'] is not None:
+                worst = min(parity['sentiment'], parity['topics_exact'])
+                if worst < options['min_agreement']:
+                    failures.append(f"{backend} ({worst:.1%})")
+
+        if failures:
+            raise CommandError(
+                f"Agreement below {options['min_agreement']:.1%}: {', '.join(failures)}"
+            )
+
+    def _run(self, texts, options):
+        """Load the models and analyze ``texts`` under the active backend."""
+        rss_before = registry.stats()['rss_mb']
+        start = time.perf_counter()
+        registry.warm_up(['sentiment', 'zero_shot'])
+        load_seconds = time.perf_counter() - start
+        rss_after = registry.stats()['rss_mb']
+
+        start = time.perf_counter()
+        sentiments = analyze_sentiment_batch(texts, batch_size=options['batch_size'])
+        sentiment_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        topics = extract_topics_batch(texts, batch_size=options['batch_size'])
+        topic_seconds = time.perf_counter() - start
+
+        latencies = []
+        for text in texts[:options['latency_samples']]:
+            start = time.perf_counter()
+            analyze_sentiment(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        # Raw top labels, before the TextBlob blend and topic thresholding
+        sentiment_model = registry.get('sentiment')
+        raw_sentiment = [
+            max(scores, key=lambda x: x['score'])['label']
+            for scores in sentiment_model(texts, batch_size=options['batch_size'], truncation=True)
+        ]
+        raw_topics = [
+            result['labels'][0]
+            for result in registry.get('zero_shot')(
+                texts, candidate_labels=CANDIDATE_TOPICS, multi_label=True,
+                batch_size=options['batch_size']
+            )
+        ]
+
+        return {
+            'sentiments': sentiments,
+            'topics': [set(item[0]) for item in topics],
+            'raw_sentiment': raw_sentiment,
+            'raw_topics': raw_topics,
+            'load_seconds': load_seconds,
+            'load_mb': rss_after - rss_before,
+            'rss_mb': rss_after,
+            'sentiment_rate': len(texts) / sentiment_seconds,
+            'topic_rate': len(texts) / topic_seconds,
+            'latency_p50': statistics.median(latencies) if latencies else 0.0,
+            'latency_p95': (
+                statistics.quantiles(latencies, n=20)[-1]
+                if len(latencies) >= 2 else (latencies or [0.0])[0]
+            ),
+        }
+
+    @staticmethod
+    def _parity(reference, result):
+        """Return the fractions of comments where ``result`` matches ``reference``."""
+        def agreement(a, b):
+            return sum(x == y for x, y in zip(a, b)) / len(a)
+
+        jaccard = [
+            len(a & b) / len(a | b) if a | b else 1.0
+            for a, b in zip(reference['topics'], result['topics'])
+        ]
+        return {
+            'sentiment': agreement(reference['sentiments'], result['sentiments']),
+            'raw_sentiment': agreement(reference['raw_sentiment'], result['raw_sentiment']),
+            'topics_exact': agreement(reference['topics'], result['topics']),
+            'topics_jaccard': statistics.mean(jaccard),
+            'raw_topics': agreement(reference['raw_topics'], result['raw_topics']),
+        }
+
+    def _report(self, backend, result, parity):
+        """Print one backend's measurements."""
+        self.stdout.write(self.style.MIGRATE_HEADING(backend))
+        self.stdout.write(
+            f"  load: {result['load_seconds']:.1f}s, +{result['load_mb']:.0f} MB "
+            f"(process {result['rss_mb']:.0f} MB resident)"
+        )
+        self.stdout.write(
+            f"  throughput: sentiment {result['sentiment_rate']:.1f}/s, "
+            f"topics {result['topic_rate']:.1f}/s"
+        )
+        self.stdout.write(
+            f"  single-comment sentiment latency: p50 {result['latency_p50']:.1f} ms, "
+            f"p95 {result['latency_p95']:.1f} ms"
+        )
+        self.stdout.write(
+            f"  agreement with {DEFAULT_BACKEND}: "
+            f"sentiment {parity['sentiment']:.1%} (raw {parity['raw_sentiment']:.1%}), "
+            f"topics exact {parity['topics_exact']:.1%}, "
+            f"Jaccard {parity['topics_jaccard']:.3f} (raw top label {parity['raw_topics']:.1%})"
+        )
@@ -0,0 +1,145 @@
+"""
+Management command checking the sentiment cascade against the full hybrid.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from textblob import TextBlob
+
+from analysis.corpus import LABELLED_COMMENTS
+from analysis.registry import get_pipeline
+from analysis.sentiment import (
+    CASCADE_STAGES, _resolve_sentiment, cascade_config, cascade_stats,
+    reset_cascade_stats, run_cascade
+)
+
+
+class Command(BaseCommand):
+    """
+    Label a hand-labelled corpus three ways and compare:
+
+    - the full hybrid, computing both TextBlob and transformer scores for
+      every comment and combining them as ``analyze_sentiment`` always did
+    - the configured cascade (ANALYSIS_SENTIMENT_CASCADE and thresholds)
+    - any extra cascade orders given with ``--orders``
+
+    For each it reports accuracy against the hand labels, agreement with
+    the full hybrid, mean latency per comment and which path each comment
+    took. With ``--require-parity`` the command fails unless the configured
+    cascade gives exactly the full hybrid's labels.
+
+    Models are loaded before timing, and the result cache is bypassed.
+
+    Usage:
+        python manage.py evaluate_sentiment
+        python manage.py evaluate_sentiment --orders transformer,textblob --repeat 10
+    """
+    help = 'Compare the sentiment cascade with the full hybrid on a labelled corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders', nargs='*', default=[],
+            help='Extra comma-separated cascade orders to evaluate'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Times the corpus is labelled when measuring latency'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ANALYSIS_BATCH_SIZE,
+            help='Micro-batch size for the transformer'
+        )
+        parser.add_argument(
+            '--require-parity', action='store_true',
+            help='Fail unless the configured cascade matches the full hybrid exactly'
+        )
+
+    def handle(self, *args, **options):
+        texts = [text for text, _ in LABELLED_COMMENTS]
+        expected = [label for _, label in LABELLED_COMMENTS]
+        batch_size = options['batch_size']
+        # Load the model outside the timed runs
+        get_pipeline('sentiment')
+
+        configured, thresholds = cascade_config()
+        orders = [configured]
+        for order in options['orders']:
+            order = tuple(name for name in order.split(',') if name)
+            if set(order) - set(CASCADE_STAGES) or not order:
+                raise CommandError(f"Invalid cascade order: {','.join(order)}")
+            if order not in orders:
+                orders.append(order)
+
+        baseline, baseline_ms = self._time(
+            lambda: self._full_hybrid(texts, thresholds, batch_size), options['repeat'], len(texts)
+        )
+        self._report('full hybrid', baseline, expected, baseline, baseline_ms)
+
+        parity = None
+        for order in orders:
+            with override_settings(ANALYSIS_SENTIMENT_CASCADE=list(order)):
+                reset_cascade_stats()
+                (labels, _), mean_ms = self._time(
+                    lambda: run_cascade(texts, batch_size), options['repeat'], len(texts)
+                )
+                stats = cascade_stats()
+            agreement = self._report(
+                f"cascade {' > '.join(order)}", labels, expected, baseline, mean_ms
+            )
+            runs = options['repeat'] + 1
+            self.stdout.write(
+                "  paths per comment: " + ', '.join(
+                    f"{path} {count / runs / len(texts):.0%}"
+                    for path, count in sorted(stats['paths'].items())
+                )
+            )
+            self.stdout.write(
+                f"  speed-up over full hybrid: {baseline_ms / max(mean_ms, 1e-9):.2f}x"
+            )
+            if order == configured:
+                parity = agreement
+
+        if options['require_parity'] and parity < 1.0:
+            raise CommandError(
+                f"Configured cascade agrees with the full hybrid on only {parity:.1%} of comments"
+            )
+
+    @staticmethod
+    def _full_hybrid(texts, thresholds, batch_size):
+        """Compute both signals for every text and combine them."""
+        transformer_results = get_pipeline('sentiment')(
+            texts, batch_size=batch_size, truncation=True
+        )
+        return [
+            _resolve_sentiment(result, TextBlob(text).sentiment.polarity, thresholds)
+            for text, result in zip(texts, transformer_results)
+        ]
+
+    @staticmethod
+    def _time(run, repeat, count):
+        """Run once untimed, then ``repeat`` times; return the last result and mean ms per text."""
+        result = run()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = run()
+        elapsed = time.perf_counter() - start
+        return result, elapsed * 1000 / max(repeat * count, 1)
+
+    def _report(self, name, labels, expected, baseline, mean_ms):
+        """Print accuracy, agreement and latency; return the agreement with the baseline."""
+        accuracy = sum(a == b for a, b in zip(labels, expected)) / len(expected)
+        agreement = sum(a == b for a, b in zip(labels, baseline)) / len(baseline)
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f"  accuracy {accuracy:.1%}, agreement with full hybrid {agreement:.1%}, "
+            f"mean latency {mean_ms:.2f} ms/comment"
+        )
+        self.stdout.write(
+            "  labels: " + ', '.join(
+                f"{label} {count}" for label, count in sorted(Counter(labels).items())
+            )
+        )
+        return agreement
@@ -0,0 +1,180 @@
+"""
+Management command measuring how much memory inference worker processes use.
+"""
+import multiprocessing
+import queue
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from analysis.corpus import SAMPLE_COMMENTS
+from analysis.preload import child_pids, preload_models, process_memory
+from analysis.registry import registry
+from analysis.threads import configure_threads, threads_per_process
+
+MB = 2 ** 20
+
+
+def _worker(index, threads, models, texts, batch_size, ready, release, errors):
+    """
+    Run in each pool process: load the models (unless inherited), analyze
+    ``texts`` so inference touches the pages it would in a worker, then wait
+    to be measured.
+    """
+    from analysis.sentiment import analyze_sentiment_batch
+    from analysis.topic_modeling import extract_topics_batch
+
+    try:
+        configure_threads(threads)
+        with override_settings(ANALYSIS_CACHE_ENABLED=False):
+            registry.warm_up(models)
+            analyze_sentiment_batch(texts, batch_size=batch_size)
+            extract_topics_batch(texts, batch_size=batch_size)
+        ready.wait()
+        release.wait()
+    except Exception as e:
+        # Release the other processes and report instead of hanging them
+        ready.abort()
+        errors.put((index, e))
+
+
+class Command(BaseCommand):
+    """
+    Measure the memory of a prefork pool of inference processes, with each
+    process loading its own models and with the models preloaded in the
+    parent (ANALYSIS_PRELOAD_MODELS), and report the saving.
+
+    Memory is read from /proc/<pid>/smaps_rollup, so this only works on
+    Linux. RSS counts shared pages in every process; PSS shares them out
+    and USS is each process's private memory, so the pool's PSS total is
+    its real footprint.
+
+    With ``--pid`` the pool of a running Celery worker is measured instead:
+    pass the PID of the worker's main process.
+
+    Usage:
+        python manage.py measure_worker_memory
+        python manage.py measure_worker_memory --processes 4 --count 64
+        python manage.py measure_worker_memory --pid 12345
+    """
+    help = 'Compare per-process PSS/USS of inference workers with and without preloaded models'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Pool processes to fork'
+        )
+        parser.add_argument(
+            '--count', type=int, default=32,
+            help='Comments each process analyzes before it is measured'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ANALYSIS_BATCH_SIZE,
+            help='Micro-batch size'
+        )
+        parser.add_argument(
+            '--pid', type=int, default=None,
+            help="Measure the running Celery worker with this main process ID instead"
+        )
+
+    def handle(self, *args, **options):
+        if process_memory() is None:
+            raise CommandError('Memory can only be measured on Linux (/proc/<pid>/smaps_rollup)')
+        if options['pid'] is not None:
+            self._report_worker(options['pid'])
+            return
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+
+        models = settings.ANALYSIS_WARMUP_MODELS or ['sentiment', 'zero_shot']
+        if any(registry.is_loaded(name) for name in models):
+            raise CommandError('Models are already loaded in this process; run in a fresh process')
+
+        repeats = options['count'] // len(SAMPLE_COMMENTS) + 1
+        texts = (SAMPLE_COMMENTS * repeats)[:options['count']]
+        self.stdout.write(
+            f"Measuring {options['processes']} processes with models {', '.join(models)}"
+        )
+
+        # Fork, as Celery's prefork pool does. Per-process loading goes
+        # first, while this process has not loaded the models yet
+        context = multiprocessing.get_context('fork')
+        separate = self._run(context, models, texts, options)
+        self._print('Each process loads its models', separate)
+
+        if not preload_models(models):
+            raise CommandError('The configured inference backend cannot be preloaded')
+        preloaded = self._run(context, models, texts, options)
+        self._print('Models preloaded in the parent', preloaded)
+
+        before = sum(memory['pss'] for memory in separate.values())
+        after = sum(memory['pss'] for memory in preloaded.values())
+        # The parent's copy is part of the preloaded pool's footprint
+        after += process_memory()['pss']
+        self.stdout.write(self.style.SUCCESS(
+            f"Pool PSS {before / MB:.0f} MB -> {after / MB:.0f} MB including the parent "
+            f"({(before - after) / MB:.0f} MB saved)"
+        ))
+
+    def _run(self, context, models, texts, options):
+        """Fork the pool, wait until every process is ready and measure it."""
+        processes = options['processes']
+        threads = threads_per_process(processes, settings.INFERENCE_THREADS)
+        ready = context.Barrier(processes + 1)
+        release = context.Event()
+        errors = context.Queue()
+        workers = [
+            context.Process(
+                target=_worker,
+                args=(index, threads, models, texts, options['batch_size'], ready, release, errors)
+            )
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            ready.wait(timeout=1800)
+            return {worker.pid: process_memory(worker.pid) for worker in workers}
+        except threading.BrokenBarrierError as e:
+            # A process failed while loading or analyzing; it reports why
+            try:
+                _, e = errors.get(timeout=10)
+            except queue.Empty:
+                pass
+            raise CommandError(f"Worker process failed: {e!r}")
+        finally:
+            release.set()
+            for worker in workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+
+    def _report_worker(self, pid):
+        """Measure a running worker's main process and its pool processes."""
+        parent = process_memory(pid)
+        if parent is None:
+            raise CommandError(f"Cannot read the memory of process {pid}")
+        children = {child: process_memory(child) for child in child_pids(pid)}
+        children = {child: memory for child, memory in children.items() if memory}
+        if not children:
+            raise CommandError(f"Process {pid} has no pool processes")
+        self._print(f"Worker {pid}", {pid: parent, **children})
+        total = parent['pss'] + sum(memory['pss'] for memory in children.values())
+        self.stdout.write(f"Total PSS {total / MB:.0f} MB")
+
+    def _print(self, title, measurements):
+        """Print the memory of each process and the pool's totals."""
+        self.stdout.write(f"\n{title}")
+        self.stdout.write(f"{'pid':>8} {'rss MB':>8} {'pss MB':>8} {'uss MB':>8} {'shared MB':>10}")
+        for pid, memory in measurements.items():
+            self.stdout.write(
+                f"{pid:>8} {memory['rss'] / MB:>8.0f} {memory['pss'] / MB:>8.0f} "
+                f"{memory['uss'] / MB:>8.0f} {memory['shared'] / MB:>10.0f}"
+            )
+        self.stdout.write(
+            f"{'total':>8} {sum(m['rss'] for m in measurements.values()) / MB:>8.0f} "
+            f"{sum(m['pss'] for m in measurements.values()) / MB:>8.0f} "
+            f"{sum(m['uss'] for m in measurements.values()) / MB:>8.0f}"
+        )
@@ -0,0 +1,47 @@
+"""
+Management command rebuilding the materialized analytics rollups.
+"""
+from django.core.management.base import BaseCommand
+
+from analysis.rollups import rebuild_video_rollups
+from comments.models import Video
+
+
+class Command(BaseCommand):
+    """
+    Recompute the daily rollups behind the analytics endpoints from stored
+    analysis results. Rollups are rebuilt automatically when a video's
+    analysis run finishes; run this after deploying, or after editing stored
+    analyses by hand.
+
+    Usage:
+        python manage.py rebuild_rollups
+        python manage.py rebuild_rollups --video 12 --video 13
+        python manage.py rebuild_rollups --user 3
+    """
+    help = 'Rebuild the daily analytics rollups from stored comment analyses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--video', type=int, action='append', default=[],
+            help='Only rebuild this Video ID (repeatable)'
+        )
+        parser.add_argument(
+            '--user', type=int, default=None,
+            help='Only rebuild the videos of this user ID'
+        )
+
+    def handle(self, *args, **options):
+        videos = Video.objects.filter(analysis__isnull=False).order_by('id')
+        if options['video']:
+            videos = videos.filter(id__in=options['video'])
+        if options['user'] is not None:
+            videos = videos.filter(user_id=options['user'])
+
+        total_videos = total_rows = 0
+        for video in videos.iterator():
+            total_rows += rebuild_video_rollups(video)
+            total_videos += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {total_rows} rollups for {total_videos} videos"
+        ))
@@ -0,0 +1,37 @@
+"""
+Models for materialized analytics over stored analysis results.
+"""
+from django.db import models
+from django.contrib.auth.models import User
+from comments.models import Video
+
+
+class DailyRollup(models.Model):
+    """
+    Analysis results of one video's comments published on one day.
+
+    Rebuilt from stored CommentAnalysis rows by ``analysis.rollups`` when an
+    analysis run finishes, so channel-level analytics read a few rows per
+    video and day instead of every comment.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    total_comments = models.IntegerField(default=0)
+    positive_comments = models.IntegerField(default=0)
+    negative_comments = models.IntegerField(default=0)
+    neutral_comments = models.IntegerField(default=0)
+    topic_counts = models.JSONField(default=dict)  # Every topic assigned that day
+    keyword_counts = models.JSONField(default=dict)  # The day's most common keywords
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'day'], name='rollup_video_day_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day'], name='rollup_user_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"Rollup for video {self.video_id} on {self.day}"
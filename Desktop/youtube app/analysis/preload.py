@@ -0,0 +1,128 @@
+"""
+Loading models once in the Celery parent process, shared by its children.
+
+Each prefork pool process normally loads its own copy of the models at
+startup (``warm_up_models``), so a pool of N processes holds N copies of
+BART-MNLI and DistilBERT. With ANALYSIS_PRELOAD_MODELS the worker's parent
+process loads them before it forks the pool instead. The children inherit
+the weights as copy-on-write pages: inference only reads them, so the
+pages stay shared, and the registry in each child finds the models already
+loaded. Replacement children (``--max-tasks-per-child``) inherit them too.
+
+Two things would otherwise dirty the shared pages or break the children:
+
+- The cyclic garbage collector writes to the header of every object it
+  visits. The objects built while loading are moved to the permanent
+  generation with ``gc.freeze()`` so collections in the children skip them.
+- Native thread pools do not survive a fork. The parent loads with a
+  single thread and never runs inference, so no pool threads exist when it
+  forks; each child then sizes its own (see ``analysis.threads``).
+
+The ONNX backend is not preloaded: ONNX Runtime starts its thread pools
+when a session is created. Use the ``measure_worker_memory`` command to
+compare the memory of a pool with and without preloading.
+"""
+import gc
+import logging
+import os
+
+from .registry import inference_backend, registry
+from .threads import configure_threads
+
+logger = logging.getLogger(__name__)
+
+# Backends whose models can be loaded before forking
+PRELOAD_BACKENDS = ('pytorch', 'quantized')
+
+
+def preload_models(names):
+    """
+    Load models in this process so that processes forked from it share them.
+
+    Call in the parent process before the pool forks, and do not run
+    inference in it afterwards.
+
+    Args:
+        names (list): Model names to load
+
+    Returns:
+        list: Names of the models loaded; empty if the backend cannot be
+            preloaded
+    """
+    backend = inference_backend()
+    if backend not in PRELOAD_BACKENDS:
+        logger.warning(
+            "Not preloading models: the %s backend cannot be shared across forks", backend
+        )
+        return []
+
+    # No thread pool threads in the parent, so none are lost in the fork
+    configure_threads(1)
+    registry.warm_up(names)
+
+    # Keep the collector in the children away from the models' objects
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "Preloaded models %s in process %s (%d objects frozen)",
+        ', '.join(names), os.getpid(), gc.get_freeze_count(),
+    )
+    return list(names)
+
+
+def process_memory(pid='self'):
+    """
+    Return the memory of a process as counted by the kernel (Linux only).
+
+    RSS counts every page the process maps, so shared pages are counted
+    once per process. PSS splits each shared page between the processes
+    sharing it, so the PSS of a pool adds up to its real footprint. USS is
+    the memory only this process uses, which would be freed if it exited.
+
+    Args:
+        pid: Process ID, or 'self'
+
+    Returns:
+        dict: 'rss', 'pss', 'uss' and 'shared' in bytes, or None if
+            /proc/<pid>/smaps_rollup cannot be read
+    """
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                name, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    fields[name] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+    }
+
+
+def child_pids(pid):
+    """
+    Return the IDs of the direct children of a process (Linux only).
+
+    Args:
+        pid (int): Parent process ID, e.g. of a Celery worker's main process
+
+    Returns:
+        list: Child process IDs, sorted
+    """
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name may contain spaces; fields resume after ')'
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
@@ -0,0 +1,275 @@
+"""
+Process-wide registry of lazily loaded NLP models.
+
+Pipelines are built the first time they are requested rather than at import
+time, so processes that never run inference (the Django web tier, Celery
+beat, management commands) never pay for loading them. Each process holds at
+most one copy of each model per inference backend.
+
+The backend is chosen with the ANALYSIS_INFERENCE_BACKEND setting:
+
+- ``pytorch``: the fp32 PyTorch models (the reference)
+- ``quantized``: the same models with Linear layers dynamically quantized
+  to int8, for faster CPU inference
+- ``onnx``: models exported to ONNX and run by ONNX Runtime through
+  ``optimum`` (an optional dependency)
+"""
+import logging
+import os
+import resource
+import threading
+import time
+
+from .conf import setting
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('pytorch', 'quantized', 'onnx')
+DEFAULT_BACKEND = 'pytorch'
+
+# Transformer pipelines used by the analysis package
+MODEL_SPECS = {
+    'sentiment': {
+        'task': 'sentiment-analysis',
+        'model': 'distilbert-base-uncased-finetuned-sst-2-english',
+        'kwargs': {'return_all_scores': True},
+    },
+    'zero_shot': {
+        'task': 'zero-shot-classification',
+        'model': 'facebook/bart-large-mnli',
+        'kwargs': {},
+    },
+    # Sentence encoder for the embedding topic engine (analysis.embedding_topics)
+    'embedding': {
+        'task': 'feature-extraction',
+        'model': 'sentence-transformers/all-MiniLM-L6-v2',
+        'kwargs': {},
+        'onnx_class': 'ORTModelForFeatureExtraction',
+    },
+}
+
+
+def inference_backend():
+    """
+    Return the configured inference backend.
+
+    Raises:
+        ValueError: If ANALYSIS_INFERENCE_BACKEND names an unknown backend
+    """
+    backend = setting('ANALYSIS_INFERENCE_BACKEND', DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend '{backend}'; expected one of {', '.join(BACKENDS)}"
+        )
+    return backend
+
+
+def model_tag(name):
+    """
+    Identify the model and backend behind ``name``, e.g. for cache keys.
+
+    Backends may disagree on borderline inputs, so results computed by one
+    must not be served for another.
+
+    Args:
+        name (str): Key in ``MODEL_SPECS``
+
+    Returns:
+        str: Model name and backend
+    """
+    return f"{MODEL_SPECS[name]['model']}@{inference_backend()}"
+
+
+def _build_pytorch(spec):
+    from transformers import pipeline
+
+    return pipeline(spec['task'], model=spec['model'], **spec['kwargs'])
+
+
+def _build_quantized(spec):
+    import torch
+
+    model = _build_pytorch(spec)
+    # int8 weights with activations quantized on the fly; Linear layers hold
+    # nearly all of the compute in these transformer models
+    model.model = torch.quantization.quantize_dynamic(
+        model.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return model
+
+
+def _build_onnx(spec):
+    try:
+        import optimum.onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "The onnx inference backend needs optimum: "
+            "pip install 'optimum[onnxruntime]'"
+        ) from e
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = getattr(
+        optimum.onnxruntime, spec.get('onnx_class', 'ORTModelForSequenceClassification')
+    )
+
+    # Export once and reuse the exported graph in later processes
+    export_dir = setting('ANALYSIS_ONNX_DIR', '')
+    path = os.path.join(export_dir, spec['model'].replace('/', '--')) if export_dir else ''
+    if path and os.path.isdir(path):
+        model = model_class.from_pretrained(path)
+        tokenizer = AutoTokenizer.from_pretrained(path)
+    else:
+        model = model_class.from_pretrained(spec['model'], export=True)
+        tokenizer = AutoTokenizer.from_pretrained(spec['model'])
+        if path:
+            model.save_pretrained(path)
+            tokenizer.save_pretrained(path)
+
+    return pipeline(spec['task'], model=model, tokenizer=tokenizer, **spec['kwargs'])
+
+
+# Pipeline builders per inference backend
+_BUILDERS = {
+    'pytorch': _build_pytorch,
+    'quantized': _build_quantized,
+    'onnx': _build_onnx,
+}
+
+
+def _resident_bytes():
+    """
+    Return the current resident set size of this process in bytes.
+
+    Reads /proc on Linux and falls back to the peak RSS reported by
+    getrusage elsewhere.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """
+    Loads pipelines on first use and keeps one instance per process and
+    inference backend.
+
+    Load time and the change in resident memory caused by each load are
+    recorded and available through ``stats()``.
+    """
+
+    def __init__(self, specs):
+        self.specs = specs
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, backend=None):
+        """
+        Return the pipeline registered under ``name``, loading it if needed.
+
+        Args:
+            name (str): Key in ``MODEL_SPECS``
+            backend (str): Inference backend; defaults to the configured one
+
+        Returns:
+            The loaded pipeline object
+        """
+        backend = backend or inference_backend()
+        key = self._key(name, backend)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if key not in self._models:
+                self._models[key] = self._load(name, backend)
+            return self._models[key]
+
+    @staticmethod
+    def _key(name, backend):
+        """Registry key of a model; the reference backend keeps the plain name."""
+        return name if backend == DEFAULT_BACKEND else f"{name}:{backend}"
+
+    def _load(self, name, backend):
+        """Build the pipeline for ``name`` and record its load statistics."""
+        if name not in self.specs:
+            raise KeyError(f"Unknown model '{name}'")
+
+        spec = self.specs[name]
+        key = self._key(name, backend)
+        rss_before = _resident_bytes()
+        start = time.perf_counter()
+
+        # Builders import transformers lazily so importing this module stays cheap
+        model = _BUILDERS[backend](spec)
+
+        self._stats[key] = {
+            'model': spec['model'],
+            'backend': backend,
+            'load_seconds': round(time.perf_counter() - start, 3),
+            'rss_delta_mb': round((_resident_bytes() - rss_before) / 2 ** 20, 1),
+            'pid': os.getpid(),
+        }
+        logger.info(
+            "Loaded model %s (%s, %s) in %.1fs, +%.0f MB resident",
+            name, spec['model'], backend,
+            self._stats[key]['load_seconds'],
+            self._stats[key]['rss_delta_mb'],
+        )
+        return model
+
+    def warm_up(self, names=None):
+        """
+        Load the given models (or every registered model) ahead of first use.
+
+        Args:
+            names (list): Model names to load; defaults to all specs
+        """
+        for name in names or self.specs:
+            self.get(name)
+
+    def is_loaded(self, name, backend=None):
+        """Return True if ``name`` has already been loaded in this process."""
+        return self._key(name, backend or inference_backend()) in self._models
+
+    def stats(self):
+        """
+        Return load statistics for every model loaded in this process.
+
+        Returns:
+            dict: Model name (suffixed ':<backend>' unless it is the
+                reference backend) mapped to load time, RSS delta and pid
+        """
+        return {
+            'pid': os.getpid(),
+            'rss_mb': round(_resident_bytes() / 2 ** 20, 1),
+            'models': dict(self._stats),
+        }
+
+    def _reset_lock(self):
+        """Give a forked child a fresh lock in case the parent held it."""
+        self._lock = threading.Lock()
+
+
+# Shared registry for the current process
+registry = ModelRegistry(MODEL_SPECS)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry._reset_lock)
+
+
+def get_pipeline(name):
+    """
+    Return the process-wide pipeline registered under ``name``.
+
+    Args:
+        name (str): 'sentiment', 'zero_shot' or 'embedding'
+
+    Returns:
+        The loaded pipeline object
+    """
+    return registry.get(name)
@@ -0,0 +1,103 @@
+"""
+Materialized daily rollups of stored analysis results.
+
+Rollups are computed from what is already in the database, never by running
+the models again. Sentiment is counted by the database from the
+denormalized ``Comment.sentiment`` column. Topics and keywords live in JSON
+lists, so they are streamed in chunks with ``values_list().iterator()`` and
+counted in Python.
+
+Rollups are updated once per analysis run, when it finishes, not every time
+a partial VideoAnalysis is saved. Incremental runs only recompute the days
+their new comments fall on.
+"""
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from comments.models import SENTIMENT_CHOICES, Comment, CommentAnalysis
+from .conf import setting
+from .models import DailyRollup
+
+# Keywords kept per video and day; totals over longer periods are lower bounds
+ROLLUP_KEYWORDS = 50
+
+
+def rebuild_video_rollups(video, since=None):
+    """
+    Recompute the daily rollups of a video from its stored analyses.
+
+    Args:
+        video (Video): Video to roll up
+        since (date): Only recompute this day and later ones, e.g. the day
+            of the oldest comment an incremental run added; all days if None
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    chunk_size = setting('ANALYTICS_ROLLUP_CHUNK_SIZE', 2000)
+    sentiments = [value for value, _ in SENTIMENT_CHOICES]
+
+    comments = Comment.objects.filter(video=video)
+    analyses = CommentAnalysis.objects.filter(comment__video=video)
+    stale = DailyRollup.objects.filter(video=video)
+    if since is not None:
+        # Days are truncated in the current time zone, like TruncDate does
+        start = datetime.datetime.combine(
+            since, datetime.time.min, tzinfo=timezone.get_current_timezone()
+        )
+        comments = comments.filter(published_at__gte=start)
+        analyses = analyses.filter(comment__published_at__gte=start)
+        stale = stale.filter(day__gte=since)
+
+    # One grouped query for the per-day sentiment counts
+    daily = (
+        comments
+        .exclude(sentiment='')
+        .annotate(day=TruncDate('published_at'))
+        .values('day')
+        .annotate(
+            total=Count('id'),
+            **{
+                sentiment: Count('id', filter=Q(sentiment=sentiment))
+                for sentiment in sentiments
+            }
+        )
+    )
+    rows = {
+        row['day']: DailyRollup(
+            user_id=video.user_id,
+            video=video,
+            day=row['day'],
+            total_comments=row['total'],
+            positive_comments=row['positive'],
+            negative_comments=row['negative'],
+            neutral_comments=row['neutral'],
+        )
+        for row in daily
+    }
+
+    topics = defaultdict(Counter)
+    keywords = defaultdict(Counter)
+    analyses = (
+        analyses
+        .annotate(day=TruncDate('comment__published_at'))
+        .values_list('day', 'topics', 'keywords')
+        .iterator(chunk_size=chunk_size)
+    )
+    for day, comment_topics, comment_keywords in analyses:
+        topics[day].update(comment_topics or [])
+        keywords[day].update(comment_keywords or [])
+
+    for day, rollup in rows.items():
+        rollup.topic_counts = dict(topics[day])
+        rollup.keyword_counts = dict(keywords[day].most_common(ROLLUP_KEYWORDS))
+
+    with transaction.atomic():
+        stale.delete()
+        DailyRollup.objects.bulk_create(rows.values(), batch_size=chunk_size)
+    return len(rows)
@@ -1,15 +1,260 @@
 """
 Sentiment analysis module using Hugging Face Transformers.
+
+Labels come from a decision cascade over two signals, TextBlob polarity and
+DistilBERT scores. Stages run in the order given by
+ANALYSIS_SENTIMENT_CASCADE, and a comment leaves the cascade at the first
+stage whose confidence rule resolves it, so later (costlier) signals are
+only computed for comments that need them. The default order, TextBlob
+first, gives exactly the labels of computing both signals and combining
+them with ``_resolve_sentiment``.
 """
-from transformers import pipeline
+import logging
+import threading
+import time
+from collections import Counter
+
 from textblob import TextBlob
+from .batching import DEFAULT_BATCH_SIZE, iter_length_sorted_batches
+from .cache import get_cache
+from .conf import setting
+from .registry import get_pipeline, model_tag
+
+logger = logging.getLogger(__name__)
+
+# Bump when the labelling rules change so cached results are not reused
+SENTIMENT_VERSION = 1
+
+CASCADE_STAGES = ('textblob', 'transformer')
+DEFAULT_CASCADE = ('textblob', 'transformer')
+DEFAULT_THRESHOLDS = {
+    # |polarity| above which TextBlob alone decides
+    'textblob_polarity': 0.1,
+    # Top score above which the transformer alone decides
+    'transformer_confidence': 0.7,
+}
+
+_stats_lock = threading.Lock()
+_path_counts = Counter()
+_stage_seconds = Counter()
+
+
+def cascade_config():
+    """
+    Return the configured cascade order and thresholds.
+
+    Returns:
+        tuple: (tuple of stage names, dict of thresholds)
+
+    Raises:
+        ValueError: If the order names an unknown stage
+    """
+    order = tuple(setting('ANALYSIS_SENTIMENT_CASCADE', DEFAULT_CASCADE))
+    unknown = set(order) - set(CASCADE_STAGES)
+    if unknown or not order:
+        raise ValueError(
+            f"Invalid sentiment cascade {order}; stages are {', '.join(CASCADE_STAGES)}"
+        )
+    thresholds = dict(DEFAULT_THRESHOLDS, **setting('ANALYSIS_SENTIMENT_THRESHOLDS', {}))
+    return order, thresholds
+
+
+def _sentiment_cache():
+    """Return the result cache for the current sentiment model, backend and rules."""
+    order, thresholds = cascade_config()
+    # Different cascades can label the same text differently
+    rules = '-'.join(order) + ':' + ','.join(
+        f"{name}={value}" for name, value in sorted(thresholds.items())
+    )
+    return get_cache(f"sentiment:v{SENTIMENT_VERSION}:{model_tag('sentiment')}:{rules}")
+
+
+def _resolve_sentiment(transformer_result, textblob_polarity, thresholds=None):
+    """
+    Combine transformer scores and TextBlob polarity into a single label.
+
+    The reference the default cascade must match; used by the
+    ``evaluate_sentiment`` command, which computes both signals up front.
+
+    Args:
+        transformer_result (list): Label/score dicts from the transformer
+        textblob_polarity (float): TextBlob polarity in [-1, 1]
+        thresholds (dict): Overrides for ``DEFAULT_THRESHOLDS``
+
+    Returns:
+        str: Sentiment label ('positive', 'negative', or 'neutral')
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    if textblob_polarity > thresholds['textblob_polarity']:
+        # Clearly positive
+        return 'positive'
+    elif textblob_polarity < -thresholds['textblob_polarity']:
+        # Clearly negative
+        return 'negative'
+    else:
+        # Use transformer result for borderline cases
+        return _transformer_label(transformer_result, thresholds) or 'neutral'
+
+
+def _textblob_stage(texts, thresholds, batch_size):
+    """
+    Resolve texts whose TextBlob polarity is clearly positive or negative.
+
+    Returns:
+        list: Label, None if unresolved, or an Exception if the text failed
+    """
+    labels = []
+    for text in texts:
+        try:
+            polarity = TextBlob(text).sentiment.polarity
+        except Exception as e:
+            print(f"Error in sentiment analysis: {str(e)}")
+            labels.append(e)
+            continue
+        if polarity > thresholds['textblob_polarity']:
+            labels.append('positive')
+        elif polarity < -thresholds['textblob_polarity']:
+            labels.append('negative')
+        else:
+            labels.append(None)
+    return labels
+
+
+def _transformer_label(transformer_result, thresholds):
+    """Return the transformer's label if it is confident enough, else None."""
+    max_score = max(transformer_result, key=lambda x: x['score'])
+    if max_score['score'] > thresholds['transformer_confidence']:
+        return max_score['label'].lower()
+    return None
+
+
+def _transformer_stage(texts, thresholds, batch_size):
+    """
+    Resolve texts the transformer classifies with high confidence.
+
+    Returns:
+        list: Label, None if unresolved, or an Exception if the text failed
+    """
+    labels = [None] * len(texts)
+
+    for indices, batch in iter_length_sorted_batches(texts, batch_size):
+        try:
+            transformer_results = get_pipeline('sentiment')(
+                batch,
+                batch_size=len(batch),
+                truncation=True
+            )
+        except Exception as e:
+            print(f"Error in batched sentiment analysis: {str(e)}")
+            # Fall back to one text at a time so one bad input
+            # does not cost the whole batch
+            transformer_results = []
+            for text in batch:
+                try:
+                    transformer_results.append(
+                        get_pipeline('sentiment')(text, truncation=True)[0]
+                    )
+                except Exception as e:
+                    print(f"Error in sentiment analysis: {str(e)}")
+                    transformer_results.append(e)
+
+        for index, transformer_result in zip(indices, transformer_results):
+            if isinstance(transformer_result, Exception):
+                labels[index] = transformer_result
+            else:
+                labels[index] = _transformer_label(transformer_result, thresholds)
+
+    return labels
+
+
+_STAGES = {
+    'textblob': _textblob_stage,
+    'transformer': _transformer_stage,
+}
+
+
+def run_cascade(texts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Label texts with the configured cascade, bypassing the result cache.
+
+    Each stage only sees the texts no earlier stage resolved. Texts no
+    stage resolves are neutral.
+
+    Args:
+        texts (list): Texts to analyze
+        batch_size (int): Number of texts per transformer forward pass
+
+    Returns:
+        tuple: (labels, paths), where a label is None for failed texts and
+            a path names the stage that decided, 'fallback' or 'error'
+    """
+    order, thresholds = cascade_config()
+    labels = [None] * len(texts)
+    paths = ['fallback'] * len(texts)
+    pending = list(range(len(texts)))
+    seconds = Counter()
+
+    for stage in order:
+        if not pending:
+            break
+        start = time.perf_counter()
+        stage_labels = _STAGES[stage]([texts[i] for i in pending], thresholds, batch_size)
+        seconds[stage] += time.perf_counter() - start
+
+        unresolved = []
+        for index, label in zip(pending, stage_labels):
+            if isinstance(label, Exception):
+                paths[index] = 'error'
+            elif label is None:
+                unresolved.append(index)
+            else:
+                labels[index] = label
+                paths[index] = stage
+        pending = unresolved
+
+    for index in pending:
+        labels[index] = 'neutral'
+
+    with _stats_lock:
+        _path_counts.update(paths)
+        _stage_seconds.update(seconds)
+    if logger.isEnabledFor(logging.DEBUG):
+        for text, path in zip(texts, paths):
+            logger.debug("Sentiment path %s: %.60r", path, text)
+    return labels, paths
+
+
+def cascade_stats():
+    """
+    Return how comments left the cascade, and time spent per stage.
+
+    Returns:
+        dict: 'paths' (stage, 'fallback' or 'error' mapped to comment count)
+            and 'stage_seconds'
+    """
+    with _stats_lock:
+        return {
+            'paths': dict(_path_counts),
+            'stage_seconds': {stage: round(s, 4) for stage, s in _stage_seconds.items()},
+        }
+
+
+def reset_cascade_stats():
+    """Zero the cascade counters."""
+    with _stats_lock:
+        _path_counts.clear()
+        _stage_seconds.clear()
+
+
+def _analyze_sentiment_uncached(text):
+    """Run the cascade on one text; returns None if analysis fails."""
+    return run_cascade([text], batch_size=1)[0][0]
+
+
+def _analyze_sentiment_batch_uncached(texts, batch_size):
+    """Run the cascade on many texts in micro-batches; None marks failures."""
+    return run_cascade(texts, batch_size)[0]
 
-# Initialize sentiment analysis pipeline
-sentiment_analyzer = pipeline(
-    "sentiment-analysis",
-    model="distilbert-base-uncased-finetuned-sst-2-english",
-    return_all_scores=True
-)
 
 def analyze_sentiment(text):
     """
@@ -18,6 +263,12 @@ def analyze_sentiment(text):
     This function uses a hybrid approach:
     1. Transformers for deep learning-based sentiment analysis
     2. TextBlob as a backup and validation
+
+    The two are combined as a cascade (see ``cascade_config``), so only the
+    signals needed to reach a confident label are computed.
+
+    Results are cached by normalized text, so repeated comments skip
+    inference.
     
     Args:
         text (str): The text to analyze
@@ -25,29 +276,33 @@ def analyze_sentiment(text):
     Returns:
         str: Sentiment label ('positive', 'negative', or 'neutral')
     """
-    try:
-        # Get sentiment scores from transformer model
-        transformer_result = sentiment_analyzer(text)[0]
-        
-        # Get TextBlob polarity as a backup/validation
-        blob = TextBlob(text)
-        textblob_polarity = blob.sentiment.polarity
-        
-        # Combine both signals for more robust analysis
-        if textblob_polarity > 0.1:
-            # Clearly positive
-            return 'positive'
-        elif textblob_polarity < -0.1:
-            # Clearly negative
-            return 'negative'
-        else:
-            # Use transformer result for borderline cases
-            max_score = max(transformer_result, key=lambda x: x['score'])
-            if max_score['score'] > 0.7:  # High confidence threshold
-                return max_score['label'].lower()
-            return 'neutral'
-            
-    except Exception as e:
-        print(f"Error in sentiment analysis: {str(e)}")
-        # Default to neutral if there's an error
-        return 'neutral'
+    label = _sentiment_cache().map(
+        [text],
+        lambda texts: [_analyze_sentiment_uncached(texts[0])]
+    )[0]
+    # Default to neutral if there's an error
+    return label or 'neutral'
+
+
+def analyze_sentiment_batch(texts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Analyze the sentiment of many texts with batched transformer inference.
+
+    Cached texts are answered from the result cache. The rest go through
+    the cascade; texts reaching the transformer stage are sorted by length
+    and run in micro-batches of ``batch_size``, so each forward pass pads
+    only to the longest text in its batch. Labels are identical to calling
+    ``analyze_sentiment`` on each text in turn.
+
+    Args:
+        texts (list): Texts to analyze
+        batch_size (int): Number of texts per forward pass
+
+    Returns:
+        list: Sentiment labels in the same order as ``texts``
+    """
+    labels = _sentiment_cache().map(
+        texts,
+        lambda misses: _analyze_sentiment_batch_uncached(misses, batch_size)
+    )
+    return [label or 'neutral' for label in labels]
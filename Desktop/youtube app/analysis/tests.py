@@ -0,0 +1,258 @@
+"""
+Tests for the analysis app.
+"""
+from collections import Counter, defaultdict
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import find_commands, load_command_class
+from django.test import SimpleTestCase, TestCase, override_settings
+from textblob import TextBlob
+
+from comments.models import CommentAnalysis, Video
+from comments.tasks import fetch_video_comments
+from youtube_analyzer.celery import app as celery_app
+from .corpus import LABELLED_COMMENTS, SAMPLE_COMMENTS
+from .models import DailyRollup
+from .rollups import rebuild_video_rollups
+from .sentiment import _resolve_sentiment, cascade_config, run_cascade
+from .triage import text_fingerprint, triage, triage_batch
+
+
+def fake_sentiment(texts, batch_size=None):
+    """Deterministic stand-in for the sentiment models."""
+    return [('positive', 'negative', 'neutral')[len(text) % 3] for text in texts]
+
+
+def fake_topics(texts, batch_size=None):
+    """Deterministic stand-in for topic and keyword extraction."""
+    return [
+        (text.lower().split()[:1], text.lower().split()[:2])
+        for text in texts
+    ]
+
+
+def fake_models():
+    """Patch the models used by the analysis tasks with the stand-ins."""
+    patches = [
+        mock.patch('comments.tasks.analyze_sentiment_batch', fake_sentiment),
+        mock.patch('comments.tasks.extract_topics_batch', fake_topics),
+    ]
+    for patch in patches:
+        patch.start()
+    return patches
+
+
+def eager_celery(test):
+    """Run tasks and chords in-process instead of through the broker during ``test``."""
+    names = ('task_always_eager', 'task_eager_propagates')
+    saved = {name: celery_app.conf[name] for name in names}
+    celery_app.conf.update(dict.fromkeys(names, True))
+    test.addCleanup(celery_app.conf.update, saved)
+
+
+def fake_sentiment_pipeline(inputs, **kwargs):
+    """Deterministic stand-in for the DistilBERT pipeline, with all scores."""
+    def scores(text):
+        positive = (len(text) * 37 % 100) / 100
+        return [
+            {'label': 'POSITIVE', 'score': positive},
+            {'label': 'NEGATIVE', 'score': 1 - positive},
+        ]
+    if isinstance(inputs, str):
+        return [scores(inputs)]
+    return [scores(text) for text in inputs]
+
+
+def rollup_rows(video):
+    """Return a video's rollups as comparable dicts, by day."""
+    return {
+        row['day']: row
+        for row in DailyRollup.objects.filter(video=video).values(
+            'day', 'total_comments', 'positive_comments', 'negative_comments',
+            'neutral_comments', 'topic_counts', 'keyword_counts'
+        )
+    }
+
+
+class ManagementCommandTests(SimpleTestCase):
+    """Every management command of the project's apps loads."""
+
+    def test_commands_import_and_build_their_parsers(self):
+        for app in ('analysis', 'comments'):
+            path = apps.get_app_config(app).path
+            names = find_commands(f"{path}/management")
+            self.assertTrue(names, app)
+            for name in names:
+                with self.subTest(command=name):
+                    command = load_command_class(app, name)
+                    command.create_parser('manage.py', name)
+
+
+@override_settings(ANALYSIS_TRIAGE_ENABLED=True)
+class TriageTests(TestCase):
+    """Rule-based labelling ahead of the models."""
+
+    def _analyze(self, texts):
+        self.analyzed.extend(texts)
+        return [('positive', (['model'], ['model'])) for _ in texts]
+
+    def setUp(self):
+        self.analyzed = []
+
+    def test_obvious_comments_skip_the_models(self):
+        texts = [
+            'Subscribe to my channel for free giftcards http://spam.example.com',
+            'https://example.com/watch',
+            '🔥🔥🔥',
+            'lol',
+            'Could you make a follow-up video about deploying this to production?',
+        ]
+        results = triage_batch(texts, self._analyze)
+        self.assertEqual(self.analyzed, texts[-1:])
+        self.assertEqual(results[0], ('neutral', (['spam'], [])))
+        self.assertEqual(results[1], ('neutral', (['spam'], [])))
+        self.assertEqual(results[2], ('positive', ([], [])))
+        self.assertEqual(results[3][1], ([], []))
+        self.assertEqual(results[4], ('positive', (['model'], ['model'])))
+
+    def test_duplicates_are_analyzed_once_and_share_the_result(self):
+        text = 'The audio is really bad in the second half, I could barely hear anything.'
+        results = triage_batch([text, text.upper() + '  ', text], self._analyze)
+        self.assertEqual(self.analyzed, [text])
+        self.assertEqual(results, [results[0]] * 3)
+
+    def test_known_duplicates_reuse_the_stored_result(self):
+        text = 'The audio is really bad in the second half, I could barely hear anything.'
+        stored = ('negative', (['technical issues'], ['audio']))
+        results = triage_batch(
+            ['  ' + text.upper(), text], self._analyze, known={text_fingerprint(text): stored}
+        )
+        self.assertEqual(self.analyzed, [])
+        self.assertEqual(results, [stored, stored])
+
+    def test_disabled_triage_sends_every_unique_text_to_the_models(self):
+        texts = ['lol', '🔥🔥🔥', 'lol']
+        with override_settings(ANALYSIS_TRIAGE_ENABLED=False):
+            triage_batch(texts, self._analyze)
+        self.assertEqual(self.analyzed, ['lol', '🔥🔥🔥'])
+
+    def test_short_comments_agree_with_the_cascade_when_textblob_decides(self):
+        with mock.patch('analysis.sentiment.get_pipeline', return_value=fake_sentiment_pipeline):
+            for text in ['great video', 'awful', 'so bad', 'love it']:
+                rule, (label, _) = triage(text)
+                self.assertEqual(rule, 'short')
+                labels, paths = run_cascade([text])
+                self.assertEqual(paths, ['textblob'], text)
+                self.assertEqual(label, labels[0], text)
+
+
+class SentimentCascadeTests(TestCase):
+    """The sentiment cascade against the full hybrid reference."""
+
+    def setUp(self):
+        patch = mock.patch('analysis.sentiment.get_pipeline', return_value=self._pipeline)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.transformer_inputs = []
+        self.texts = SAMPLE_COMMENTS + [text for text, _ in LABELLED_COMMENTS]
+
+    def _pipeline(self, inputs, **kwargs):
+        self.transformer_inputs.extend([inputs] if isinstance(inputs, str) else inputs)
+        return fake_sentiment_pipeline(inputs, **kwargs)
+
+    def _reference(self, thresholds):
+        return [
+            _resolve_sentiment(
+                fake_sentiment_pipeline(text)[0], TextBlob(text).sentiment.polarity, thresholds
+            )
+            for text in self.texts
+        ]
+
+    def test_default_cascade_matches_the_hybrid_reference(self):
+        labels, paths = run_cascade(self.texts, batch_size=4)
+        self.assertEqual(labels, self._reference(cascade_config()[1]))
+        # The transformer only saw what TextBlob could not decide
+        undecided = [text for text, path in zip(self.texts, paths) if path != 'textblob']
+        self.assertEqual(sorted(self.transformer_inputs), sorted(undecided))
+        self.assertLess(len(self.transformer_inputs), len(self.texts))
+
+    def test_thresholds_are_configurable(self):
+        thresholds = {'textblob_polarity': 0.4, 'transformer_confidence': 0.9}
+        with override_settings(ANALYSIS_SENTIMENT_THRESHOLDS=thresholds):
+            labels, _ = run_cascade(self.texts)
+        self.assertEqual(labels, self._reference(thresholds))
+
+    def test_unknown_stage_is_rejected(self):
+        with override_settings(ANALYSIS_SENTIMENT_CASCADE=['textblob', 'vader']):
+            with self.assertRaises(ValueError):
+                cascade_config()
+
+
+@override_settings(
+    YOUTUBE_FAKE_API=True,
+    YOUTUBE_FAKE_LATENCY=0.0,
+    ANALYSIS_CACHE_ENABLED=False,
+    ANALYSIS_EVENTS_REDIS_URL='',
+    QUEUE_METRICS_REDIS_URL='',
+)
+class RollupTests(TestCase):
+    """Daily rollups stay equal to a recomputation from stored analyses."""
+
+    def setUp(self):
+        for patch in fake_models():
+            self.addCleanup(patch.stop)
+        eager_celery(self)
+        self.user = User.objects.create_user('owner')
+        self.video = Video.objects.create(user=self.user, youtube_video_id='rollupvid01')
+
+    def _run(self, **kwargs):
+        """Run a fetch, counting the rollup rebuilds it does."""
+        with mock.patch(
+            'comments.tasks.rebuild_video_rollups', wraps=rebuild_video_rollups
+        ) as rebuild:
+            fetch_video_comments(self.video.id, **kwargs)
+        return rebuild
+
+    def _assert_fresh(self):
+        """Assert the stored rollups equal a full recomputation, and an independent count."""
+        stored = rollup_rows(self.video)
+        rebuild_video_rollups(self.video)
+        self.assertEqual(stored, rollup_rows(self.video))
+
+        expected = defaultdict(Counter)
+        for analysis in CommentAnalysis.objects.filter(comment__video=self.video).select_related('comment'):
+            day = analysis.comment.published_at.date()
+            expected[day]['total_comments'] += 1
+            expected[day][f"{analysis.sentiment}_comments"] += 1
+        self.assertEqual(
+            {day: row['total_comments'] for day, row in stored.items()},
+            {day: counts['total_comments'] for day, counts in expected.items()},
+        )
+        for day, counts in expected.items():
+            for sentiment in ('positive', 'negative', 'neutral'):
+                self.assertEqual(
+                    stored[day][f"{sentiment}_comments"], counts[f"{sentiment}_comments"]
+                )
+
+    @override_settings(YOUTUBE_FAKE_COMMENT_COUNT=800)
+    def test_streaming_run_rebuilds_once_and_matches_recomputation(self):
+        rebuild = self._run(stream=True)
+        self.assertEqual(rebuild.call_count, 1)
+        # 800 comments a minute apart from noon span two days
+        self.assertEqual(len(rollup_rows(self.video)), 2)
+        self._assert_fresh()
+
+    def test_incremental_run_only_recomputes_new_days(self):
+        with override_settings(YOUTUBE_FAKE_COMMENT_COUNT=800):
+            self._run(stream=False)
+        self._assert_fresh()
+        first_day = min(rollup_rows(self.video))
+
+        with override_settings(YOUTUBE_FAKE_COMMENT_COUNT=850):
+            rebuild = self._run(incremental=True)
+        self.assertEqual(rebuild.call_count, 1)
+        self.assertGreater(rebuild.call_args.kwargs['since'], first_day)
+        self.assertEqual(sum(row['total_comments'] for row in rollup_rows(self.video).values()), 850)
+        self._assert_fresh()
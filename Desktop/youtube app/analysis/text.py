@@ -0,0 +1,118 @@
+"""
+Text normalization and keyword extraction for the analysis hot path.
+
+``tokenize`` lower-cases a comment and strips URLs and punctuation with a
+single precompiled pattern, giving the tokens ``clean_text`` joins. Keywords
+come from a RAKE-style extractor over those tokens: runs of non-stopwords
+are candidate phrases, scored by word degree over frequency, so no POS
+tagger or corpora are needed.
+"""
+import re
+from collections import Counter, defaultdict
+
+# URLs first, then any other non-word, non-space character. Alternatives are
+# tried in order at each position, so this matches exactly what removing
+# URLs and then punctuation in two passes would.
+_STRIP_PATTERN = re.compile(r'http\S+|www\S+|https\S+|[^\w\s]')
+
+MAX_KEYWORDS = 5
+MAX_PHRASE_WORDS = 3
+MIN_KEYWORD_LENGTH = 3
+
+# English function words, including the apostrophe-less forms that
+# tokenize produces ("dont", "im"), and filler common in comments
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are arent as at be
+because been before being below between both but by can cant could couldnt
+did didnt do does doesnt doing dont down during each even ever every few for
+from further get gets got had hadnt has hasnt have havent having he hed hes
+her here heres hers herself him himself his how hows i id ill im ive if in
+into is isnt it its itll itself just lets like me more most much mustnt my
+myself no nor not now of off on once one only or other ought our ours
+ourselves out over own really same shant she shed shes should shouldnt so
+some such than that thats the their theirs them themselves then there theres
+these they theyd theyll theyre theyve this those though through to too under
+until up us very was wasnt way we wed well were weve werent what whats when
+whens where wheres which while who whos whom why whys will with wont would
+wouldnt yet you youd youll your youre yours yourself yourselves youve
+lol lmao omg ok okay oh yeah yes hey hi please thanks thank guys guy
+""".split())
+
+
+def tokenize(text):
+    """
+    Split a comment into lower-case word tokens without URLs or punctuation.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        list: Tokens
+    """
+    return _STRIP_PATTERN.sub('', text.lower()).split()
+
+
+def clean_text(text):
+    """
+    Clean and preprocess text for analysis.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        str: Cleaned text
+    """
+    return ' '.join(tokenize(text))
+
+
+def _candidate_phrases(tokens):
+    """Split tokens on stopwords into phrases of at most MAX_PHRASE_WORDS words."""
+    phrase = []
+    for token in tokens:
+        if token in STOPWORDS or token.isdigit() or len(token) < MIN_KEYWORD_LENGTH:
+            if phrase:
+                yield tuple(phrase)
+                phrase = []
+            continue
+        phrase.append(token)
+        if len(phrase) == MAX_PHRASE_WORDS:
+            yield tuple(phrase)
+            phrase = []
+    if phrase:
+        yield tuple(phrase)
+
+
+def extract_keywords(tokens, limit=MAX_KEYWORDS):
+    """
+    Extract keyword phrases from tokens, RAKE style.
+
+    Each word scores its degree (the total length of the phrases it appears
+    in) over its frequency, and each phrase the sum of its words' scores,
+    which favours specific multi-word phrases and words that repeat.
+
+    Args:
+        tokens (list): Output of ``tokenize``
+        limit (int): Maximum number of keywords
+
+    Returns:
+        list: Keywords, best first, ties in order of appearance
+    """
+    phrases = list(_candidate_phrases(tokens))
+    if not phrases:
+        return []
+
+    frequency = Counter()
+    degree = defaultdict(int)
+    for phrase in phrases:
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+
+    scores = {}
+    for phrase in phrases:
+        if phrase not in scores:
+            scores[phrase] = sum(degree[word] / frequency[word] for word in phrase)
+
+    # dicts keep insertion order and sorted is stable, so ties stay in order
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [' '.join(phrase) for phrase in ranked[:limit]]
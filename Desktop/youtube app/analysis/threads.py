@@ -0,0 +1,102 @@
+"""
+Thread-count and CPU-affinity control for inference worker processes.
+
+PyTorch, OpenMP and MKL each size their thread pools to every core of the
+machine. A prefork worker running one process per core then runs cores x
+cores threads, which thrash and can be slower than a single process. Each
+worker process is therefore told how many threads to use, and optionally
+pinned to its own cores, as it starts (see ``youtube_analyzer.celery``).
+
+Use the ``calibrate_workers`` command to find the best split of processes
+and threads for a host.
+"""
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by the native thread pools when they start
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def available_cores():
+    """Return the cores this process may run on, in order."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def threads_per_process(processes, threads=0):
+    """
+    Return how many threads each of ``processes`` pool processes should use.
+
+    Args:
+        processes (int): Number of pool processes sharing the host
+        threads (int): Explicit thread count, or 0 to split the cores evenly
+
+    Returns:
+        int: Threads per process, at least 1
+    """
+    if threads > 0:
+        return threads
+    return max(len(available_cores()) // max(processes, 1), 1)
+
+
+def cores_for_process(index, threads):
+    """
+    Return the cores pool process ``index`` should be pinned to.
+
+    Consecutive processes get consecutive, non-overlapping slices of
+    ``threads`` cores, wrapping around when there are more processes than
+    slices.
+
+    Args:
+        index (int): Zero-based index of the process in its pool
+        threads (int): Threads, and so cores, per process
+
+    Returns:
+        list: Core IDs
+    """
+    cores = available_cores()
+    slices = max(len(cores) // threads, 1)
+    start = (index % slices) * threads
+    return cores[start:start + threads] or cores
+
+
+def configure_threads(threads, index=None, pin=False):
+    """
+    Limit this process's inference thread pools, and optionally pin it.
+
+    The environment variables cover thread pools not yet started, and the
+    torch calls resize pools that already are. Call before loading models.
+
+    Args:
+        threads (int): Threads for intra-op parallelism
+        index (int): Index of this process in its pool, for pinning
+        pin (bool): Pin the process to ``cores_for_process(index, threads)``
+
+    Returns:
+        dict: What was applied, for logging
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    # Tokenizer threads would compete with the model's
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+    applied = {'threads': threads}
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only allowed before the first parallel operation
+            pass
+    except ImportError:
+        pass
+
+    if pin and index is not None and hasattr(os, 'sched_setaffinity'):
+        cores = cores_for_process(index, threads)
+        os.sched_setaffinity(0, cores)
+        applied['cores'] = cores
+    return applied
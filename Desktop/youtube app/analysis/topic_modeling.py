@@ -1,16 +1,27 @@
 """
 Topic modeling and keyword extraction module using transformers.
+
+Topics come from one of two engines, chosen by ANALYSIS_TOPIC_ENGINE:
+'zero_shot' classifies with BART-MNLI, one forward pass per candidate
+label, and 'embedding' encodes each comment once and scores all labels
+together (see ``analysis.embedding_topics``). Keywords come from the
+RAKE-style extractor in ``analysis.text``.
 """
-from transformers import pipeline
-from textblob import TextBlob
-import re
 from collections import Counter
+from .batching import DEFAULT_BATCH_SIZE, iter_length_sorted_batches
+from .cache import get_cache
+from . import embedding_topics
+from .conf import setting
+from .registry import get_pipeline, model_tag
+from .text import extract_keywords, tokenize
+
+# Bump when topic or keyword extraction changes so cached results are not reused
+TOPICS_VERSION = 2
+
+# Texts with fewer tokens than this are not classified
+MIN_TOPIC_WORDS = 3
 
-# Initialize zero-shot classification pipeline
-classifier = pipeline(
-    "zero-shot-classification",
-    model="facebook/bart-large-mnli"
-)
+TOPIC_ENGINES = ('zero_shot', 'embedding')
 
 # Common topics in YouTube comments
 CANDIDATE_TOPICS = [
@@ -24,88 +35,223 @@ CANDIDATE_TOPICS = [
     "off-topic"
 ]
 
-def clean_text(text):
+def _filter_topics(result, confidence_threshold):
     """
-    Clean and preprocess text for analysis.
-    
+    Keep the labels of a zero-shot result that clear the confidence threshold.
+
     Args:
-        text (str): Raw text
-        
+        result (dict): Zero-shot pipeline output with 'labels' and 'scores'
+        confidence_threshold (float): Minimum confidence score
+
     Returns:
-        str: Cleaned text
+        list: Topic labels
     """
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove URLs
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-    
-    # Remove special characters and numbers
-    text = re.sub(r'[^\w\s]', '', text)
-    
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    
-    return text
+    return [
+        label for label, score in zip(result['labels'], result['scores'])
+        if score > confidence_threshold
+    ]
+
 
-def extract_topics(text, confidence_threshold=0.3):
+def topic_engine(engine=None):
     """
-    Extract topics and keywords from text using zero-shot classification
-    and keyword extraction.
-    
+    Return the topic engine to use.
+
     Args:
-        text (str): Text to analyze
-        confidence_threshold (float): Minimum confidence score for topic assignment
-        
-    Returns:
-        tuple: (list of topics, list of keywords)
+        engine (str): Explicit engine, or None for ANALYSIS_TOPIC_ENGINE
+
+    Raises:
+        ValueError: If the engine is unknown
     """
+    engine = engine or setting('ANALYSIS_TOPIC_ENGINE', 'zero_shot')
+    if engine not in TOPIC_ENGINES:
+        raise ValueError(
+            f"Unknown topic engine '{engine}'; expected one of {', '.join(TOPIC_ENGINES)}"
+        )
+    return engine
+
+
+def _topics_cache(confidence_threshold, engine):
+    """Return the result cache for the engine's model, backend and threshold."""
+    if engine == 'embedding':
+        tag = f"{model_tag('embedding')}:{embedding_topics.calibration_version()}"
+    else:
+        tag = model_tag('zero_shot')
+    return get_cache(f"topics:v{TOPICS_VERSION}:{engine}:{tag}:{confidence_threshold}")
+
+
+def _extract_topics_uncached(text, confidence_threshold, engine='zero_shot'):
+    """Classify and extract keywords for one text; returns None on failure."""
+    if engine == 'embedding':
+        return _extract_topics_batch_uncached(
+            [text], confidence_threshold, DEFAULT_BATCH_SIZE, engine
+        )[0]
+
     try:
         # Clean the text
-        cleaned_text = clean_text(text)
+        tokens = tokenize(text)
         
         # Skip very short texts
-        if len(cleaned_text.split()) < 3:
+        if len(tokens) < MIN_TOPIC_WORDS:
             return [], []
+        cleaned_text = ' '.join(tokens)
         
         # Perform zero-shot classification
-        result = classifier(
+        result = get_pipeline('zero_shot')(
             cleaned_text,
             candidate_labels=CANDIDATE_TOPICS,
             multi_label=True
         )
         
         # Filter topics by confidence threshold
-        topics = [
-            label for label, score in zip(result['labels'], result['scores'])
-            if score > confidence_threshold
-        ]
-        
-        # Extract keywords using TextBlob
-        blob = TextBlob(cleaned_text)
+        topics = _filter_topics(result, confidence_threshold)
         
-        # Get noun phrases as potential keywords
-        noun_phrases = blob.noun_phrases
-        
-        # Get individual words and their frequencies
-        words = cleaned_text.split()
-        word_freq = Counter(words)
-        
-        # Combine noun phrases and frequent individual words
-        keywords = list(noun_phrases)
-        for word, freq in word_freq.most_common(5):
-            if (
-                len(word) > 3  # Skip very short words
-                and word not in keywords
-                and freq > 1  # Word appears more than once
-            ):
-                keywords.append(word)
-        
-        return topics, keywords[:5]  # Limit to top 5 keywords
+        return topics, extract_keywords(tokens)
         
     except Exception as e:
         print(f"Error in topic extraction: {str(e)}")
+        return None
+
+
+def _extract_topics_batch_uncached(texts, confidence_threshold, batch_size,
+                                   engine='zero_shot'):
+    """Classify many texts in micro-batches; None marks failed items."""
+    results = [([], []) for _ in texts]
+
+    # Tokenize once and keep only texts long enough to classify
+    tokenized = {}
+    for index, text in enumerate(texts):
+        try:
+            tokens = tokenize(text)
+        except Exception as e:
+            print(f"Error in topic extraction: {str(e)}")
+            results[index] = None
+            continue
+        if len(tokens) >= MIN_TOPIC_WORDS:
+            tokenized[index] = tokens
+
+    positions = list(tokenized)
+    cleaned_texts = [' '.join(tokenized[index]) for index in positions]
+
+    if engine == 'embedding':
+        return _embedding_topics(results, positions, cleaned_texts, tokenized,
+                                 confidence_threshold, batch_size)
+
+    for batch_indices, batch in iter_length_sorted_batches(cleaned_texts, batch_size):
+        indices = [positions[i] for i in batch_indices]
+        try:
+            batch_results = get_pipeline('zero_shot')(
+                batch,
+                candidate_labels=CANDIDATE_TOPICS,
+                multi_label=True,
+                batch_size=len(batch)
+            )
+        except Exception as e:
+            print(f"Error in batched topic extraction: {str(e)}")
+            for index in indices:
+                results[index] = _extract_topics_uncached(texts[index], confidence_threshold)
+            continue
+
+        # Older pipeline versions unwrap single-item batches
+        if isinstance(batch_results, dict):
+            batch_results = [batch_results]
+
+        for index, result in zip(indices, batch_results):
+            try:
+                results[index] = (
+                    _filter_topics(result, confidence_threshold),
+                    extract_keywords(tokenized[index])
+                )
+            except Exception as e:
+                print(f"Error in topic extraction: {str(e)}")
+                results[index] = None
+
+    return results
+
+
+def _embedding_topics(results, positions, cleaned_texts, tokenized, confidence_threshold,
+                      batch_size):
+    """Fill ``results`` using the embedding engine; None marks failed items."""
+    try:
+        scored = embedding_topics.score_topics(cleaned_texts, CANDIDATE_TOPICS, batch_size)
+    except Exception as e:
+        print(f"Error in embedding topic extraction: {str(e)}")
+        for index in positions:
+            results[index] = None
+        return results
+
+    for index, result in zip(positions, scored):
+        try:
+            results[index] = (
+                _filter_topics(result, confidence_threshold),
+                extract_keywords(tokenized[index])
+            )
+        except Exception as e:
+            print(f"Error in topic extraction: {str(e)}")
+            results[index] = None
+
+    return results
+
+
+def _as_topic_result(cached):
+    """Turn a cached [topics, keywords] pair back into a result tuple."""
+    if cached is None:
         return [], []
+    topics, keywords = cached
+    return list(topics), list(keywords)
+
+
+def extract_topics(text, confidence_threshold=0.3, engine=None):
+    """
+    Extract topics and keywords from text using zero-shot classification
+    and keyword extraction.
+
+    Results are cached by normalized text, so repeated comments skip
+    inference.
+    
+    Args:
+        text (str): Text to analyze
+        confidence_threshold (float): Minimum confidence score for topic assignment
+        engine (str): 'zero_shot' or 'embedding'; defaults to ANALYSIS_TOPIC_ENGINE
+        
+    Returns:
+        tuple: (list of topics, list of keywords)
+    """
+    engine = topic_engine(engine)
+    cached = _topics_cache(confidence_threshold, engine).map(
+        [text],
+        lambda texts: [_extract_topics_uncached(texts[0], confidence_threshold, engine)]
+    )[0]
+    return _as_topic_result(cached)
+
+
+def extract_topics_batch(texts, confidence_threshold=0.3, batch_size=DEFAULT_BATCH_SIZE,
+                         engine=None):
+    """
+    Extract topics and keywords from many texts with batched classification.
+
+    Cached texts are answered from the result cache. Texts too short to
+    classify are skipped exactly as in ``extract_topics``; the rest are sorted
+    by length and sent through the topic engine in micro-batches of
+    ``batch_size``.
+
+    Args:
+        texts (list): Texts to analyze
+        confidence_threshold (float): Minimum confidence score for topic assignment
+        batch_size (int): Number of texts per forward pass
+        engine (str): 'zero_shot' or 'embedding'; defaults to ANALYSIS_TOPIC_ENGINE
+
+    Returns:
+        list: (topics, keywords) tuples in the same order as ``texts``
+    """
+    engine = topic_engine(engine)
+    cached = _topics_cache(confidence_threshold, engine).map(
+        texts,
+        lambda misses: _extract_topics_batch_uncached(
+            misses, confidence_threshold, batch_size, engine
+        )
+    )
+    return [_as_topic_result(item) for item in cached]
+
 
 def analyze_topic_trends(comments):
     """
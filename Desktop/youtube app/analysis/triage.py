@@ -0,0 +1,199 @@
+"""
+Rule-based triage of comments before the transformer models.
+
+Obvious cases are labelled with precompiled patterns and a small lexicon in
+microseconds: spam, URL-only, emoji-only and very short comments, and exact
+duplicates, within a batch or of a comment analyzed earlier (looked up by
+``text_fingerprint``). Only the remaining, ambiguous comments are sent
+through the sentiment and topic models. How many comments each rule
+handled is counted in ``triage_stats()``.
+"""
+import hashlib
+import logging
+import re
+import threading
+from collections import Counter
+
+from textblob import TextBlob
+
+from .cache import normalize_text
+from .conf import setting
+from .sentiment import cascade_config
+from .text import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Self-promotion and scam phrasings common in YouTube comment spam
+SPAM_PATTERN = re.compile(
+    r'sub(scribe)?\s*(to|2)\s*(my|me)\b'
+    r'|check\s*(out\s*)?my\s*(channel|profile|videos?|page)'
+    r'|free\s*(gift\s*cards?|giftcards?|robux|v-?bucks|iphone)'
+    r'|\b(whats\s*app|telegram)\b\W*\+?\d'
+    r'|\b(earn|make)\s*\$?\d[\d,]*\s*(\$|dollars?)?\s*(per|a|every)\s*(day|week|hour)'
+    r'|click\s*(the\s*)?link\s*in\s*(my\s*)?bio',
+    re.IGNORECASE
+)
+URL_ONLY_PATTERN = re.compile(r'^(?:\s*(?:https?://|www\.)\S+)+\s*$', re.IGNORECASE)
+# Emoji, pictographs, their modifiers and joiners, plus stray punctuation
+EMOJI_ONLY_PATTERN = re.compile(
+    r'^[\s\u200d\ufe0f\u2190-\u21ff\u2300-\u27bf\u2b00-\u2bff'
+    r'\U0001f000-\U0001faff\U000e0000-\U000e007f!?.,~*]+$'
+)
+EMOJI_SENTIMENT = {
+    'positive': set('😀😃😄😁😆😊😍🥰😘😂🤣👍👏🙌💯🔥❤💕💖💗💙💚💛💜🤩😎✨🎉🥳'),
+    'negative': set('😠😡🤬👎😢😭😞😔😒🙄🤮🤢💩😤😩😫'),
+}
+
+# Comments with fewer words than this after cleaning are labelled by lexicon
+# alone; extract_topics already assigns them no topics
+MIN_MODEL_WORDS = 3
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def text_fingerprint(text):
+    """
+    Return a fingerprint shared by exact duplicates of a comment.
+
+    Args:
+        text (str): Raw comment text
+
+    Returns:
+        str: SHA-1 hex digest of the normalized text
+    """
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def _lexicon_sentiment(text):
+    """Sentiment from TextBlob polarity alone, with the thresholds of analyze_sentiment."""
+    threshold = cascade_config()[1]['textblob_polarity']
+    polarity = TextBlob(text).sentiment.polarity
+    if polarity > threshold:
+        return 'positive'
+    if polarity < -threshold:
+        return 'negative'
+    return 'neutral'
+
+
+def _emoji_sentiment(text):
+    """Majority sentiment of the emoji in ``text``, neutral on a tie."""
+    votes = Counter(
+        sentiment
+        for char in text
+        for sentiment, emoji in EMOJI_SENTIMENT.items()
+        if char in emoji
+    )
+    if votes['positive'] > votes['negative']:
+        return 'positive'
+    if votes['negative'] > votes['positive']:
+        return 'negative'
+    return 'neutral'
+
+
+def triage(text):
+    """
+    Label a comment by rule if it is an obvious case.
+
+    Args:
+        text (str): Raw comment text
+
+    Returns:
+        tuple: (rule, (sentiment, (topics, keywords))), or None if the
+            comment needs the models
+    """
+    stripped = (text or '').strip()
+    if not stripped:
+        return 'empty', ('neutral', ([], []))
+    if URL_ONLY_PATTERN.match(stripped):
+        return 'url_only', ('neutral', (['spam'], []))
+    if SPAM_PATTERN.search(stripped):
+        return 'spam', ('neutral', (['spam'], []))
+    if EMOJI_ONLY_PATTERN.match(stripped):
+        return 'emoji_only', (_emoji_sentiment(stripped), ([], []))
+    if len(tokenize(stripped)) < MIN_MODEL_WORDS:
+        return 'short', (_lexicon_sentiment(stripped), ([], []))
+    return None
+
+
+def triage_batch(texts, analyze, known=None):
+    """
+    Analyze texts, sending only the ambiguous ones through ``analyze``.
+
+    Exact duplicates (after normalization) are analyzed once and share the
+    result, and texts found in ``known`` reuse the result stored for them.
+    With ANALYSIS_TRIAGE_ENABLED off every other unique text goes to
+    ``analyze``.
+
+    Args:
+        texts (list): Comment texts
+        analyze (callable): Takes a list of texts and returns a list of
+            (sentiment, (topics, keywords)) results in the same order
+        known (dict): ``text_fingerprint`` of earlier comments mapped to
+            their (sentiment, (topics, keywords)) results, if any
+
+    Returns:
+        list: (sentiment, (topics, keywords)) results in the same order as
+            ``texts``
+    """
+    enabled = setting('ANALYSIS_TRIAGE_ENABLED', True)
+    results = [None] * len(texts)
+    counts = Counter()
+    known = known or {}
+    # Fingerprint mapped to the index of its first occurrence
+    first_seen = {}
+    duplicates = []
+    ambiguous = []
+
+    for index, text in enumerate(texts):
+        key = text_fingerprint(text)
+        if key in known:
+            results[index] = known[key]
+            counts['duplicate'] += 1
+            continue
+        if key in first_seen:
+            duplicates.append((index, first_seen[key]))
+            continue
+        first_seen[key] = index
+
+        verdict = triage(text) if enabled else None
+        if verdict is None:
+            ambiguous.append(index)
+        else:
+            rule, results[index] = verdict
+            counts[rule] += 1
+
+    if ambiguous:
+        for index, result in zip(ambiguous, analyze([texts[i] for i in ambiguous])):
+            results[index] = result
+    counts['model'] += len(ambiguous)
+
+    for index, original in duplicates:
+        results[index] = results[original]
+    counts['duplicate'] += len(duplicates)
+
+    with _stats_lock:
+        _stats.update(counts)
+    logger.debug("Triaged %d comments: %s", len(texts), dict(counts))
+    return results
+
+
+def triage_stats():
+    """
+    Return how many comments each triage rule has handled in this process.
+
+    'model' counts comments sent to the models and 'duplicate' those that
+    reused the result of an identical comment, in the same batch or
+    analyzed earlier.
+
+    Returns:
+        dict: Rule name mapped to comment count
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_triage_stats():
+    """Zero the triage counters."""
+    with _stats_lock:
+        _stats.clear()
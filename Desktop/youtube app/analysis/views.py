@@ -0,0 +1,159 @@
+"""
+API views for channel-level analytics across a user's videos.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from comments.models import Video
+from .models import DailyRollup
+
+INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+MAX_KEYWORDS = 50
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    """
+    Analytics over all of the current user's analyzed videos.
+
+    Everything is read from the materialized daily rollups, so no comment
+    rows are scanned and no models are run.
+
+    Endpoints:
+    - GET /api/analytics/sentiment/ - Sentiment counts per period
+    - GET /api/analytics/topics/ - Topic share per video
+    - GET /api/analytics/keywords/ - Top keywords and their counts per period
+
+    Query parameters (all optional):
+    - video: restrict to these video IDs (repeatable)
+    - since, until: restrict to comments published on these dates (YYYY-MM-DD)
+    - interval: 'day', 'week' (default) or 'month', for time series
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _rollups(self, request):
+        """Return the user's rollups, filtered by the query parameters."""
+        rollups = DailyRollup.objects.filter(user=request.user)
+
+        video_ids = request.query_params.getlist('video')
+        if video_ids:
+            if not all(video_id.isdigit() for video_id in video_ids):
+                raise ValidationError({'video': 'Must be video IDs.'})
+            rollups = rollups.filter(video_id__in=video_ids)
+
+        for param, lookup in (('since', 'day__gte'), ('until', 'day__lte')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:
+                    day = None
+                if day is None:
+                    raise ValidationError({param: 'Must be a date as YYYY-MM-DD.'})
+                rollups = rollups.filter(**{lookup: day})
+
+        return rollups
+
+    def _interval(self, request):
+        """Return the interval name and the matching truncation function."""
+        interval = request.query_params.get('interval', 'week')
+        if interval not in INTERVALS:
+            raise ValidationError({'interval': 'Must be day, week or month.'})
+        return interval, INTERVALS[interval]
+
+    @action(detail=False, methods=['get'])
+    def sentiment(self, request):
+        """Get sentiment counts per period, summed by the database."""
+        interval, trunc = self._interval(request)
+        periods = (
+            self._rollups(request)
+            .annotate(period=trunc('day'))
+            .values('period')
+            .annotate(
+                total=Sum('total_comments'),
+                positive=Sum('positive_comments'),
+                negative=Sum('negative_comments'),
+                neutral=Sum('neutral_comments'),
+            )
+            .order_by('period')
+        )
+        return Response({'interval': interval, 'periods': list(periods)})
+
+    @action(detail=False, methods=['get'])
+    def topics(self, request):
+        """Get each video's topic counts and their share of its comments."""
+        totals = Counter()
+        topic_counts = defaultdict(Counter)
+        for video_id, total, counts in self._rollups(request).values_list(
+            'video_id', 'total_comments', 'topic_counts'
+        ).iterator():
+            totals[video_id] += total
+            topic_counts[video_id].update(counts)
+
+        titles = dict(
+            Video.objects.filter(user=request.user, id__in=totals).values_list('id', 'title')
+        )
+        videos = [
+            {
+                'video': video_id,
+                'title': titles.get(video_id, ''),
+                'total_comments': total,
+                'topics': dict(topic_counts[video_id].most_common()),
+                'topic_share': {
+                    topic: round(count / total, 4)
+                    for topic, count in topic_counts[video_id].most_common()
+                },
+            }
+            for video_id, total in totals.most_common()
+            if total
+        ]
+        return Response({'videos': videos})
+
+    @action(detail=False, methods=['get'])
+    def keywords(self, request):
+        """
+        Get the most common keywords and their counts per period.
+
+        Query parameters:
+        - limit: number of keywords (default 10, at most 50)
+        """
+        interval, trunc = self._interval(request)
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), MAX_KEYWORDS)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be a number.'})
+
+        overall = Counter()
+        per_period = defaultdict(Counter)
+        for period, counts in (
+            self._rollups(request)
+            .annotate(period=trunc('day'))
+            .values_list('period', 'keyword_counts')
+            .iterator()
+        ):
+            overall.update(counts)
+            per_period[period].update(counts)
+
+        top = [keyword for keyword, _ in overall.most_common(limit)]
+        return Response({
+            'interval': interval,
+            'keywords': {keyword: overall[keyword] for keyword in top},
+            'periods': [
+                {
+                    'period': period,
+                    'counts': {keyword: per_period[period][keyword] for keyword in top},
+                }
+                for period in sorted(per_period)
+            ],
+        })
@@ -0,0 +1,123 @@
+"""
+Response caching for the per-video API endpoints.
+
+Each video has a version stamp in the cache. Cached responses are keyed on
+the user, the request path and that version, and are served with an ETag and
+Last-Modified header so that repeat polls can be answered with 304 Not
+Modified. Tasks and views call ``invalidate_video`` whenever they change a
+video, its comments or its analysis results, which bumps the version and
+orphans the old entries.
+
+Version stamps expire with the responses they key, so videos that are no
+longer polled (or no longer exist) do not keep entries in the cache.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _version_key(video_id):
+    return f"api:video-stamp:{video_id}"
+
+
+def video_version(video_id):
+    """
+    Return the current version stamp of a video's API responses.
+
+    The stamp is the time (in seconds) the video's data last changed, as far
+    as the cache knows; a video seen for the first time is stamped now. Only
+    call it for videos the user may see, as it stores the stamp.
+
+    Returns:
+        tuple: (version, previous version), the latter 0 if unknown
+    """
+    return cache.get_or_set(
+        _version_key(video_id), (time.time(), 0.0), settings.API_RESPONSE_CACHE_TIMEOUT
+    )
+
+
+def invalidate_video(video_id):
+    """
+    Mark every cached response for a video as stale.
+
+    Args:
+        video_id (int): Database ID of the Video model instance
+    """
+    current = cache.get(_version_key(video_id))
+    previous = current[0] if current else 0.0
+    cache.set(
+        _version_key(video_id), (time.time(), previous), settings.API_RESPONSE_CACHE_TIMEOUT
+    )
+
+
+def cached_video_response(view_method):
+    """
+    Cache successful responses of a detail ``VideoViewSet`` method.
+
+    The video must exist and belong to the user; that is checked with one
+    indexed query before any validator or cached body is looked at. Requests
+    carrying a matching If-None-Match (or an If-Modified-Since no older than
+    the version stamp) then get an empty 304 without further queries.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        video_id = kwargs.get('pk')
+        if not self.get_queryset().filter(pk=video_id).exists():
+            raise Http404
+        version, previous = video_version(video_id)
+        key = hashlib.sha1(
+            f"{request.user.pk}:{self.action}:{request.get_full_path()}:{version}".encode('utf-8')
+        ).hexdigest()
+        etag = f'"{key}"'
+        # Rounded up, so the date is never earlier than the change it covers
+        last_modified = math.ceil(version)
+
+        if _not_modified(request, etag, last_modified, math.ceil(previous)):
+            return _with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+        cache_key = f"api:response:{key}"
+        data = cache.get(cache_key)
+        if data is not None:
+            return _with_validators(Response(data), etag, last_modified)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(cache_key, response.data, settings.API_RESPONSE_CACHE_TIMEOUT)
+            _with_validators(response, etag, last_modified)
+        return response
+
+    return wrapper
+
+
+def _not_modified(request, etag, last_modified, previous_modified):
+    """Return True if the client's cached copy is still current."""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since is not None:
+        since = parse_http_date_safe(if_modified_since)
+        if since is None or since < last_modified:
+            return False
+        # Copies from before and after a change in the same second carry the
+        # same date; only the ETag can tell them apart
+        return not (since == last_modified and previous_modified == last_modified)
+    return False
+
+
+def _with_validators(response, etag, last_modified):
+    """Attach caching headers to a response and return it."""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Let browsers keep the body but revalidate on every request
+    response['Cache-Control'] = 'private, no-cache'
+    return response
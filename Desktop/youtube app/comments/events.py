@@ -0,0 +1,146 @@
+"""
+Live analysis events published over Redis pub/sub.
+
+Celery tasks publish job progress and partial analysis results to a
+per-video channel; the server-sent events view in ``comments.views``
+relays them to browsers, so one open connection replaces repeated polling.
+"""
+import json
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Events after which a stream has nothing more to send
+FINAL_EVENTS = ('done', 'failed')
+
+_redis = None
+
+
+def channel_name(video_id):
+    """Return the pub/sub channel carrying a video's events."""
+    return f"video-events:{video_id}"
+
+
+def _get_redis():
+    """Return the shared publishing connection, or None if disabled."""
+    global _redis
+    if _redis is None and settings.ANALYSIS_EVENTS_REDIS_URL:
+        import redis
+        _redis = redis.Redis.from_url(settings.ANALYSIS_EVENTS_REDIS_URL)
+    return _redis
+
+
+def publish_event(video_id, event, data):
+    """
+    Publish an event to everyone streaming a video.
+
+    Publishing is best effort: a Redis failure is logged and never fails
+    the task that reported the event.
+
+    Args:
+        video_id (int): Database ID of the Video model instance
+        event (str): Event name, e.g. 'progress', 'partial' or 'analysis'
+        data (dict): JSON-serializable payload
+    """
+    try:
+        client = _get_redis()
+        if client is not None:
+            client.publish(
+                channel_name(video_id),
+                json.dumps({'event': event, 'data': data}, default=str)
+            )
+    except Exception as e:
+        logger.warning("Could not publish %s event for video %s: %s", event, video_id, e)
+
+
+def publish_job(job):
+    """
+    Publish the state of an analysis job.
+
+    Sends a 'progress' event while the job is running, and 'done' or
+    'failed' once it has finished.
+
+    Args:
+        job (AnalysisJob): Job to report
+    """
+    from .serializers import AnalysisJobSerializer
+
+    publish_event(job.video_id, job_event(job), AnalysisJobSerializer(job).data)
+
+
+def job_event(job):
+    """Return the event name reporting a job in its current stage."""
+    if job.stage == 'complete':
+        return 'done'
+    if job.stage == 'failed':
+        return 'failed'
+    return 'progress'
+
+
+def publish_job_by_id(job_id):
+    """
+    Publish the current state of a job given only its ID.
+
+    Skips the database read entirely when events are disabled.
+
+    Args:
+        job_id (int): AnalysisJob ID
+    """
+    if not settings.ANALYSIS_EVENTS_REDIS_URL:
+        return
+    from .models import AnalysisJob
+
+    job = AnalysisJob.objects.filter(pk=job_id).first()
+    if job is not None:
+        publish_job(job)
+
+
+def format_sse(event, data):
+    """
+    Encode one server-sent event.
+
+    Args:
+        event (str): Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: Event in text/event-stream framing
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def subscribe(video_id, keepalive):
+    """
+    Yield a video's published events as they arrive.
+
+    Yields None once the subscription is active, so the caller can read a
+    snapshot of the current state without missing later events. After that
+    it yields (event, data) pairs, or None after ``keepalive`` seconds
+    without an event so the caller can keep the connection open. The
+    subscription is released when the generator is closed.
+
+    Args:
+        video_id (int): Database ID of the Video model instance
+        keepalive (float): Seconds to wait before yielding None
+    """
+    import redis.asyncio
+
+    client = redis.asyncio.Redis.from_url(settings.ANALYSIS_EVENTS_REDIS_URL)
+    pubsub = client.pubsub()
+    try:
+        await pubsub.subscribe(channel_name(video_id))
+        yield None
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=keepalive
+            )
+            if message is None:
+                yield None
+                continue
+            payload = json.loads(message['data'])
+            yield payload['event'], payload['data']
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
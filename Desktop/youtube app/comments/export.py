@@ -0,0 +1,132 @@
+"""
+Streaming export of a video's comments and their analysis results.
+
+Rows are read as plain dicts with ``values()`` in keyset-paginated batches
+of EXPORT_CHUNK_SIZE, so memory stays constant however many comments a
+video has. Batches are keyset queries rather than one ``iterator()`` over
+the whole queryset because the MySQL driver buffers a full result set in
+the client. NDJSON and CSV are generated line by line; Parquet is written
+one row group per batch with pyarrow, an optional dependency.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+
+EXPORT_FIELDS = [
+    'id',
+    'youtube_comment_id',
+    'author_name',
+    'text',
+    'published_at',
+    'like_count',
+    'sentiment',
+    'analysis__topics',
+    'analysis__keywords',
+]
+# Output column names, without the join prefix
+EXPORT_COLUMNS = [field.replace('analysis__', '') for field in EXPORT_FIELDS]
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def iter_batches(video_id, chunk_size=None):
+    """
+    Yield a video's comments with their analysis, in batches of dicts.
+
+    Args:
+        video_id (int): Database ID of the Video
+        chunk_size (int): Rows per query; defaults to EXPORT_CHUNK_SIZE
+
+    Yields:
+        list: Up to ``chunk_size`` dicts keyed by EXPORT_COLUMNS, in ID order
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    last_id = 0
+    while True:
+        rows = list(
+            Comment.objects.filter(video_id=video_id, id__gt=last_id)
+            .order_by('id')
+            .values_list(*EXPORT_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return
+        yield [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+        last_id = rows[-1][0]
+
+
+def iter_ndjson(video_id, chunk_size=None):
+    """Yield the export as newline-delimited JSON, one chunk of lines at a time."""
+    for batch in iter_batches(video_id, chunk_size):
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in batch)
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(video_id, chunk_size=None):
+    """Yield the export as CSV, header first; topics and keywords are ';'-joined."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for batch in iter_batches(video_id, chunk_size):
+        for row in batch:
+            row['published_at'] = row['published_at'].isoformat()
+            row['topics'] = ';'.join(row['topics'] or [])
+            row['keywords'] = ';'.join(row['keywords'] or [])
+        yield ''.join(writer.writerow(row.values()) for row in batch)
+
+
+def write_parquet(video_id, destination, chunk_size=None):
+    """
+    Write the export to a Parquet file, one row group per batch.
+
+    Args:
+        video_id (int): Database ID of the Video
+        destination: Path or binary file object to write to
+        chunk_size (int): Rows per query and row group
+
+    Returns:
+        int: Number of rows written
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('youtube_comment_id', pa.string()),
+        ('author_name', pa.string()),
+        ('text', pa.string()),
+        ('published_at', pa.timestamp('us', tz='UTC')),
+        ('like_count', pa.int64()),
+        ('sentiment', pa.string()),
+        ('topics', pa.list_(pa.string())),
+        ('keywords', pa.list_(pa.string())),
+    ])
+    total = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        for batch in iter_batches(video_id, chunk_size):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            total += len(batch)
+        if not total:
+            # Keep the file readable, with its schema, when there are no rows
+            writer.write_table(schema.empty_table())
+    return total
@@ -0,0 +1,115 @@
+"""
+Offline stand-in for the YouTube Data API client.
+
+Mimics the parts of ``googleapiclient.discovery.build('youtube', 'v3')`` used
+by the tasks (``videos().list`` and ``commentThreads().list``) and serves
+deterministic synthetic comments, so fetching and analysis can be exercised
+without network access or API quota. Enable it with YOUTUBE_FAKE_API=True.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from analysis.corpus import SAMPLE_COMMENTS
+
+# Timestamp of the first synthetic comment; each later one is a minute newer
+FIRST_COMMENT_AT = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_comment_item(index, prefix='fake'):
+    """
+    Return a commentThreads-style item for synthetic comment ``index``.
+
+    Higher indices are newer, so raising a client's ``comment_count``
+    simulates new comments being posted.
+
+    Args:
+        index (int): Position of the comment in the fake video
+        prefix (str): Prefix for the generated comment ID
+
+    Returns:
+        dict: Item shaped like the commentThreads().list API response
+    """
+    published_at = FIRST_COMMENT_AT + timedelta(minutes=index)
+    return {
+        'id': f"{prefix}{index:08d}",
+        'snippet': {
+            'topLevelComment': {
+                'snippet': {
+                    'authorDisplayName': f"viewer{index}",
+                    'textDisplay': SAMPLE_COMMENTS[index % len(SAMPLE_COMMENTS)],
+                    'publishedAt': published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'likeCount': index % 50,
+                }
+            }
+        }
+    }
+
+
+class _Request:
+    """Deferred response with the ``execute()`` interface of the real client."""
+
+    def __init__(self, response, latency):
+        self._response = response
+        self._latency = latency
+
+    def execute(self):
+        if self._latency:
+            time.sleep(self._latency)
+        return self._response
+
+
+class _Videos:
+    def __init__(self, client):
+        self._client = client
+
+    def list(self, part, id, **kwargs):
+        return _Request({
+            'items': [{
+                'id': id,
+                'snippet': {
+                    'title': f"Fake video {id}",
+                    'description': 'Served by the offline YouTube API stand-in.',
+                }
+            }]
+        }, self._client.latency)
+
+
+class _CommentThreads:
+    def __init__(self, client):
+        self._client = client
+
+    def list(self, part, videoId, maxResults=20, pageToken=None, order='time', **kwargs):
+        # Pages run newest first; the token is the offset from the newest
+        count = self._client.comment_count
+        start = int(pageToken or 0)
+        end = min(start + maxResults, count)
+        response = {
+            'items': [
+                make_comment_item(count - 1 - offset, prefix=f"{videoId}-")
+                for offset in range(start, end)
+            ]
+        }
+        if end < count:
+            response['nextPageToken'] = str(end)
+        return _Request(response, self._client.latency)
+
+
+class FakeYouTubeClient:
+    """
+    In-memory YouTube client serving ``comment_count`` comments per video.
+
+    Args:
+        comment_count (int): Number of comments every video has
+        latency (float): Seconds each ``execute()`` call sleeps, to simulate
+            network round-trips
+    """
+
+    def __init__(self, comment_count=1000, latency=0.0):
+        self.comment_count = comment_count
+        self.latency = latency
+
+    def videos(self):
+        return _Videos(self)
+
+    def commentThreads(self):
+        return _CommentThreads(self)
@@ -0,0 +1,115 @@
+"""
+Buffered bulk writing of YouTube comments into the database.
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection
+
+from analysis.triage import text_fingerprint
+from .cache import invalidate_video
+from .models import Comment
+
+# Fields refreshed when a comment that is already stored is fetched again
+UPSERT_FIELDS = ['text', 'text_hash', 'like_count']
+
+
+def comment_from_item(video, item):
+    """
+    Build an unsaved Comment from a commentThreads API item.
+
+    Args:
+        video (Video): Video the comment belongs to
+        item (dict): Item from a commentThreads().list response
+
+    Returns:
+        Comment: Unsaved model instance
+    """
+    comment_data = item['snippet']['topLevelComment']['snippet']
+    return Comment(
+        video=video,
+        youtube_comment_id=item['id'],
+        author_name=comment_data['authorDisplayName'],
+        text=comment_data['textDisplay'],
+        text_hash=text_fingerprint(comment_data['textDisplay']),
+        published_at=datetime.strptime(
+            comment_data['publishedAt'],
+            '%Y-%m-%dT%H:%M:%SZ'
+        ).replace(tzinfo=timezone.utc),
+        like_count=comment_data.get('likeCount', 0)
+    )
+
+
+class CommentBulkWriter:
+    """
+    Buffers comments and writes them with one upserting INSERT per batch.
+
+    Comments that already exist (same ``youtube_comment_id``) have their
+    text and like count updated instead of failing the insert, so a video
+    can be fetched again safely.
+
+    Usage:
+        writer = CommentBulkWriter(video)
+        for item in response['items']:
+            writer.add(item)
+        comment_ids = writer.flush()
+    """
+
+    def __init__(self, video, batch_size=None):
+        self.video = video
+        self.batch_size = batch_size or settings.COMMENT_INGEST_BATCH_SIZE
+        self.total_written = 0
+        self._buffer = []
+        self._written_ids = []
+
+    def add(self, item):
+        """
+        Queue one API item, flushing once the buffer reaches the batch size.
+
+        Args:
+            item (dict): Item from a commentThreads().list response
+        """
+        self._buffer.append(comment_from_item(self.video, item))
+        if len(self._buffer) >= self.batch_size:
+            self._write()
+
+    def flush(self):
+        """
+        Write any buffered comments and return the IDs written since the
+        previous flush.
+
+        Returns:
+            list: Database IDs of the written comments
+        """
+        self._write()
+        written_ids, self._written_ids = self._written_ids, []
+        if written_ids:
+            invalidate_video(self.video.id)
+        return written_ids
+
+    def _write(self):
+        """Upsert the buffered comments in a single statement."""
+        if not self._buffer:
+            return
+
+        # MySQL upserts on any unique key and rejects an explicit target
+        unique_fields = (
+            ['youtube_comment_id']
+            if connection.features.supports_update_conflicts_with_target
+            else None
+        )
+        Comment.objects.bulk_create(
+            self._buffer,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=UPSERT_FIELDS,
+        )
+
+        # Upserted rows do not get their primary keys back on every backend
+        youtube_ids = [comment.youtube_comment_id for comment in self._buffer]
+        self._written_ids.extend(
+            Comment.objects.filter(youtube_comment_id__in=youtube_ids)
+            .values_list('id', flat=True)
+        )
+        self.total_written += len(self._buffer)
+        self._buffer = []
@@ -0,0 +1,65 @@
+"""
+Management command filling the comment topic table from stored analyses.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from comments.models import CommentAnalysis, CommentTopic, Video
+
+
+class Command(BaseCommand):
+    """
+    Copy the topics of stored comment analyses into the CommentTopic table
+    used by topic-filtered comment listings. New analyses write it
+    themselves; run this once for comments analyzed before it existed.
+    Videos are rewritten one at a time, reading analyses in ID-ordered
+    batches.
+
+    Usage:
+        python manage.py backfill_comment_topics
+        python manage.py backfill_comment_topics --video 12 --batch-size 5000
+    """
+    help = 'Fill the comment topic table from stored comment analyses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--video', type=int, action='append', default=[],
+            help='Only backfill this Video ID (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Analyses read per query'
+        )
+
+    def handle(self, *args, **options):
+        videos = Video.objects.order_by('id')
+        if options['video']:
+            videos = videos.filter(id__in=options['video'])
+
+        total = 0
+        for video_id in videos.values_list('id', flat=True):
+            with transaction.atomic():
+                CommentTopic.objects.filter(video_id=video_id).delete()
+                total += self._backfill_video(video_id, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} comment topics"))
+
+    def _backfill_video(self, video_id, batch_size):
+        """Write the topic rows of one video and return how many were written."""
+        written = 0
+        last_id = 0
+        while True:
+            rows = list(
+                CommentAnalysis.objects.filter(comment__video_id=video_id, comment_id__gt=last_id)
+                .order_by('comment_id')
+                .values_list('comment_id', 'topics')[:batch_size]
+            )
+            if not rows:
+                return written
+            topic_rows = [
+                CommentTopic(comment_id=comment_id, video_id=video_id, topic=topic)
+                for comment_id, topics in rows
+                for topic in dict.fromkeys(topic[:100] for topic in topics or [])
+            ]
+            CommentTopic.objects.bulk_create(topic_rows)
+            written += len(topic_rows)
+            last_id = rows[-1][0]
@@ -0,0 +1,80 @@
+"""
+Management command comparing per-row and bulk comment ingestion throughput.
+"""
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from comments.fake_youtube import make_comment_item
+from comments.ingest import CommentBulkWriter, comment_from_item
+from comments.models import Video
+
+
+class Command(BaseCommand):
+    """
+    Insert the same synthetic comments with one ``save()`` per row and with
+    ``CommentBulkWriter``, then re-ingest them to time the upsert path.
+    Runs against the configured database; point DB_ENGINE/DB_NAME at a local
+    SQLite or MySQL instance. All rows created are deleted afterwards.
+
+    Usage:
+        python manage.py benchmark_ingest --count 5000 --batch-size 100
+    """
+    help = 'Benchmark per-row vs bulk comment ingestion (rows/sec)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000,
+                            help='Number of comments to ingest per run')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Bulk writer batch size (defaults to COMMENT_INGEST_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        user, _ = User.objects.get_or_create(username='benchmark-ingest')
+        run_id = uuid.uuid4().hex[:6]
+        videos = []
+
+        try:
+            # Current path: one INSERT per comment
+            video = self._video(user, f"row{run_id}")
+            videos.append(video)
+            items = [make_comment_item(i, prefix=f"r{run_id}") for i in range(count)]
+            per_row = self._time(lambda: [
+                comment_from_item(video, item).save() for item in items
+            ])
+
+            # Bulk path, then the same comments again to exercise the upsert
+            video = self._video(user, f"blk{run_id}")
+            videos.append(video)
+            items = [make_comment_item(i, prefix=f"b{run_id}") for i in range(count)]
+            bulk = self._time(lambda: self._bulk(video, items, options['batch_size']))
+            upsert = self._time(lambda: self._bulk(video, items, options['batch_size']))
+        finally:
+            for video in videos:
+                video.delete()
+
+        for name, elapsed in (('per-row', per_row), ('bulk', bulk), ('bulk re-fetch', upsert)):
+            self.stdout.write(f"{name:>14}: {elapsed:8.2f}s  {count / elapsed:10.1f} rows/sec")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {per_row / bulk:.2f}x"))
+
+    @staticmethod
+    def _video(user, youtube_video_id):
+        return Video.objects.create(
+            user=user, youtube_video_id=youtube_video_id, title='Ingest benchmark'
+        )
+
+    @staticmethod
+    def _bulk(video, items, batch_size):
+        writer = CommentBulkWriter(video, batch_size=batch_size)
+        for item in items:
+            writer.add(item)
+        return writer.flush()
+
+    @staticmethod
+    def _time(func):
+        """Return the wall-clock seconds taken by ``func()``."""
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
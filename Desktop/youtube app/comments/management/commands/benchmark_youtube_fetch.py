@@ -0,0 +1,77 @@
+"""
+Management command comparing sequential and concurrent comment fetching.
+"""
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from comments.youtube_async import AsyncYouTubeClient, fetch_videos
+from comments.youtube_stub import YouTubeStubServer
+
+
+class Command(BaseCommand):
+    """
+    Fetch the same videos from the local API stub one at a time and all at
+    once, and report pages/sec for each. The stub adds a fixed latency per
+    response to stand in for network round-trips.
+
+    Usage:
+        python manage.py benchmark_youtube_fetch --videos 20 --comments 1000
+    """
+    help = 'Benchmark sequential vs concurrent YouTube comment fetching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--videos', type=int, default=10)
+        parser.add_argument('--comments', type=int, default=500,
+                            help='Comments per video')
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Seconds of simulated latency per response')
+        parser.add_argument('--recordings', default=None,
+                            help='Replay responses recorded in this directory')
+
+    def handle(self, *args, **options):
+        video_ids = [f"bench{index:05d}" for index in range(options['videos'])]
+
+        with YouTubeStubServer(
+            recordings_dir=options['recordings'],
+            comment_count=options['comments'],
+            latency=options['latency']
+        ) as stub:
+            sequential = self._run(stub.base_url, video_ids, concurrent=False)
+            concurrent = self._run(stub.base_url, video_ids, concurrent=True)
+
+        for name, (elapsed, pages) in (('sequential', sequential), ('concurrent', concurrent)):
+            self.stdout.write(
+                f"{name:>11}: {elapsed:7.2f}s  {pages / elapsed:8.1f} pages/sec"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Speed-up: {sequential[0] / concurrent[0]:.2f}x"
+        ))
+
+    @staticmethod
+    def _run(base_url, video_ids, concurrent):
+        """Fetch every video and return (seconds, pages fetched)."""
+        pages = 0
+
+        async def on_video(youtube_video_id, snippet):
+            pass
+
+        async def on_page(youtube_video_id, items):
+            nonlocal pages
+            if items is not None:
+                pages += 1
+
+        async def fetch():
+            async with AsyncYouTubeClient(
+                'benchmark', base_url=base_url, quota_per_second=10000
+            ) as youtube:
+                if concurrent:
+                    await fetch_videos(youtube, video_ids, on_video, on_page)
+                else:
+                    for youtube_video_id in video_ids:
+                        await fetch_videos(youtube, [youtube_video_id], on_video, on_page)
+
+        start = time.perf_counter()
+        asyncio.run(fetch())
+        return time.perf_counter() - start, pages
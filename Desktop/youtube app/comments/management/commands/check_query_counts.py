@@ -0,0 +1,100 @@
+"""
+Management command asserting that API query counts do not grow with data size.
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from comments.fake_youtube import make_comment_item
+from comments.ingest import comment_from_item
+from comments.models import Comment, CommentAnalysis, Video, VideoAnalysis
+from comments.views import VideoViewSet
+
+# Endpoints checked, as (name, viewset actions, whether the route takes a pk)
+ENDPOINTS = [
+    ('list', {'get': 'list'}, False),
+    ('retrieve', {'get': 'retrieve'}, True),
+    ('comments', {'get': 'comments'}, True),
+    ('analysis', {'get': 'analysis'}, True),
+]
+
+
+class _Rollback(Exception):
+    """Raised to discard the fixture data once counting is done."""
+
+
+class Command(BaseCommand):
+    """
+    Build throw-away videos with a small and a large number of analyzed
+    comments, call every VideoViewSet endpoint for each, and fail if any
+    endpoint issues more queries for the larger video. All fixture rows are
+    rolled back.
+
+    Usage:
+        python manage.py check_query_counts --small 3 --large 60
+    """
+    help = 'Check that VideoViewSet endpoints use a constant number of queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=3)
+        parser.add_argument('--large', type=int, default=60)
+
+    def handle(self, *args, **options):
+        counts = {}
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username='query-count-check')
+                for size in (options['small'], options['large']):
+                    counts[size] = self._measure(user, size)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        small, large = counts[options['small']], counts[options['large']]
+        failed = []
+        for name, _, _ in ENDPOINTS:
+            line = f"{name:>9}: {small[name]} queries ({options['small']} comments), " \
+                   f"{large[name]} queries ({options['large']} comments)"
+            if small[name] != large[name]:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if failed:
+            raise CommandError(f"Query count grows with comments for: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS('Query counts are constant.'))
+
+    def _measure(self, user, size):
+        """Create a video with ``size`` analyzed comments and count queries."""
+        video = Video.objects.create(
+            user=user, youtube_video_id=f"qc{size}", title=f"{size} comments"
+        )
+        comments = Comment.objects.bulk_create([
+            comment_from_item(video, make_comment_item(index, prefix=f"qc{size}-"))
+            for index in range(size)
+        ])
+        CommentAnalysis.objects.bulk_create([
+            CommentAnalysis(comment=comment, sentiment='positive', topics=[], keywords=[])
+            for comment in Comment.objects.filter(video=video)
+        ])
+        VideoAnalysis.objects.create(
+            video=video, total_comments=len(comments), positive_comments=len(comments),
+            overall_sentiment='positive', top_topics={}
+        )
+
+        factory = APIRequestFactory()
+        results = {}
+        for name, actions, detail in ENDPOINTS:
+            view = VideoViewSet.as_view(actions)
+            request = factory.get('/')
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request, pk=video.pk) if detail else view(request)
+                response.render()
+            if response.status_code != 200:
+                raise CommandError(f"{name} returned {response.status_code}")
+            results[name] = len(queries)
+        return results
@@ -0,0 +1,66 @@
+"""
+Management command exporting a video's comments and analysis to a file.
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from comments.export import EXPORT_FORMATS, iter_csv, iter_ndjson, write_parquet
+from comments.models import Video
+
+
+class Command(BaseCommand):
+    """
+    Write every comment of a video, with its analysis results, as NDJSON,
+    CSV or Parquet. Rows are read in batches of ``--chunk-size``, so memory
+    use stays flat for videos with hundreds of thousands of comments.
+
+    Usage:
+        python manage.py export_comments 12 --as csv --output comments.csv
+        python manage.py export_comments 12 --as parquet --output comments.parquet
+        python manage.py export_comments 12 | gzip > comments.ndjson.gz
+    """
+    help = 'Export comments and analysis results of a video'
+
+    def add_arguments(self, parser):
+        parser.add_argument('video', type=int, help='Database ID of the Video')
+        parser.add_argument(
+            '--as', dest='export_format', choices=EXPORT_FORMATS, default='ndjson',
+            help='Output format'
+        )
+        parser.add_argument(
+            '--output', default='-',
+            help="File to write, or '-' for stdout (NDJSON and CSV only)"
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Rows per query (defaults to EXPORT_CHUNK_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        if not Video.objects.filter(id=options['video']).exists():
+            raise CommandError(f"Video {options['video']} does not exist")
+        export_format = options['export_format']
+        output = options['output']
+        chunk_size = options['chunk_size']
+
+        if export_format == 'parquet':
+            if output == '-':
+                raise CommandError('Parquet needs --output; it cannot be streamed to stdout')
+            try:
+                total = write_parquet(options['video'], output, chunk_size)
+            except ImportError as e:
+                raise CommandError(str(e))
+            self.stderr.write(f"Wrote {total} rows to {output}")
+            return
+
+        iter_rows = iter_csv if export_format == 'csv' else iter_ndjson
+        out = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        try:
+            for chunk in iter_rows(options['video'], chunk_size):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if output != '-':
+            self.stderr.write(f"Wrote {output}")
@@ -0,0 +1,58 @@
+"""
+Management command reporting how long tasks wait in each Celery queue.
+"""
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from comments.queues import PRIORITY_NAMES, queue_waits, reset_queue_waits
+
+
+class Command(BaseCommand):
+    """
+    Summarize the queue waits recorded by the workers: the time from a task
+    being published to a worker starting it, per queue and priority, over
+    the most recent tasks.
+
+    Under a large backfill the high-priority rows should stay low while the
+    low-priority ones grow. Use ``--reset`` before a load test.
+
+    Usage:
+        python manage.py queue_latency
+        python manage.py queue_latency --reset
+    """
+    help = 'Report recent queue wait times per Celery queue and priority'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Delete the recorded waits instead of reporting them'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.QUEUE_METRICS_REDIS_URL:
+            raise CommandError('Queue metrics are disabled (QUEUE_METRICS_REDIS_URL is empty)')
+        if options['reset']:
+            reset_queue_waits()
+            self.stdout.write(self.style.SUCCESS('Queue wait metrics reset'))
+            return
+
+        waits = queue_waits()
+        if not waits:
+            self.stdout.write('No queue waits recorded yet')
+            return
+
+        self.stdout.write(
+            f"{'queue':<12} {'priority':<10} {'tasks':>6} {'p50':>9} {'p95':>9} {'max':>9}"
+        )
+        for (queue, priority), samples in sorted(waits.items()):
+            p95 = (
+                statistics.quantiles(samples, n=20)[-1]
+                if len(samples) >= 2 else samples[0]
+            )
+            name = PRIORITY_NAMES.get(priority, str(priority))
+            self.stdout.write(
+                f"{queue:<12} {name:<10} {len(samples):>6} "
+                f"{statistics.median(samples):>8.3f}s {p95:>8.3f}s {max(samples):>8.3f}s"
+            )
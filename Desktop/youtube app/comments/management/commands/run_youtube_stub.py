@@ -0,0 +1,42 @@
+"""
+Management command serving the local YouTube Data API stub.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from comments.youtube_stub import YouTubeStubServer
+
+
+class Command(BaseCommand):
+    """
+    Run ``YouTubeStubServer`` in the foreground so workers can be pointed at
+    it with YOUTUBE_API_BASE_URL.
+
+    Usage:
+        python manage.py run_youtube_stub --port 8765 --recordings ./recordings
+    """
+    help = 'Serve recorded or synthetic YouTube Data API responses locally'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--recordings', default=None,
+                            help='Directory of responses recorded by AsyncYouTubeClient')
+        parser.add_argument('--comments', type=int, default=1000,
+                            help='Synthetic comments per video when no recording exists')
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help='Seconds added to every response')
+
+    def handle(self, *args, **options):
+        stub = YouTubeStubServer(
+            recordings_dir=options['recordings'],
+            comment_count=options['comments'],
+            latency=options['latency'],
+            port=options['port']
+        ).start()
+        self.stdout.write(f"YouTube API stub listening on {stub.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stub.stop()
@@ -2,7 +2,16 @@
 Models for handling YouTube video and comment data.
 """
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .events import publish_job_by_id
+
+SENTIMENT_CHOICES = [
+    ('positive', 'Positive'),
+    ('negative', 'Negative'),
+    ('neutral', 'Neutral'),
+]
 
 
 class Video(models.Model):
@@ -14,6 +23,9 @@ class Video(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # High-water mark of fetched comments, used for incremental re-analysis
+    last_comment_published_at = models.DateTimeField(null=True, blank=True)
+    last_comment_id = models.CharField(max_length=50, blank=True)
 
     def __str__(self):
         return f"{self.title} ({self.youtube_video_id})"
@@ -30,20 +42,35 @@ class Comment(models.Model):
     published_at = models.DateTimeField()
     like_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Copy of analysis.sentiment, so filtered listings need no join
+    sentiment = models.CharField(max_length=10, choices=SENTIMENT_CHOICES, blank=True)
+    # analysis.triage.text_fingerprint of the text, so duplicates of comments
+    # analyzed earlier are found without comparing texts; blank for comments
+    # stored before it was added, until they are fetched again
+    text_hash = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        ordering = ['-published_at', '-id']
+        indexes = [
+            # Keyset pagination of a video's comments by time or by likes
+            models.Index(fields=['video', 'published_at', 'id'], name='comment_video_published_idx'),
+            models.Index(fields=['video', 'like_count', 'id'], name='comment_video_likes_idx'),
+            # Sentiment-filtered listings, newest first
+            models.Index(fields=['video', 'sentiment', 'published_at', 'id'], name='comment_video_sentiment_idx'),
+            # Duplicate lookups during analysis
+            models.Index(fields=['video', 'text_hash'], name='comment_video_text_hash_idx'),
+        ]
 
     def __str__(self):
-        return f"Comment by {self.author_name} on {self.video.title}"
+        # Uses the FK column so printing a comment never queries its video
+        return f"Comment by {self.author_name} on video {self.video_id}"
 
 
 class CommentAnalysis(models.Model):
     """
     Stores sentiment and topic analysis results for comments.
     """
-    SENTIMENT_CHOICES = [
-        ('positive', 'Positive'),
-        ('negative', 'Negative'),
-        ('neutral', 'Neutral'),
-    ]
+    SENTIMENT_CHOICES = SENTIMENT_CHOICES
 
     comment = models.OneToOneField(Comment, on_delete=models.CASCADE, related_name='analysis')
     sentiment = models.CharField(max_length=10, choices=SENTIMENT_CHOICES)
@@ -51,18 +78,38 @@ class CommentAnalysis(models.Model):
     keywords = models.JSONField()  # Stores extracted keywords
 
     def __str__(self):
-        return f"Analysis for comment {self.comment.id}"
+        return f"Analysis for comment {self.comment_id}"
+
+
+class CommentTopic(models.Model):
+    """
+    One topic of a comment, copied out of ``CommentAnalysis.topics``.
+
+    JSON lists cannot be indexed portably (and ``__contains`` on them is not
+    supported by SQLite), so topic-filtered comment listings join this table
+    on its (video, topic) index and only read the rows of that topic.
+    """
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name='topic_rows')
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='+')
+    topic = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['comment', 'topic'], name='comment_topic_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['video', 'topic', 'comment'], name='comment_topic_video_idx'),
+        ]
+
+    def __str__(self):
+        return f"Topic '{self.topic}' of comment {self.comment_id}"
 
 
 class VideoAnalysis(models.Model):
     """
     Stores aggregated analysis results for entire videos.
     """
-    SENTIMENT_CHOICES = [
-        ('positive', 'Positive'),
-        ('negative', 'Negative'),
-        ('neutral', 'Neutral'),
-    ]
+    SENTIMENT_CHOICES = SENTIMENT_CHOICES
 
     video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name='analysis')
     total_comments = models.IntegerField(default=0)
@@ -72,6 +119,146 @@ class VideoAnalysis(models.Model):
     overall_sentiment = models.CharField(max_length=10, choices=SENTIMENT_CHOICES)
     top_topics = models.JSONField()  # Stores most common topics
     recommendations = models.TextField(blank=True)  # Stores AI-generated recommendations
+    # Mergeable sentiment counters and topic/keyword sketches (analysis.aggregate)
+    aggregate_state = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Analysis for video {self.video.title}"
+
+
+class AnalysisJob(models.Model):
+    """
+    Tracks the progress of one fetch-and-analyze run of a video.
+
+    Tasks update the job at page and chunk granularity so clients can show
+    progress and back off based on the estimated time remaining.
+    """
+    STAGE_CHOICES = [
+        ('queued', 'Queued'),
+        ('fetching', 'Fetching comments'),
+        ('analyzing', 'Analyzing comments'),
+        ('complete', 'Complete'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STAGES = ('queued', 'fetching', 'analyzing')
+
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='jobs')
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES, default='queued')
+    pages_fetched = models.IntegerField(default=0)
+    comments_fetched = models.IntegerField(default=0)
+    # Comments to analyze; grows page by page when fetching and analysis overlap
+    total_comments = models.IntegerField(default=0)
+    processed_comments = models.IntegerField(default=0)
+    # Seconds spent in each finished stage
+    timings = models.JSONField(default=dict, blank=True)
+    # Seconds summed over all chunks, split between the models and result writes
+    inference_seconds = models.FloatField(default=0)
+    db_seconds = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    stage_started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['video', '-created_at'], name='job_video_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Analysis job {self.pk} for video {self.video_id} ({self.stage})"
+
+    @property
+    def is_active(self):
+        return self.stage in self.ACTIVE_STAGES
+
+    @property
+    def throughput(self):
+        """Comments analyzed per second since the job started, or None."""
+        if not self.started_at or not self.processed_comments:
+            return None
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return self.processed_comments / elapsed if elapsed > 0 else None
+
+    @property
+    def eta_seconds(self):
+        """Estimated seconds until analysis finishes, or None if unknown."""
+        if not self.is_active:
+            return 0
+        throughput = self.throughput
+        if self.stage != 'analyzing' or not throughput:
+            return None
+        remaining = max(self.total_comments - self.processed_comments, 0)
+        return remaining / throughput
+
+    def set_stage(self, stage):
+        """
+        Move the job to ``stage``, recording how long the previous one took.
+
+        Args:
+            stage (str): One of STAGE_CHOICES
+        """
+        now = timezone.now()
+        if self.stage_started_at and self.stage in self.ACTIVE_STAGES:
+            self.timings[self.stage] = round(
+                self.timings.get(self.stage, 0)
+                + (now - self.stage_started_at).total_seconds(), 3
+            )
+        if self.started_at is None and stage != 'queued':
+            self.started_at = now
+        if stage in self.ACTIVE_STAGES:
+            self.stage_started_at = now
+        else:
+            self.finished_at = now
+        self.stage = stage
+        # Counters are left out: concurrent tasks update them in the database
+        self.save(update_fields=[
+            'stage', 'timings', 'error', 'started_at', 'stage_started_at',
+            'finished_at', 'updated_at'
+        ])
+        # Re-read so live streams get the counters other tasks have added
+        publish_job_by_id(self.pk)
+
+    def fail(self, error):
+        """
+        Mark the job failed with an error message.
+
+        Args:
+            error: Exception or message describing the failure
+        """
+        self.error = str(error)
+        self.set_stage('failed')
+
+    @classmethod
+    def record_progress(cls, job_id, pages=0, fetched=0, total=0, processed=0,
+                        inference_seconds=0.0, db_seconds=0.0):
+        """
+        Atomically add to a job's counters.
+
+        Chunk tasks of one job run concurrently, so counters are incremented
+        in the database rather than read, changed and saved. The new totals
+        are then published to live streams.
+
+        Args:
+            job_id (int): AnalysisJob ID, or None to do nothing
+            pages (int): Comment pages fetched
+            fetched (int): Comments fetched
+            total (int): Comments added to the analysis workload
+            processed (int): Comments analyzed
+            inference_seconds (float): Time spent running the models
+            db_seconds (float): Time spent writing analysis results
+        """
+        if job_id is None:
+            return
+        cls.objects.filter(pk=job_id).update(
+            pages_fetched=F('pages_fetched') + pages,
+            comments_fetched=F('comments_fetched') + fetched,
+            total_comments=F('total_comments') + total,
+            processed_comments=F('processed_comments') + processed,
+            inference_seconds=F('inference_seconds') + inference_seconds,
+            db_seconds=F('db_seconds') + db_seconds,
+            updated_at=timezone.now()
+        )
+        publish_job_by_id(job_id)
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination for large comment listings.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CommentKeysetPagination(BasePagination):
+    """
+    Paginates comments by seeking past the last row of the previous page.
+
+    The cursor holds the sort value and primary key of the last comment
+    returned, and the next page is fetched with a ``WHERE (value, id) < ...``
+    range on the (video, field, id) index. Unlike OFFSET pagination, the
+    cost of a page does not grow with its depth.
+
+    Query parameters:
+        sort: 'newest' (default), 'oldest', 'most_liked' or 'least_liked'
+        cursor: Opaque value taken from the previous response's 'next' link
+        page_size: Number of comments per page (max 500)
+    """
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    sort_query_param = 'sort'
+
+    # Sort name -> (model field, descending)
+    SORTS = {
+        'newest': ('published_at', True),
+        'oldest': ('published_at', False),
+        'most_liked': ('like_count', True),
+        'least_liked': ('like_count', False),
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        sort = request.query_params.get(self.sort_query_param, 'newest')
+        if sort not in self.SORTS:
+            raise ValidationError({
+                self.sort_query_param: f"Must be one of: {', '.join(self.SORTS)}"
+            })
+        self.field, descending = self.SORTS[sort]
+        page_size = self._page_size(request)
+
+        if descending:
+            queryset = queryset.order_by(f"-{self.field}", '-id')
+        else:
+            queryset = queryset.order_by(self.field, 'id')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self._decode_cursor(cursor)
+            op = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}": value})
+                | Q(**{self.field: value, f"id__{op}": pk})
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self._encode_cursor(page[-1])
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def _page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _encode_cursor(self, comment):
+        value = getattr(comment, self.field)
+        if self.field == 'published_at':
+            value = value.isoformat()
+        payload = json.dumps([value, comment.pk]).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def _decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if self.field == 'published_at':
+                value = parse_datetime(value)
+                if value is None:
+                    raise ValueError(cursor)
+            return value, int(pk)
+        except (TypeError, ValueError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
@@ -0,0 +1,156 @@
+"""
+Task priorities and queue-wait metrics.
+
+Fetch tasks (I/O-bound) and inference tasks (CPU-bound) are routed to
+separate queues by CELERY_TASK_ROUTES, so each can be served by a worker
+pool suited to it. Within a queue, interactive submissions and small videos
+are given a higher priority than background refreshes and large backfills.
+
+With the Redis broker 0 is the highest priority. Each priority level is a
+separate Redis list that workers drain in order (see
+CELERY_BROKER_TRANSPORT_OPTIONS).
+
+How long tasks waited in their queue is recorded per queue and priority
+when QUEUE_METRICS_REDIS_URL is set; see the ``queue_latency`` command.
+"""
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 6
+PRIORITY_NAMES = {
+    PRIORITY_HIGH: 'high',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_LOW: 'low',
+}
+
+# Message header carrying the publish time, to measure queue wait
+ENQUEUED_AT_HEADER = 'enqueued_at'
+# Most recent waits kept per queue and priority
+METRICS_SAMPLES = 1000
+
+_client = None
+
+
+def fetch_priority(background=False):
+    """
+    Return the priority to fetch a video's comments at.
+
+    Args:
+        background (bool): True for scheduled refreshes and bulk backfills
+
+    Returns:
+        int: Celery task priority
+    """
+    return PRIORITY_LOW if background else PRIORITY_HIGH
+
+
+def analysis_priority(comment_count, background=False):
+    """
+    Return the priority to analyze a video's comments at.
+
+    Small videos go first so they are not stuck behind the chunks of a
+    large one, even when both were submitted interactively.
+
+    Args:
+        comment_count (int): Number of comments to analyze
+        background (bool): True for scheduled refreshes and bulk backfills
+
+    Returns:
+        int: Celery task priority
+    """
+    if background:
+        return PRIORITY_LOW
+    if comment_count <= settings.ANALYSIS_SMALL_VIDEO_COMMENTS:
+        return PRIORITY_HIGH
+    return PRIORITY_NORMAL
+
+
+def _get_redis():
+    """Return a Redis client for queue metrics, or None when they are disabled."""
+    global _client
+    if not settings.QUEUE_METRICS_REDIS_URL:
+        return None
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(settings.QUEUE_METRICS_REDIS_URL)
+    return _client
+
+
+def metrics_key(queue, priority):
+    """Redis list holding the recent waits of one queue and priority."""
+    return f"queue-wait:{queue}:{priority}"
+
+
+def stamp_message(headers):
+    """
+    Record the publish time on an outgoing task message.
+
+    Args:
+        headers (dict): Message headers, modified in place
+    """
+    headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+def record_wait(task, request):
+    """
+    Record how long a task waited between being published and starting.
+
+    Best effort: metrics must never fail a task.
+
+    Args:
+        task: Task about to run
+        request: Its request context
+    """
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None)
+    if enqueued_at is None:
+        return
+    wait = max(time.time() - enqueued_at, 0.0)
+    queue = (request.delivery_info or {}).get('routing_key') or 'celery'
+    priority = (request.delivery_info or {}).get('priority')
+    if priority is None:
+        priority = settings.CELERY_TASK_DEFAULT_PRIORITY
+    logger.debug("%s waited %.3fs in %s (priority %s)", task.name, wait, queue, priority)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        key = metrics_key(queue, priority)
+        with client.pipeline() as pipe:
+            pipe.lpush(key, round(wait, 4))
+            pipe.ltrim(key, 0, METRICS_SAMPLES - 1)
+            pipe.execute()
+    except Exception as e:
+        logger.warning("Could not record queue wait: %s", e)
+
+
+def queue_waits():
+    """
+    Return the recorded waits of every queue and priority.
+
+    Returns:
+        dict: (queue, priority) mapped to a list of waits in seconds, most
+            recent first
+    """
+    client = _get_redis()
+    if client is None:
+        return {}
+    waits = {}
+    for key in client.scan_iter(match='queue-wait:*'):
+        _, queue, priority = key.decode().rsplit(':', 2)
+        waits[(queue, int(priority))] = [float(v) for v in client.lrange(key, 0, -1)]
+    return waits
+
+
+def reset_queue_waits():
+    """Delete the recorded waits."""
+    client = _get_redis()
+    if client is not None:
+        for key in client.scan_iter(match='queue-wait:*'):
+            client.delete(key)
@@ -2,7 +2,7 @@
 Serializers for the comments app models.
 """
 from rest_framework import serializers
-from .models import Video, Comment, CommentAnalysis, VideoAnalysis
+from .models import AnalysisJob, Video, Comment, CommentAnalysis, VideoAnalysis
 
 
 class CommentAnalysisSerializer(serializers.ModelSerializer):
@@ -41,6 +41,37 @@ class VideoAnalysisSerializer(serializers.ModelSerializer):
         ]
 
 
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the progress of an analysis run.
+    """
+    throughput = serializers.FloatField(read_only=True)
+    eta_seconds = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = AnalysisJob
+        fields = [
+            'id', 'stage', 'pages_fetched', 'comments_fetched',
+            'total_comments', 'processed_comments', 'throughput',
+            'eta_seconds', 'timings', 'inference_seconds', 'db_seconds',
+            'error', 'created_at', 'started_at', 'finished_at', 'updated_at'
+        ]
+
+
+class VideoListSerializer(serializers.ModelSerializer):
+    """
+    Lightweight serializer for video listings, without nested comments.
+    """
+    analysis = VideoAnalysisSerializer(read_only=True)
+
+    class Meta:
+        model = Video
+        fields = [
+            'id', 'youtube_video_id', 'title', 'description',
+            'created_at', 'analysis'
+        ]
+
+
 class VideoSerializer(serializers.ModelSerializer):
     """
     Serializer for YouTube videos with nested analysis data.
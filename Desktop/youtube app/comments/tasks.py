@@ -1,157 +1,710 @@
 """
 Celery tasks for fetching and analyzing YouTube comments.
 """
-from celery import shared_task
+import asyncio
+import queue
+import threading
+import time
+
+from celery import chord, shared_task
 from django.conf import settings
-from googleapiclient.discovery import build
+from django.db import connection, transaction
+from django.utils import timezone
 from googleapiclient.errors import HttpError
-from datetime import datetime
-from .models import Video, Comment, CommentAnalysis, VideoAnalysis
-from analysis.sentiment import analyze_sentiment
-from analysis.topic_modeling import extract_topics
+from .cache import invalidate_video
+from .events import publish_event
+from .ingest import CommentBulkWriter, comment_from_item
+from .models import AnalysisJob, Video, Comment, CommentAnalysis, CommentTopic, VideoAnalysis
+from .queues import analysis_priority, fetch_priority
+from .serializers import VideoAnalysisSerializer
+from .youtube import (
+    get_async_youtube_client,
+    get_youtube_client,
+    iter_comment_pages,
+    update_video_details
+)
+from .youtube_async import fetch_videos
+from analysis.aggregate import VideoAggregate
+from analysis.rollups import rebuild_video_rollups
+from analysis.sentiment import analyze_sentiment_batch
+from analysis.topic_modeling import extract_topics_batch
+from analysis.triage import text_fingerprint, triage_batch
 
 
 @shared_task
-def fetch_video_comments(video_id):
+def fetch_video_comments(video_id, stream=None, incremental=False, job_id=None,
+                         background=False):
     """
     Fetch comments for a YouTube video and trigger analysis.
     
     Args:
         video_id (int): Database ID of the Video model instance
+        stream (bool): Analyze each page as soon as it is fetched instead of
+            fanning out after the last page; defaults to ANALYSIS_STREAMING
+        incremental (bool): Only fetch and analyze comments newer than the
+            previous run, folding them into the existing VideoAnalysis
+        job_id (int): AnalysisJob to report progress on; a new job is
+            created if not given
+        background (bool): Analyze at low priority, for refreshes and
+            backfills rather than interactive submissions
     """
+    if stream is None:
+        stream = settings.ANALYSIS_STREAMING
+
+    job = None
     try:
         # Get video instance
         video = Video.objects.get(id=video_id)
+        job = get_analysis_job(video, job_id)
+        job.set_stage('fetching')
         
         # Initialize YouTube API client
-        youtube = build('youtube', 'v3', developerKey=settings.YOUTUBE_API_KEY)
+        youtube = get_youtube_client()
         
         # Fetch video details first
-        video_response = youtube.videos().list(
-            part='snippet',
-            id=video.youtube_video_id
-        ).execute()
-        
-        if video_response['items']:
-            video_data = video_response['items'][0]['snippet']
-            video.title = video_data['title']
-            video.description = video_data['description']
-            video.save()
-        
-        # Fetch comments
-        comments_list = []
-        next_page_token = None
-        
-        while True:
-            # Get comments page
-            response = youtube.commentThreads().list(
-                part='snippet',
-                videoId=video.youtube_video_id,
-                maxResults=100,
-                pageToken=next_page_token
-            ).execute()
-            
-            # Process comments
-            for item in response['items']:
-                comment_data = item['snippet']['topLevelComment']['snippet']
-                
-                # Create comment instance
-                comment = Comment.objects.create(
-                    video=video,
-                    youtube_comment_id=item['id'],
-                    author_name=comment_data['authorDisplayName'],
-                    text=comment_data['textDisplay'],
-                    published_at=datetime.strptime(
-                        comment_data['publishedAt'],
-                        '%Y-%m-%dT%H:%M:%SZ'
-                    ),
-                    like_count=comment_data.get('likeCount', 0)
-                )
-                comments_list.append(comment)
+        update_video_details(youtube, video)
+
+        if incremental and video.last_comment_published_at is not None:
+            fetch_new_comments(youtube, video, job)
+            job.set_stage('complete')
+        elif stream:
+            stream_video_comments(youtube, video, job)
+            job.set_stage('complete')
+        else:
+            # Fetch comments, writing each batch with a single upsert
+            writer = CommentBulkWriter(video)
+            for items in iter_comment_pages(youtube, video.youtube_video_id):
+                for item in items:
+                    writer.add(item)
+                AnalysisJob.record_progress(job.id, pages=1, fetched=len(items))
+            comment_ids = writer.flush()
+            AnalysisJob.record_progress(job.id, total=len(comment_ids))
             
-            # Check if there are more pages
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
-                break
-        
-        # Trigger analysis for all comments
-        analyze_comments.delay(video_id, [comment.id for comment in comments_list])
+            # Trigger analysis for all comments; the chord completes the job
+            job.set_stage('analyzing')
+            start_analysis(video_id, comment_ids, job.id, background)
+
+        update_high_water_mark(video)
         
     except HttpError as e:
-        # Log the error and update video status
+        # Log the error and record it on the job
         print(f"Error fetching comments: {str(e)}")
-        # TODO: Add error handling and status updates
+        if job is not None:
+            job.fail(e)
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
+        if job is not None:
+            job.fail(e)
+
+
+def get_analysis_job(video, job_id=None):
+    """
+    Return the job a run should report on, creating one if needed.
+
+    Args:
+        video (Video): Video being analyzed
+        job_id (int): Existing AnalysisJob ID, e.g. one created by the API
+
+    Returns:
+        AnalysisJob: Job of this run
+    """
+    if job_id is not None:
+        return AnalysisJob.objects.get(pk=job_id, video=video)
+    return AnalysisJob.objects.create(video=video)
+
+
+@shared_task
+def refresh_video_comments(video_id):
+    """
+    Incrementally re-check a video for comments posted since the last run.
+
+    Args:
+        video_id (int): Database ID of the Video model instance
+    """
+    fetch_video_comments(video_id, incremental=True, background=True)
 
 
 @shared_task
-def analyze_comments(video_id, comment_ids):
+def refresh_all_videos():
+    """
+    Queue an incremental refresh for every video that has been fetched
+    before. Intended to be scheduled daily with Celery beat.
+    """
+    video_ids = Video.objects.filter(
+        last_comment_published_at__isnull=False
+    ).values_list('id', flat=True)
+    for video_id in video_ids:
+        refresh_video_comments.apply_async(
+            (video_id,), priority=fetch_priority(background=True)
+        )
+
+
+def update_high_water_mark(video):
+    """
+    Record the newest stored comment of a video on the Video row.
+
+    Args:
+        video (Video): Video to update
+    """
+    latest = (
+        Comment.objects.filter(video=video)
+        .order_by('-published_at', '-id')
+        .values('published_at', 'youtube_comment_id')
+        .first()
+    )
+    if latest is None:
+        return
+    video.last_comment_published_at = latest['published_at']
+    video.last_comment_id = latest['youtube_comment_id']
+    video.save(update_fields=['last_comment_published_at', 'last_comment_id'])
+
+
+def _iter_new_items(youtube, video):
+    """
+    Yield pages of comments newer than the video's high-water mark.
+
+    Pages are requested newest first (``order=time``); paging stops at the
+    first comment that is already stored or older than the mark, so no
+    further API calls are made once the new comments are exhausted.
+    """
+    for items in iter_comment_pages(youtube, video.youtube_video_id, order='time'):
+        stored = set(
+            Comment.objects.filter(
+                youtube_comment_id__in=[item['id'] for item in items]
+            ).values_list('youtube_comment_id', flat=True)
+        )
+
+        new_items = []
+        for item in items:
+            comment = comment_from_item(video, item)
+            if (
+                comment.youtube_comment_id in stored
+                or comment.published_at < video.last_comment_published_at
+            ):
+                break
+            new_items.append(item)
+
+        if new_items:
+            yield new_items
+        if len(new_items) < len(items):
+            return
+
+
+def fetch_new_comments(youtube, video, job):
+    """
+    Fetch, store and analyze only the comments added since the last run.
+
+    The new comments' counts are added to the existing VideoAnalysis rather
+    than recomputing it from every stored comment.
+
+    Args:
+        youtube: YouTube API client
+        video (Video): Video with a recorded high-water mark
+        job (AnalysisJob): Job to report progress on
+    """
+    writer = CommentBulkWriter(video)
+    aggregate = load_video_aggregate(video)
+    earliest = None
+
+    for items in _iter_new_items(youtube, video):
+        for item in items:
+            writer.add(item)
+        comment_ids = writer.flush()
+        AnalysisJob.record_progress(
+            job.id, pages=1, fetched=len(items), total=len(comment_ids)
+        )
+        if job.stage != 'analyzing':
+            job.set_stage('analyzing')
+
+        # Analyze in chunks so a large backlog is not held in memory at once
+        chunk_size = settings.ANALYSIS_CHUNK_SIZE
+        for start in range(0, len(comment_ids), chunk_size):
+            comments = list(Comment.objects.filter(
+                id__in=comment_ids[start:start + chunk_size]
+            ))
+            aggregate.merge(analyze_and_store(comments, job.id))
+            oldest = min(comment.published_at for comment in comments)
+            earliest = oldest if earliest is None else min(earliest, oldest)
+
+    if writer.total_written:
+        save_video_analysis(video, aggregate)
+        # Only the days the new comments fall on have changed
+        update_video_rollups(video, since=timezone.localdate(earliest))
+
+
+def load_video_aggregate(video):
+    """
+    Load the persisted aggregate state of a video's analysis.
+
+    Args:
+        video (Video): Video whose analysis to read
+
+    Returns:
+        VideoAggregate: Stored state, empty if the video has no analysis yet
+    """
+    try:
+        analysis = VideoAnalysis.objects.get(video=video)
+    except VideoAnalysis.DoesNotExist:
+        return VideoAggregate()
+
+    if analysis.aggregate_state:
+        return VideoAggregate.from_dict(analysis.aggregate_state)
+
+    # Analyses saved before aggregate state existed: rebuild from the columns
+    aggregate = VideoAggregate(
+        total=analysis.total_comments,
+        sentiment_counts={
+            'positive': analysis.positive_comments,
+            'negative': analysis.negative_comments,
+            'neutral': analysis.neutral_comments,
+        }
+    )
+    for topic, count in analysis.top_topics.items():
+        aggregate.topics.add(topic, count)
+    return aggregate
+
+
+@shared_task
+def fetch_many_videos(video_ids, background=True):
+    """
+    Fetch comments for many videos concurrently and trigger their analysis.
+
+    An event loop on a background thread pages through all videos at once
+    over the pooled async client, handing pages to this thread through a
+    bounded queue. This thread stores them, and starts each video's analysis
+    as soon as its last page has been written.
+
+    Args:
+        video_ids (list): Database IDs of the Video model instances
+        background (bool): Analyze at low priority; bulk fetches are
+            usually backfills
+    """
+    videos = {
+        video.youtube_video_id: video
+        for video in Video.objects.filter(id__in=video_ids)
+    }
+    page_queue = queue.Queue(maxsize=settings.ANALYSIS_STREAM_QUEUE_PAGES * len(videos) + 1)
+
+    async def on_video(youtube_video_id, snippet):
+        await asyncio.to_thread(page_queue.put, ('video', youtube_video_id, snippet))
+
+    async def on_page(youtube_video_id, items):
+        await asyncio.to_thread(page_queue.put, ('page', youtube_video_id, items))
+
+    async def fetch_all():
+        async with get_async_youtube_client() as youtube:
+            return await fetch_videos(youtube, list(videos), on_video, on_page)
+
+    def produce():
+        try:
+            errors = asyncio.run(fetch_all())
+        except Exception as e:
+            errors = {youtube_video_id: e for youtube_video_id in videos}
+        page_queue.put(('end', None, errors))
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    writers = {
+        youtube_video_id: CommentBulkWriter(video)
+        for youtube_video_id, video in videos.items()
+    }
+    jobs = {
+        youtube_video_id: get_analysis_job(video)
+        for youtube_video_id, video in videos.items()
+    }
+    for job in jobs.values():
+        job.set_stage('fetching')
+    comment_ids = {youtube_video_id: [] for youtube_video_id in videos}
+
+    while True:
+        kind, youtube_video_id, payload = page_queue.get()
+        if kind == 'end':
+            for failed_id, error in payload.items():
+                print(f"Error fetching comments for {failed_id}: {str(error)}")
+                jobs[failed_id].fail(error)
+            break
+
+        video = videos[youtube_video_id]
+        if kind == 'video':
+            if payload:
+                video.title = payload['title']
+                video.description = payload['description']
+                video.save()
+                invalidate_video(video.id)
+        elif payload is not None:
+            writer = writers[youtube_video_id]
+            for item in payload:
+                writer.add(item)
+            comment_ids[youtube_video_id].extend(writer.flush())
+            AnalysisJob.record_progress(
+                jobs[youtube_video_id].id, pages=1, fetched=len(payload)
+            )
+        else:
+            # Last page of this video: analyze it while the others continue
+            job = jobs[youtube_video_id]
+            video_comment_ids = comment_ids.pop(youtube_video_id)
+            AnalysisJob.record_progress(job.id, total=len(video_comment_ids))
+            job.set_stage('analyzing')
+            start_analysis(video.id, video_comment_ids, job.id, background)
+            update_high_water_mark(video)
+
+
+def _produce_pages(pages, page_queue, stop):
+    """
+    Move pages from the API iterator onto the queue until it is exhausted.
+
+    Runs on a background thread. Any exception is forwarded to the consumer
+    through the queue, followed by the end-of-stream marker. Setting
+    ``stop`` makes the producer give up once the queue has room.
+    """
+    try:
+        for items in pages:
+            page_queue.put(items)
+            if stop.is_set():
+                return
+    except Exception as e:
+        page_queue.put(e)
+    finally:
+        page_queue.put(None)
+
+
+def stream_video_comments(youtube, video, job):
+    """
+    Fetch and analyze a video's comments as an overlapping pipeline.
+
+    A producer thread pages through commentThreads while this thread stores
+    and analyzes each page as it arrives. The queue between them holds at
+    most ANALYSIS_STREAM_QUEUE_PAGES pages, so memory stays flat however
+    many comments the video has, and VideoAnalysis is updated after every
+    page. The analytics rollups are rebuilt once, after the last page.
+
+    Args:
+        youtube: YouTube API client
+        video (Video): Video whose comments to fetch
+        job (AnalysisJob): Job to report progress on
+    """
+    page_queue = queue.Queue(maxsize=settings.ANALYSIS_STREAM_QUEUE_PAGES)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce_pages,
+        args=(iter_comment_pages(youtube, video.youtube_video_id), page_queue, stop),
+        daemon=True
+    )
+    producer.start()
+
+    aggregate = VideoAggregate()
+    writer = CommentBulkWriter(video)
+
+    try:
+        while True:
+            items = page_queue.get()
+            if items is None:
+                break
+            if isinstance(items, Exception):
+                raise items
+
+            for item in items:
+                writer.add(item)
+            comments = list(Comment.objects.filter(id__in=writer.flush()))
+            AnalysisJob.record_progress(
+                job.id, pages=1, fetched=len(items), total=len(comments)
+            )
+            if job.stage != 'analyzing':
+                job.set_stage('analyzing')
+
+            aggregate.merge(analyze_and_store(comments, job.id))
+            save_video_analysis(video, aggregate)
+    finally:
+        # Unblock the producer if we stopped early, then wait for it
+        stop.set()
+        while producer.is_alive():
+            try:
+                page_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    if not aggregate.total:
+        # No pages had comments; still record an (empty) analysis
+        save_video_analysis(video, aggregate)
+    update_video_rollups(video)
+
+
+def start_analysis(video_id, comment_ids, job_id=None, background=False):
+    """
+    Fan analysis of a video's comments out across the workers.
+
+    The comment IDs are split into chunks of ``ANALYSIS_CHUNK_SIZE``; each
+    chunk is analyzed by its own ``analyze_comment_chunk`` task, and a chord
+    runs ``finalize_video_analysis`` once every chunk has finished. All of
+    them are queued at the priority ``analysis_priority`` gives the video.
+
+    Args:
+        video_id (int): Database ID of the Video model instance
+        comment_ids (list): List of Comment IDs to analyze
+        job_id (int): AnalysisJob to report progress on, if any
+        background (bool): Analyze at low priority
+    """
+    priority = analysis_priority(len(comment_ids), background)
+    chunk_size = settings.ANALYSIS_CHUNK_SIZE
+    chunks = [
+        comment_ids[start:start + chunk_size]
+        for start in range(0, len(comment_ids), chunk_size)
+    ]
+
+    if not chunks:
+        # A chord needs at least one header task
+        finalize_video_analysis.apply_async(([], video_id, job_id), priority=priority)
+        return
+
+    chord(
+        analyze_comment_chunk.s(video_id, chunk, job_id).set(priority=priority)
+        for chunk in chunks
+    )(finalize_video_analysis.s(video_id, job_id).set(priority=priority))
+
+
+@shared_task
+def analyze_comments(video_id, comment_ids, job_id=None, background=False):
     """
     Analyze sentiment and topics for a batch of comments.
+
+    Work is split into chunk tasks so that every worker can take part;
+    see ``start_analysis``.
     
     Args:
         video_id (int): Database ID of the Video model instance
         comment_ids (list): List of Comment IDs to analyze
+        job_id (int): AnalysisJob to report progress on, if any
+        background (bool): Analyze at low priority
+    """
+    start_analysis(video_id, comment_ids, job_id, background)
+
+
+@shared_task
+def analyze_comment_chunk(video_id, comment_ids, job_id=None):
+    """
+    Analyze one chunk of a video's comments and return partial counts.
+    
+    Args:
+        video_id (int): Database ID of the Video model instance
+        comment_ids (list): Comment IDs in this chunk
+        job_id (int): AnalysisJob to report progress on, if any
+
+    Returns:
+        dict: Serialized VideoAggregate of this chunk
     """
     try:
-        video = Video.objects.get(id=video_id)
-        comments = Comment.objects.filter(id__in=comment_ids)
-        
-        # Initialize counters for video analysis
-        sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
-        all_topics = []
-        
-        # Analyze each comment
-        for comment in comments:
-            # Perform sentiment analysis
-            sentiment = analyze_sentiment(comment.text)
-            
-            # Extract topics and keywords
-            topics, keywords = extract_topics(comment.text)
-            
-            # Create or update comment analysis
-            CommentAnalysis.objects.create(
-                comment=comment,
-                sentiment=sentiment,
-                topics=topics,
-                keywords=keywords
-            )
-            
-            # Update sentiment counts
-            sentiment_counts[sentiment] += 1
-            all_topics.extend(topics)
+        comments = list(Comment.objects.filter(video_id=video_id, id__in=comment_ids))
+        aggregate = analyze_and_store(comments, job_id)
+        # Let live streams show this chunk before the chord completes
+        publish_event(video_id, 'partial', {
+            'total_comments': aggregate.total,
+            'sentiment_counts': aggregate.sentiment_counts,
+            'top_topics': aggregate.top_topics(10),
+        })
+        return aggregate.to_dict()
         
-        # Calculate overall sentiment
-        max_sentiment = max(sentiment_counts.items(), key=lambda x: x[1])[0]
-        
-        # Get top topics (simple frequency-based approach)
-        topic_freq = {}
-        for topic in all_topics:
-            topic_freq[topic] = topic_freq.get(topic, 0) + 1
-        top_topics = dict(sorted(
-            topic_freq.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:10])
-        
-        # Generate basic recommendations based on sentiment distribution
-        recommendations = generate_recommendations(sentiment_counts, top_topics)
+    except Exception as e:
+        print(f"Error analyzing comments: {str(e)}")
+        _fail_job(job_id, e)
+        # Fail the chord rather than report partial counts as complete
+        raise
+
+
+def analyzed_duplicates(comments, texts):
+    """
+    Return the stored results of earlier comments duplicating these ones.
+
+    Looks the chunk's fingerprints up across the whole video in one query,
+    so copies that landed in another chunk or an earlier fetch are found.
+    A chunk's own comments are left out, so re-analyzing them runs the
+    models again.
+
+    Args:
+        comments (list): Comment instances of one video
+        texts (list): Their texts
+
+    Returns:
+        dict: ``text_fingerprint`` mapped to (sentiment, (topics, keywords))
+    """
+    if not comments:
+        return {}
+    rows = (
+        CommentAnalysis.objects
+        .filter(
+            comment__video_id=comments[0].video_id,
+            comment__text_hash__in={text_fingerprint(text) for text in texts},
+        )
+        .exclude(comment_id__in=[comment.id for comment in comments])
+        .values_list('comment__text_hash', 'sentiment', 'topics', 'keywords')
+    )
+    return {
+        text_hash: (sentiment, (topics, keywords))
+        for text_hash, sentiment, topics, keywords in rows
+    }
+
+
+def analyze_and_store(comments, job_id=None):
+    """
+    Run sentiment and topic analysis over comments and store the results.
+
+    All results are computed first and then written in one transaction, as
+    a bulk upsert of CommentAnalysis rows plus bulk writes of the
+    denormalized sentiment and topics. Re-analyzing comments overwrites their previous
+    results, and a failure part-way leaves none of the chunk written. Once
+    the chunk is committed the video's cached responses are invalidated.
+
+    Args:
+        comments (list): Comment instances to analyze
+        job_id (int): AnalysisJob to report progress and timings on, if any
+
+    Returns:
+        VideoAggregate: Aggregate of these comments' results
+    """
+    aggregate = VideoAggregate()
+    batch_size = settings.ANALYSIS_BATCH_SIZE
+    start = time.perf_counter()
+
+    def run_models(texts):
+        # Both models over the ambiguous comments, in micro-batches
+        return list(zip(
+            analyze_sentiment_batch(texts, batch_size=batch_size),
+            extract_topics_batch(texts, batch_size=batch_size)
+        ))
+
+    # Obvious cases (spam, emoji-only, very short, duplicates) skip the models
+    texts = [comment.text for comment in comments]
+    results = triage_batch(texts, run_models, known=analyzed_duplicates(comments, texts))
+    
+    analyses = []
+    topic_rows = []
+    for comment, (sentiment, (topics, keywords)) in zip(comments, results):
+        analyses.append(CommentAnalysis(
+            comment=comment,
+            sentiment=sentiment,
+            topics=topics,
+            keywords=keywords
+        ))
+        topic_rows.extend(
+            CommentTopic(comment=comment, video_id=comment.video_id, topic=topic)
+            for topic in dict.fromkeys(topic[:100] for topic in topics)
+        )
         
-        # Create or update video analysis
-        VideoAnalysis.objects.create(
-            video=video,
-            total_comments=len(comments),
-            positive_comments=sentiment_counts['positive'],
-            negative_comments=sentiment_counts['negative'],
-            neutral_comments=sentiment_counts['neutral'],
-            overall_sentiment=max_sentiment,
-            top_topics=top_topics,
-            recommendations=recommendations
+        # Update sentiment, topic and keyword counts
+        aggregate.add(sentiment, topics, keywords)
+        comment.sentiment = sentiment
+    inference_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with transaction.atomic():
+        CommentAnalysis.objects.bulk_create(
+            analyses,
+            update_conflicts=True,
+            update_fields=['sentiment', 'topics', 'keywords'],
+            # MySQL upserts on any unique key and rejects an explicit target
+            unique_fields=(
+                ['comment'] if connection.features.supports_update_conflicts_with_target
+                else None
+            ),
         )
+        # Keep the denormalized sentiment and topics used for filtering in sync
+        Comment.objects.bulk_update(comments, ['sentiment'])
+        CommentTopic.objects.filter(comment__in=comments).delete()
+        CommentTopic.objects.bulk_create(topic_rows)
+        if comments:
+            # Sentiment- and topic-filtered listings change with every chunk
+            video_id = comments[0].video_id
+            transaction.on_commit(lambda: invalidate_video(video_id))
+    db_seconds = time.perf_counter() - start
+
+    AnalysisJob.record_progress(
+        job_id,
+        processed=len(comments),
+        inference_seconds=inference_seconds,
+        db_seconds=db_seconds
+    )
+    return aggregate
+
+
+@shared_task
+def finalize_video_analysis(partials, video_id, job_id=None):
+    """
+    Reduce the partial chunk results into the video's VideoAnalysis.
+
+    Args:
+        partials (list): Results of every ``analyze_comment_chunk`` task
+        video_id (int): Database ID of the Video model instance
+        job_id (int): AnalysisJob to mark complete, if any
+    """
+    try:
+        video = Video.objects.get(id=video_id)
+        save_video_analysis(video, VideoAggregate.merge_all(partials))
+        update_video_rollups(video)
+        if job_id is not None:
+            AnalysisJob.objects.get(pk=job_id).set_stage('complete')
         
     except Exception as e:
         print(f"Error analyzing comments: {str(e)}")
+        _fail_job(job_id, e)
+
+
+def _fail_job(job_id, error):
+    """Mark a job failed by ID, if there is one and it still exists."""
+    if job_id is None:
+        return
+    job = AnalysisJob.objects.filter(pk=job_id).first()
+    if job is not None:
+        job.fail(error)
+
+
+def save_video_analysis(video, aggregate):
+    """
+    Create or update the VideoAnalysis of a video from its aggregate.
+
+    Args:
+        video (Video): Video the analysis belongs to
+        aggregate (VideoAggregate): Merged analysis state of the video
+    """
+    sentiment_counts = aggregate.sentiment_counts
+    top_topics = aggregate.top_topics(10)
+    
+    # Generate basic recommendations based on sentiment distribution
+    recommendations = generate_recommendations(sentiment_counts, top_topics)
+    
+    # Create or update video analysis
+    analysis, _ = VideoAnalysis.objects.update_or_create(
+        video=video,
+        defaults={
+            'total_comments': aggregate.total,
+            'positive_comments': sentiment_counts['positive'],
+            'negative_comments': sentiment_counts['negative'],
+            'neutral_comments': sentiment_counts['neutral'],
+            'overall_sentiment': aggregate.overall_sentiment,
+            'top_topics': top_topics,
+            'recommendations': recommendations,
+            'aggregate_state': aggregate.to_dict(),
+        }
+    )
+    invalidate_video(video.id)
+    publish_event(video.id, 'analysis', VideoAnalysisSerializer(analysis).data)
+
+
+def update_video_rollups(video, since=None):
+    """
+    Bring a video's analytics rollups in step with its stored results.
+
+    Called once at the end of an analysis run rather than on every save,
+    since a rebuild reads every comment of the days it covers. Best effort:
+    a failure is logged and the rollups are fixed by the next run or by
+    ``manage.py rebuild_rollups``.
+
+    Args:
+        video (Video): Video whose run finished
+        since (date): First day that may have changed; all days if None
+    """
+    try:
+        rebuild_video_rollups(video, since=since)
+    except Exception as e:
+        print(f"Error rebuilding analytics rollups: {str(e)}")
 
 
 def generate_recommendations(sentiment_counts, top_topics):
@@ -0,0 +1,401 @@
+"""
+Tests for the comments app.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+
+import httpx
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from analysis.tests import eager_celery, fake_models, fake_sentiment
+from analysis.triage import text_fingerprint
+from .cache import _version_key, invalidate_video
+from .models import AnalysisJob, Comment, CommentAnalysis, CommentTopic, Video, VideoAnalysis
+from .tasks import analyze_and_store, start_analysis
+from .youtube import get_youtube_client, update_video_details
+from .youtube_async import AsyncYouTubeClient, YouTubeAPIError, retry_after_seconds
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_video(user, count=0, youtube_video_id='vid00000001'):
+    """Create a video with ``count`` comments, one hour apart, the newest last."""
+    video = Video.objects.create(user=user, youtube_video_id=youtube_video_id, title='Video')
+    Comment.objects.bulk_create(
+        Comment(
+            video=video,
+            youtube_comment_id=f"{youtube_video_id}-{i}",
+            author_name='author',
+            text=f"comment {i}",
+            text_hash=text_fingerprint(f"comment {i}"),
+            published_at=START + timedelta(hours=i),
+            like_count=i % 5,
+        )
+        for i in range(count)
+    )
+    return video
+
+
+class RetryPolicyTests(SimpleTestCase):
+    """Retries of the async YouTube client."""
+
+    def _client(self, responses):
+        """Return a client answering requests with ``responses`` in order, and its request log."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return responses[min(len(requests), len(responses)) - 1]
+
+        youtube = AsyncYouTubeClient('key', base_url='https://youtube.test', max_retries=3,
+                                     quota_per_second=1000)
+        youtube._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return youtube, requests
+
+    def _get(self, youtube):
+        async def get():
+            try:
+                return await youtube._get('videos', {'id': 'abc'})
+            finally:
+                await youtube._http.aclose()
+        with mock.patch('comments.youtube_async.asyncio.sleep', mock.AsyncMock()) as sleep:
+            return asyncio.run(get()), sleep
+
+    def test_daily_quota_is_not_retried(self):
+        quota = httpx.Response(403, json={'error': {'errors': [{'reason': 'quotaExceeded'}]}})
+        youtube, requests = self._client([quota])
+        with self.assertRaises(YouTubeAPIError):
+            self._get(youtube)
+        self.assertEqual(len(requests), 1)
+
+    def test_rate_limit_is_retried(self):
+        limited = httpx.Response(403, json={'error': {'errors': [{'reason': 'rateLimitExceeded'}]}})
+        youtube, requests = self._client([limited, httpx.Response(200, json={'items': []})])
+        body, _ = self._get(youtube)
+        self.assertEqual(body, {'items': []})
+        self.assertEqual(len(requests), 2)
+
+    def test_http_date_retry_after_is_honoured(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=20)
+        busy = httpx.Response(503, headers={'Retry-After': format_datetime(retry_at, usegmt=True)})
+        youtube, _ = self._client([busy, httpx.Response(200, json={})])
+        _, sleep = self._get(youtube)
+        delay = sleep.await_args.args[0]
+        self.assertGreater(delay, 15)
+        self.assertLess(delay, 21)
+
+    def test_retry_after_parsing(self):
+        self.assertEqual(retry_after_seconds('7'), 7.0)
+        self.assertEqual(retry_after_seconds('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(retry_after_seconds('soon'))
+        self.assertIsNone(retry_after_seconds(None))
+
+
+@override_settings(YOUTUBE_FAKE_API=False)
+class YouTubeClientTests(SimpleTestCase):
+    """The cached discovery client is never shared between threads."""
+
+    def test_each_thread_gets_its_own_client(self):
+        clients = {}
+
+        def fetch(name):
+            clients[name] = (get_youtube_client(), get_youtube_client())
+
+        with mock.patch('comments.youtube.build', side_effect=lambda *args, **kwargs: object()):
+            threads = [threading.Thread(target=fetch, args=(name,)) for name in ('a', 'b')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertIs(clients['a'][0], clients['a'][1])
+        self.assertIs(clients['b'][0], clients['b'][1])
+        self.assertIsNot(clients['a'][0], clients['b'][0])
+
+
+class CommentListingTests(TestCase):
+    """Keyset pagination and filters of a video's comment listing."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.video = make_video(self.user, count=25)
+        self.url = reverse('video-comments', args=[self.video.pk])
+
+    def _walk(self, params):
+        """Follow 'next' links from the first page and return every comment ID."""
+        ids = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(comment['id'] for comment in response.data['results'])
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_cursors_visit_every_comment_once_in_order(self):
+        comments = Comment.objects.filter(video=self.video)
+        newest = list(comments.order_by('-published_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk({'page_size': 7}), newest)
+        self.assertEqual(self._walk({'page_size': 7, 'sort': 'oldest'}), newest[::-1])
+
+        # Many comments share each like count; ties are broken by ID
+        most_liked = list(comments.order_by('-like_count', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk({'page_size': 4, 'sort': 'most_liked'}), most_liked)
+
+    def test_invalid_cursor_and_sort_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'sort': 'random'}).status_code, 400)
+
+    def test_topic_filter_uses_topic_rows(self):
+        tagged = list(Comment.objects.filter(video=self.video).order_by('id')[:3])
+        for comment in tagged:
+            CommentAnalysis.objects.create(
+                comment=comment, sentiment='neutral', topics=['audio', 'editing'], keywords=[]
+            )
+            CommentTopic.objects.create(comment=comment, video=self.video, topic='audio')
+        ids = self._walk({'topic': 'audio', 'page_size': 2})
+        self.assertEqual(sorted(ids), [comment.id for comment in tagged])
+        self.assertEqual(self._walk({'topic': 'humor'}), [])
+
+
+class ResponseCacheTests(TestCase):
+    """ETag/Last-Modified revalidation of the per-video endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='x')
+        self.other = User.objects.create_user('other', password='x')
+        self.video = make_video(self.owner, count=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _clock(self, now):
+        """Fix the time seen by the response cache, but not by the cache backend."""
+        return mock.patch('comments.cache.time', mock.Mock(time=mock.Mock(return_value=now)))
+
+    def _url(self, name='video-detail', pk=None):
+        return reverse(name, args=[pk or self.video.pk])
+
+    def test_matching_etag_is_not_modified_until_the_video_changes(self):
+        first = self.client.get(self._url())
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertEqual(self.client.get(self._url(), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        invalidate_video(self.video.pk)
+        again = self.client.get(self._url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], etag)
+
+    def test_validators_do_not_bypass_ownership(self):
+        future = http_date(time.time() + 3600)
+        self.client.get(self._url())
+        self.client.force_authenticate(self.other)
+        for name in ('video-detail', 'video-analysis', 'video-comments'):
+            response = self.client.get(self._url(name), HTTP_IF_MODIFIED_SINCE=future)
+            self.assertEqual(response.status_code, 404, name)
+            response = self.client.get(self._url(name), HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(response.status_code, 404, name)
+
+    def test_unknown_video_is_not_found_and_not_stamped(self):
+        future = http_date(time.time() + 3600)
+        response = self.client.get(self._url(pk=999999), HTTP_IF_MODIFIED_SINCE=future)
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get(_version_key(999999)))
+
+    def test_deleted_video_is_not_served_from_cache(self):
+        self.assertEqual(self.client.get(self._url()).status_code, 200)
+        self.assertEqual(self.client.delete(self._url()).status_code, 204)
+        self.assertEqual(self.client.get(self._url()).status_code, 404)
+
+    def test_title_update_invalidates(self):
+        etag = self.client.get(self._url())['ETag']
+        youtube = mock.Mock()
+        youtube.videos().list().execute.return_value = {
+            'items': [{'snippet': {'title': 'New title', 'description': ''}}]
+        }
+        update_video_details(youtube, self.video)
+        response = self.client.get(self._url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'New title')
+
+    @override_settings(ANALYSIS_EVENTS_REDIS_URL='', ANALYSIS_TRIAGE_ENABLED=False)
+    def test_each_analyzed_chunk_invalidates(self):
+        url = self._url('video-comments')
+        etag = self.client.get(url, {'sentiment': 'positive'})['ETag']
+        for patch in fake_models():
+            self.addCleanup(patch.stop)
+        comments = list(Comment.objects.filter(video=self.video))
+        with self.captureOnCommitCallbacks(execute=True):
+            analyze_and_store(comments)
+        response = self.client.get(url, {'sentiment': 'positive'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        positive = sum(comment.sentiment == 'positive' for comment in comments)
+        self.assertEqual(len(response.data['results']), positive)
+
+    def test_change_in_the_same_second_is_not_hidden_by_if_modified_since(self):
+        with self._clock(1700000000.2):
+            first = self.client.get(self._url())
+        with self._clock(1700000000.7):
+            invalidate_video(self.video.pk)
+        response = self.client.get(self._url(), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since_is_honoured_after_an_older_change(self):
+        with self._clock(1700000000.2):
+            invalidate_video(self.video.pk)
+        with self._clock(1700000005.5):
+            invalidate_video(self.video.pk)
+        last_modified = self.client.get(self._url())['Last-Modified']
+        self.assertEqual(last_modified, http_date(1700000006))
+        response = self.client.get(self._url(), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(
+    ANALYSIS_CHUNK_SIZE=4,
+    ANALYSIS_EVENTS_REDIS_URL='',
+    QUEUE_METRICS_REDIS_URL='',
+    ANALYSIS_TRIAGE_ENABLED=False,
+)
+class ChunkedAnalysisTests(TestCase):
+    """Fan-out of a video's analysis into chunk tasks and their reduction."""
+
+    def setUp(self):
+        for patch in fake_models():
+            self.addCleanup(patch.stop)
+        eager_celery(self)
+        self.user = User.objects.create_user('owner')
+        self.video = make_video(self.user, count=10)
+        self.job = AnalysisJob.objects.create(video=self.video)
+        self.comment_ids = list(Comment.objects.filter(video=self.video).values_list('id', flat=True))
+
+    def test_chunks_are_merged_into_the_video_analysis(self):
+        start_analysis(self.video.id, self.comment_ids, self.job.id)
+
+        analysis = VideoAnalysis.objects.get(video=self.video)
+        stored = Counter(
+            CommentAnalysis.objects.filter(comment__video=self.video).values_list('sentiment', flat=True)
+        )
+        self.assertEqual(analysis.total_comments, 10)
+        self.assertEqual(analysis.positive_comments, stored['positive'])
+        self.assertEqual(analysis.negative_comments, stored['negative'])
+        self.assertEqual(analysis.neutral_comments, stored['neutral'])
+        # Every comment's first word is 'comment'
+        self.assertEqual(analysis.top_topics, {'comment': 10})
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.stage, 'complete')
+        self.assertEqual(self.job.processed_comments, 10)
+
+    def test_duplicates_in_other_chunks_reuse_the_first_result(self):
+        # The last chunk holds two copies of a comment in the first chunk
+        original = Comment.objects.get(id=self.comment_ids[0])
+        Comment.objects.filter(id__in=self.comment_ids[8:]).update(
+            text=original.text, text_hash=original.text_hash
+        )
+        analyzed = []
+
+        def sentiment(texts, batch_size=None):
+            analyzed.extend(texts)
+            return fake_sentiment(texts)
+
+        with mock.patch('comments.tasks.analyze_sentiment_batch', sentiment):
+            start_analysis(self.video.id, self.comment_ids, self.job.id)
+
+        self.assertEqual(len(analyzed), 8)
+        self.assertEqual(analyzed.count(original.text), 1)
+        results = CommentAnalysis.objects.filter(comment__text=original.text).values_list(
+            'sentiment', 'topics', 'keywords'
+        )
+        self.assertEqual(len(results), 3)
+        self.assertEqual(len(set(map(str, results))), 1)
+        self.assertEqual(VideoAnalysis.objects.get(video=self.video).total_comments, 10)
+
+    def test_video_without_comments_still_completes(self):
+        start_analysis(self.video.id, [], self.job.id)
+        self.assertEqual(VideoAnalysis.objects.get(video=self.video).total_comments, 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.stage, 'complete')
+
+    def test_failed_chunk_fails_the_job_without_partial_totals(self):
+        calls = []
+
+        def flaky(texts, batch_size=None):
+            calls.append(texts)
+            if len(calls) == 2:
+                raise RuntimeError('model crashed')
+            return ['neutral'] * len(texts)
+
+        with mock.patch('comments.tasks.analyze_sentiment_batch', flaky):
+            with self.assertRaises(RuntimeError):
+                start_analysis(self.video.id, self.comment_ids, self.job.id)
+
+        self.assertFalse(VideoAnalysis.objects.filter(video=self.video).exists())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.stage, 'failed')
+        self.assertIn('model crashed', self.job.error)
+
+
+@override_settings(ANALYSIS_EVENTS_REDIS_URL='', ANALYSIS_TRIAGE_ENABLED=False)
+class AnalysisUpsertTests(TestCase):
+    """Bulk writes of per-comment analysis results."""
+
+    def setUp(self):
+        for patch in fake_models():
+            self.addCleanup(patch.stop)
+        self.user = User.objects.create_user('owner')
+        self.video = make_video(self.user, count=6)
+        self.job = AnalysisJob.objects.create(video=self.video)
+
+    def _comments(self):
+        return list(Comment.objects.filter(video=self.video).order_by('id'))
+
+    def test_reanalysis_overwrites_instead_of_duplicating(self):
+        analyze_and_store(self._comments(), self.job.id)
+
+        def negative(texts, batch_size=None):
+            return ['negative'] * len(texts)
+
+        def audio(texts, batch_size=None):
+            return [(['audio'], ['loud'])] * len(texts)
+
+        with mock.patch('comments.tasks.analyze_sentiment_batch', negative):
+            with mock.patch('comments.tasks.extract_topics_batch', audio):
+                aggregate = analyze_and_store(self._comments(), self.job.id)
+
+        self.assertEqual(aggregate.sentiment_counts['negative'], 6)
+        analyses = CommentAnalysis.objects.filter(comment__video=self.video)
+        self.assertEqual(analyses.count(), 6)
+        self.assertEqual(list(analyses.values_list('sentiment', 'keywords').distinct()), [('negative', ['loud'])])
+        self.assertEqual(
+            set(Comment.objects.filter(video=self.video).values_list('sentiment', flat=True)), {'negative'}
+        )
+        self.assertEqual(
+            set(CommentTopic.objects.filter(video=self.video).values_list('topic', flat=True)), {'audio'}
+        )
+        self.assertEqual(CommentTopic.objects.filter(video=self.video).count(), 6)
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.processed_comments, 12)
+
+    def test_failed_write_leaves_nothing_behind(self):
+        with mock.patch.object(Comment.objects, 'bulk_update', side_effect=RuntimeError('lost connection')):
+            with self.assertRaises(RuntimeError):
+                analyze_and_store(self._comments(), self.job.id)
+        self.assertFalse(CommentAnalysis.objects.filter(comment__video=self.video).exists())
+        self.assertFalse(CommentTopic.objects.filter(video=self.video).exists())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.processed_comments, 0)
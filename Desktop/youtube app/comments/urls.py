@@ -3,7 +3,7 @@ URL configuration for the comments app.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VideoViewSet
+from .views import VideoViewSet, video_events
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -11,5 +11,7 @@ router.register(r'videos', VideoViewSet, basename='video')
 
 # The API URLs are now determined automatically by the router
 urlpatterns = [
+    # Server-sent events; a plain async view, outside the DRF router
+    path('videos/<int:pk>/events/', video_events, name='video-events'),
     path('', include(router.urls)),
 ]
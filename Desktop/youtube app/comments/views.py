@@ -1,20 +1,61 @@
 """
 API views for handling YouTube video analysis requests and results.
 """
+import math
+import tempfile
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
-from .models import Video, Comment, VideoAnalysis
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from django.db.models import Prefetch
+from .cache import cached_video_response, invalidate_video
+from .events import FINAL_EVENTS, format_sse, job_event, subscribe
+from .export import CONTENT_TYPES, EXPORT_FORMATS, iter_csv, iter_ndjson, write_parquet
+from .models import SENTIMENT_CHOICES, AnalysisJob, Video, Comment, VideoAnalysis
+from .pagination import CommentKeysetPagination
+from .queues import fetch_priority
 from .serializers import (
+    AnalysisJobSerializer,
     VideoSerializer,
+    VideoListSerializer,
     VideoCreateSerializer,
     CommentSerializer,
     VideoAnalysisSerializer
 )
 from .tasks import fetch_video_comments
 
+# Bounds of the Retry-After hint sent while an analysis is running
+MIN_POLL_SECONDS = 1
+MAX_POLL_SECONDS = 30
+
+
+def retry_after(job):
+    """
+    Suggest how many seconds a client should wait before polling again.
+
+    Args:
+        job (AnalysisJob): Latest job of the video
+
+    Returns:
+        int: Seconds to wait, or None if the job has finished
+    """
+    if not job.is_active:
+        return None
+    eta = job.eta_seconds
+    if eta is None:
+        return 2 * MIN_POLL_SECONDS
+    # Poll a few times over the remaining time, not continuously
+    return min(max(math.ceil(eta / 4), MIN_POLL_SECONDS), MAX_POLL_SECONDS)
+
 
 class VideoViewSet(viewsets.ModelViewSet):
     """
@@ -24,19 +65,38 @@ class VideoViewSet(viewsets.ModelViewSet):
     - GET /api/videos/ - List all analyzed videos
     - POST /api/videos/ - Submit new video for analysis
     - GET /api/videos/{id}/ - Get video details with analysis
-    - GET /api/videos/{id}/comments/ - Get video comments
+    - GET /api/videos/{id}/comments/ - Get video comments (filterable, cursor-paginated)
     - GET /api/videos/{id}/analysis/ - Get video analysis results
+    - GET /api/videos/{id}/status/ - Get progress of the latest analysis run
+    - GET /api/videos/{id}/export/ - Download comments with analysis (NDJSON, CSV or Parquet)
     """
     permission_classes = [IsAuthenticated]
+    # Video IDs are integers; anything else is a 404 before reaching a view
+    lookup_value_regex = r'\d+'
     
     def get_queryset(self):
-        """Filter videos by the current user."""
-        return Video.objects.filter(user=self.request.user)
+        """
+        Filter videos by the current user.
+
+        Related rows each action serializes are loaded up front, so the
+        number of queries does not grow with the number of comments.
+        """
+        queryset = Video.objects.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve', 'analysis'):
+            queryset = queryset.select_related('analysis')
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('analysis')
+            ))
+        return queryset
     
     def get_serializer_class(self):
         """Use different serializers for list/create vs retrieve operations."""
         if self.action == 'create':
             return VideoCreateSerializer
+        if self.action == 'list':
+            return VideoListSerializer
         return VideoSerializer
 
     def perform_create(self, serializer):
@@ -46,33 +106,231 @@ class VideoViewSet(viewsets.ModelViewSet):
         2. Trigger async task to fetch and analyze comments
         """
         video = serializer.save()
-        # Trigger async task for comment fetching and analysis
-        fetch_video_comments.delay(video.id)
+        # Record the run up front so its status is visible while queued
+        job = AnalysisJob.objects.create(video=video)
+        # Trigger async task for comment fetching and analysis, ahead of
+        # background refreshes and backfills
+        fetch_video_comments.apply_async(
+            (video.id,), {'job_id': job.id}, priority=fetch_priority()
+        )
+
+    def perform_update(self, serializer):
+        """Save the video and drop its cached responses."""
+        video = serializer.save()
+        invalidate_video(video.id)
+
+    def perform_destroy(self, instance):
+        """Delete the video and drop its cached responses."""
+        video_id = instance.id
+        instance.delete()
+        invalidate_video(video_id)
+
+    @cached_video_response
+    def retrieve(self, request, *args, **kwargs):
+        """Get video details with analysis (cached until the video changes)."""
+        return super().retrieve(request, *args, **kwargs)
         
     @action(detail=True, methods=['get'])
+    @cached_video_response
     def comments(self, request, pk=None):
-        """Get all comments for a specific video."""
+        """
+        Get comments for a specific video.
+
+        Query parameters:
+        - sentiment: only 'positive', 'negative' or 'neutral' comments
+        - topic: only comments assigned this topic
+        - sort: 'newest' (default), 'oldest', 'most_liked' or 'least_liked'
+        - cursor: continue from the 'next' link of the previous page
+        """
         video = self.get_object()
-        comments = Comment.objects.filter(video=video)
-        page = self.paginate_queryset(comments)
-        
-        if page is not None:
-            serializer = CommentSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        comments = Comment.objects.filter(video=video).select_related('analysis')
+
+        sentiment = request.query_params.get('sentiment')
+        if sentiment:
+            if sentiment not in dict(SENTIMENT_CHOICES):
+                raise ValidationError({'sentiment': 'Must be positive, negative or neutral.'})
+            comments = comments.filter(sentiment=sentiment)
+
+        topic = request.query_params.get('topic')
+        if topic:
+            # Joined through the indexed topic table, not the JSON list
+            comments = comments.filter(topic_rows__topic=topic)
+
+        paginator = CommentKeysetPagination()
+        page = paginator.paginate_queryset(comments, request, view=self)
+        serializer = CommentSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
+    @cached_video_response
     def analysis(self, request, pk=None):
         """Get analysis results for a specific video."""
         video = self.get_object()
         try:
-            analysis = VideoAnalysis.objects.get(video=video)
+            # Already joined by get_queryset
+            analysis = video.analysis
             serializer = VideoAnalysisSerializer(analysis)
             return Response(serializer.data)
         except VideoAnalysis.DoesNotExist:
+            job = video.jobs.order_by('-created_at').first()
+            response = Response(
+                {
+                    "detail": "Analysis not yet complete",
+                    "job": AnalysisJobSerializer(job).data if job else None
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+            if job is not None and retry_after(job) is not None:
+                response['Retry-After'] = str(retry_after(job))
+            return response
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def job_status(self, request, pk=None):
+        """
+        Get the progress of the video's latest analysis run.
+
+        Answered with a single query; while the run is active the response
+        carries a Retry-After header derived from its ETA.
+        """
+        job = (
+            AnalysisJob.objects
+            .filter(video_id=pk, video__user=request.user)
+            .order_by('-created_at')
+            .first()
+        )
+        if job is None:
             return Response(
-                {"detail": "Analysis not yet complete"},
+                {"detail": "No analysis has been started"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        response = Response(AnalysisJobSerializer(job).data)
+        wait = retry_after(job)
+        if wait is not None:
+            response['Retry-After'] = str(wait)
+        return response
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        Download every comment of the video with its analysis results.
+
+        NDJSON and CSV are streamed as rows are read, so memory use does not
+        depend on the number of comments. Parquet is spooled to a temporary
+        file one row group at a time and then streamed.
+
+        Query parameters:
+        - as: 'ndjson' (default), 'csv' or 'parquet' ('format' is taken by
+          DRF's content negotiation)
+        """
+        video = self.get_object()
+        export_format = request.query_params.get('as', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'as': 'Must be ndjson, csv or parquet.'})
+        filename = f"{video.youtube_video_id}-comments.{export_format}"
+
+        if export_format == 'parquet':
+            spool = tempfile.TemporaryFile()
+            try:
+                write_parquet(video.id, spool)
+            except ImportError as e:
+                spool.close()
+                return Response({"detail": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+            spool.seek(0)
+            return FileResponse(
+                spool,
+                as_attachment=True,
+                filename=filename,
+                content_type=CONTENT_TYPES['parquet']
+            )
+
+        rows = iter_csv(video.id) if export_format == 'csv' else iter_ndjson(video.id)
+        response = StreamingHttpResponse(rows, content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+def _user_id_from_token(token):
+    """Return the user ID of a valid JWT access token, or None."""
+    try:
+        return AccessToken(token)[jwt_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+
+def _event_snapshot(video_id):
+    """
+    Return the current state of a video as events to open a stream with.
+
+    Returns:
+        list: (event, data) pairs for the latest job and the analysis
+    """
+    events = []
+    analysis = VideoAnalysis.objects.filter(video_id=video_id).first()
+    if analysis is not None:
+        events.append(('analysis', VideoAnalysisSerializer(analysis).data))
+    job = AnalysisJob.objects.filter(video_id=video_id).order_by('-created_at').first()
+    if job is not None:
+        events.append((job_event(job), AnalysisJobSerializer(job).data))
+    return events
+
+
+async def _event_stream(video_id):
+    """
+    Generate the text/event-stream body of a video's event stream.
+
+    Starts with a snapshot of the current state, then relays published
+    events until the analysis finishes or SSE_MAX_SECONDS have passed.
+    Comment lines keep idle connections from being dropped by proxies.
+    """
+    events = subscribe(video_id, settings.SSE_KEEPALIVE_SECONDS)
+    deadline = time.monotonic() + settings.SSE_MAX_SECONDS
+    try:
+        # Subscribe before reading the snapshot so no event falls in between
+        await anext(events)
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+
+        for event, data in await sync_to_async(_event_snapshot)(video_id):
+            yield format_sse(event, data)
+            if event in FINAL_EVENTS:
+                return
+
+        async for item in events:
+            if item is None:
+                if time.monotonic() > deadline:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            event, data = item
+            yield format_sse(event, data)
+            if event in FINAL_EVENTS:
+                return
+    finally:
+        await events.aclose()
+
+
+async def video_events(request, pk):
+    """
+    Stream live progress and partial results of a video's analysis.
+
+    GET /api/videos/{id}/events/?token=<JWT access token>
+
+    Server-sent events: 'progress' with the job status, 'partial' with the
+    counts of each finished chunk, 'analysis' with the current
+    VideoAnalysis, and finally 'done' or 'failed'. EventSource cannot send
+    an Authorization header, so the access token is taken from the query
+    string. The view is async, so an idle stream holds no worker thread
+    when served over ASGI.
+    """
+    user_id = _user_id_from_token(request.GET.get('token', ''))
+    if user_id is None:
+        return JsonResponse(
+            {"detail": "Given token not valid for any token type"}, status=401
+        )
+    if not await Video.objects.filter(pk=pk, user_id=user_id, user__is_active=True).aexists():
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    response = StreamingHttpResponse(_event_stream(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
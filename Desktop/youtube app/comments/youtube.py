@@ -0,0 +1,116 @@
+"""
+Helpers for talking to the YouTube Data API.
+"""
+import threading
+
+from django.conf import settings
+from googleapiclient.discovery import build
+
+from .cache import invalidate_video
+from .fake_youtube import FakeYouTubeClient
+from .youtube_async import AsyncYouTubeClient
+
+
+# Discovery-based clients, one per thread: each wraps an httplib2.Http,
+# which is not thread-safe
+_clients = threading.local()
+
+
+def get_youtube_client():
+    """
+    Return a YouTube Data API client.
+
+    The discovery client is built on first use in each thread and reused by
+    later tasks run by that thread. The cache is per process and per thread,
+    never shared between them, so it is safe under the prefork, threads and
+    gevent pools alike. Returns the offline ``FakeYouTubeClient`` when
+    YOUTUBE_FAKE_API is set.
+
+    Returns:
+        Client exposing ``videos()`` and ``commentThreads()``
+    """
+    if settings.YOUTUBE_FAKE_API:
+        return FakeYouTubeClient(
+            comment_count=settings.YOUTUBE_FAKE_COMMENT_COUNT,
+            latency=settings.YOUTUBE_FAKE_LATENCY
+        )
+    client = getattr(_clients, 'client', None)
+    if client is None:
+        client = _clients.client = build(
+            'youtube', 'v3',
+            developerKey=settings.YOUTUBE_API_KEY,
+            cache_discovery=False
+        )
+    return client
+
+
+def get_async_youtube_client():
+    """
+    Return an ``AsyncYouTubeClient`` configured from settings.
+
+    Use it as an async context manager; it owns an HTTP connection pool.
+    """
+    return AsyncYouTubeClient(
+        settings.YOUTUBE_API_KEY,
+        base_url=settings.YOUTUBE_API_BASE_URL,
+        max_connections=settings.YOUTUBE_API_MAX_CONNECTIONS,
+        quota_per_second=settings.YOUTUBE_API_QUOTA_PER_SECOND,
+        max_retries=settings.YOUTUBE_API_MAX_RETRIES
+    )
+
+
+def update_video_details(youtube, video):
+    """
+    Copy the video's title and description from the API onto ``video``.
+
+    Args:
+        youtube: YouTube API client
+        video (Video): Video model instance to update
+    """
+    video_response = youtube.videos().list(
+        part='snippet',
+        id=video.youtube_video_id
+    ).execute()
+    
+    if video_response['items']:
+        video_data = video_response['items'][0]['snippet']
+        video.title = video_data['title']
+        video.description = video_data['description']
+        video.save()
+        invalidate_video(video.id)
+
+
+def iter_comment_pages(youtube, youtube_video_id, page_size=100, **params):
+    """
+    Yield the items of each commentThreads page for a video.
+
+    Pages are requested lazily, so a consumer that stops iterating stops
+    further API calls.
+
+    Args:
+        youtube: YouTube API client
+        youtube_video_id (str): YouTube ID of the video
+        page_size (int): Comments per page (the API allows at most 100)
+        **params: Extra commentThreads().list parameters, e.g. order='time'
+
+    Yields:
+        list: API items of one page
+    """
+    next_page_token = None
+    
+    while True:
+        # Get comments page
+        response = youtube.commentThreads().list(
+            part='snippet',
+            videoId=youtube_video_id,
+            maxResults=page_size,
+            pageToken=next_page_token,
+            **params
+        ).execute()
+        
+        yield response['items']
+        
+        # Check if there are more pages
+        next_page_token = response.get('nextPageToken')
+        if not next_page_token:
+            break
@@ -0,0 +1,285 @@
+"""
+Asynchronous YouTube Data API client for fetching many videos concurrently.
+
+Requests share one pooled ``httpx.AsyncClient``, are throttled by a
+quota-aware token bucket, and are retried with exponential backoff on
+403 rate-limit errors, 429 and 5xx responses.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://www.googleapis.com/youtube/v3'
+
+# Quota units charged per call by the YouTube Data API
+QUOTA_COSTS = {'videos': 1, 'commentThreads': 1}
+
+# 403 reasons that clear up on their own and are worth retrying. The daily
+# quota (quotaExceeded) only resets at midnight Pacific time, so it fails fast
+RETRYABLE_403_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+def retry_after_seconds(value):
+    """
+    Parse a Retry-After header, given in seconds or as an HTTP date.
+
+    Args:
+        value (str): Header value, or None
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class YouTubeAPIError(Exception):
+    """Raised when an API call fails permanently or runs out of retries."""
+
+    def __init__(self, status, message):
+        super().__init__(f"YouTube API error {status}: {message}")
+        self.status = status
+
+
+class QuotaRateLimiter:
+    """
+    Token bucket limiting the rate of quota units spent.
+
+    Args:
+        units_per_second (float): Sustained spend rate
+        burst (float): Maximum units that may be spent at once
+    """
+
+    def __init__(self, units_per_second, burst=None):
+        self.rate = units_per_second
+        self.capacity = burst or max(units_per_second, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, units=1):
+        """Wait until ``units`` quota units may be spent, then spend them."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= units:
+                    self._tokens -= units
+                    return
+                await asyncio.sleep((units - self._tokens) / self.rate)
+
+
+class AsyncYouTubeClient:
+    """
+    Pooled async client for the ``videos`` and ``commentThreads`` endpoints.
+
+    Usage:
+        async with AsyncYouTubeClient(api_key) as youtube:
+            async for items in youtube.iter_comment_pages('dQw4w9WgXcQ'):
+                ...
+
+    Args:
+        api_key (str): YouTube Data API key
+        base_url (str): API root; point it at ``YouTubeStubServer`` offline
+        max_connections (int): Size of the HTTP connection pool
+        quota_per_second (float): Quota units that may be spent per second
+        max_retries (int): Retries per request before giving up
+        record_dir (str): If set, every successful response is saved there
+            in the layout ``YouTubeStubServer`` replays
+    """
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, max_connections=20,
+                 quota_per_second=50, max_retries=5, record_dir=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.limiter = QuotaRateLimiter(quota_per_second)
+        self.stats = {'requests': 0, 'retries': 0, 'quota_units': 0}
+        self._http = None
+
+    async def __aenter__(self):
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=httpx.Timeout(30.0)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._http.aclose()
+        self._http = None
+
+    async def _get(self, resource, params):
+        """
+        GET ``resource`` with retries, returning the decoded JSON body.
+
+        Raises:
+            YouTubeAPIError: On a non-retryable error or after max_retries
+        """
+        params = {key: value for key, value in params.items() if value is not None}
+        params['key'] = self.api_key
+        url = f"{self.base_url}/{resource}"
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(QUOTA_COSTS[resource])
+            self.stats['requests'] += 1
+            self.stats['quota_units'] += QUOTA_COSTS[resource]
+
+            try:
+                response = await self._http.get(url, params=params)
+            except httpx.TransportError as e:
+                status, message, retry_after = None, str(e), None
+            else:
+                if response.status_code == 200:
+                    body = response.json()
+                    self._record(resource, params, body)
+                    return body
+                status = response.status_code
+                message = response.text[:200]
+                retry_after = response.headers.get('Retry-After')
+                if not self._is_retryable(response):
+                    raise YouTubeAPIError(status, message)
+
+            if attempt == self.max_retries:
+                raise YouTubeAPIError(status, message)
+
+            # Exponential backoff with jitter, or the server's Retry-After
+            delay = retry_after_seconds(retry_after)
+            if delay is None:
+                delay = min(2 ** attempt, 32)
+            delay += random.uniform(0, 0.5)
+            self.stats['retries'] += 1
+            logger.warning(
+                "YouTube %s failed (%s), retry %d in %.1fs",
+                resource, status, attempt + 1, delay
+            )
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _is_retryable(response):
+        """Return True for 429, 5xx and rate-limited 403 responses."""
+        if response.status_code == 429 or response.status_code >= 500:
+            return True
+        if response.status_code == 403:
+            try:
+                errors = response.json()['error']['errors']
+            except (ValueError, KeyError, TypeError):
+                return False
+            return any(error.get('reason') in RETRYABLE_403_REASONS for error in errors)
+        return False
+
+    def _record(self, resource, params, body):
+        """Save a response where ``YouTubeStubServer`` will look for it."""
+        if self.record_dir is None:
+            return
+        video_id = params.get('id') or params.get('videoId')
+        path = self.record_dir / video_id / recording_name(resource, params.get('pageToken'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(body))
+
+    async def get_video(self, youtube_video_id):
+        """
+        Return the snippet of a video, or None if it does not exist.
+
+        Args:
+            youtube_video_id (str): YouTube ID of the video
+        """
+        body = await self._get('videos', {'part': 'snippet', 'id': youtube_video_id})
+        if body.get('items'):
+            return body['items'][0]['snippet']
+        return None
+
+    async def iter_comment_pages(self, youtube_video_id, page_size=100, **params):
+        """
+        Yield the items of each commentThreads page for a video.
+
+        Args:
+            youtube_video_id (str): YouTube ID of the video
+            page_size (int): Comments per page (the API allows at most 100)
+            **params: Extra commentThreads parameters, e.g. order='time'
+
+        Yields:
+            list: API items of one page
+        """
+        next_page_token = None
+        while True:
+            body = await self._get('commentThreads', dict(
+                part='snippet',
+                videoId=youtube_video_id,
+                maxResults=page_size,
+                pageToken=next_page_token,
+                **params
+            ))
+            yield body.get('items', [])
+
+            next_page_token = body.get('nextPageToken')
+            if not next_page_token:
+                break
+
+
+def recording_name(resource, page_token=None):
+    """Return the file name a response is recorded under."""
+    if resource == 'videos':
+        return 'videos.json'
+    return f"commentThreads-{page_token or 'first'}.json"
+
+
+async def fetch_videos(youtube, youtube_video_ids, on_video, on_page):
+    """
+    Fetch metadata and every comment page of many videos concurrently.
+
+    Pages of one video are fetched in order (each needs the previous page
+    token); different videos proceed in parallel over the shared pool.
+
+    Args:
+        youtube (AsyncYouTubeClient): Open client
+        youtube_video_ids (list): YouTube IDs of the videos
+        on_video (callable): Awaited with (youtube_video_id, snippet or None)
+        on_page (callable): Awaited with (youtube_video_id, items) per page,
+            and with (youtube_video_id, None) once a video is finished
+
+    Returns:
+        dict: YouTube video ID mapped to the exception that stopped it
+    """
+    async def fetch_one(youtube_video_id):
+        await on_video(youtube_video_id, await youtube.get_video(youtube_video_id))
+        async for items in youtube.iter_comment_pages(youtube_video_id):
+            await on_page(youtube_video_id, items)
+        await on_page(youtube_video_id, None)
+
+    results = await asyncio.gather(
+        *(fetch_one(youtube_video_id) for youtube_video_id in youtube_video_ids),
+        return_exceptions=True
+    )
+    return {
+        youtube_video_id: result
+        for youtube_video_id, result in zip(youtube_video_ids, results)
+        if isinstance(result, Exception)
+    }
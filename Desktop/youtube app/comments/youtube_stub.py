@@ -0,0 +1,141 @@
+"""
+Local HTTP stub of the YouTube Data API for offline tests and benchmarks.
+
+Serves ``/videos`` and ``/commentThreads`` from responses recorded by
+``AsyncYouTubeClient(record_dir=...)`` when available, and otherwise from the
+synthetic data of ``comments.fake_youtube``. Latency and failing status codes
+can be injected to exercise pooling, rate limiting and retries.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from .fake_youtube import FakeYouTubeClient
+from .youtube_async import recording_name
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Request handler; configuration lives on ``self.server.stub``."""
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        resource = url.path.rstrip('/').rsplit('/', 1)[-1]
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        status = stub.next_failure()
+        if status is not None:
+            reason = 'rateLimitExceeded' if status == 403 else 'backendError'
+            return self._send(status, {
+                'error': {'code': status, 'errors': [{'reason': reason}]}
+            })
+
+        body = stub.response(resource, params)
+        if body is None:
+            return self._send(404, {'error': {'code': 404, 'errors': []}})
+        self._send(200, body)
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Keep benchmark and test output quiet
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # A deep accept backlog so bursts of concurrent connections are not
+    # dropped and retried by the client's TCP stack
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class YouTubeStubServer:
+    """
+    Threaded HTTP server imitating the YouTube Data API.
+
+    Usage:
+        with YouTubeStubServer(comment_count=500, latency=0.05) as stub:
+            client = AsyncYouTubeClient('key', base_url=stub.base_url)
+
+    Args:
+        recordings_dir (str): Directory of recorded responses, laid out as
+            ``<video id>/videos.json`` and ``<video id>/commentThreads-<token>.json``
+        comment_count (int): Comments per video when no recording exists
+        latency (float): Seconds added to every response
+        failures (list): Status codes returned, in order, by the first requests
+        host (str): Interface to bind
+        port (int): Port to bind; 0 picks a free one
+    """
+
+    def __init__(self, recordings_dir=None, comment_count=1000, latency=0.0,
+                 failures=None, host='127.0.0.1', port=0):
+        self.recordings_dir = Path(recordings_dir) if recordings_dir else None
+        self.fake = FakeYouTubeClient(comment_count=comment_count)
+        self.latency = latency
+        self.requests = 0
+        self._failures = list(failures or [])
+        self._lock = threading.Lock()
+        self._server = _StubHTTPServer((host, port), _StubHandler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3"
+
+    def next_failure(self):
+        """Count a request and return the injected failure status, if any."""
+        with self._lock:
+            self.requests += 1
+            return self._failures.pop(0) if self._failures else None
+
+    def response(self, resource, params):
+        """Return the response body for a request, or None if unknown."""
+        video_id = params.get('id') or params.get('videoId')
+        if self.recordings_dir is not None and video_id:
+            path = self.recordings_dir / video_id / recording_name(
+                resource, params.get('pageToken')
+            )
+            if path.exists():
+                return json.loads(path.read_text())
+
+        if resource == 'videos':
+            return self.fake.videos().list(part='snippet', id=video_id).execute()
+        if resource == 'commentThreads':
+            return self.fake.commentThreads().list(
+                part='snippet',
+                videoId=video_id,
+                maxResults=int(params.get('maxResults', 20)),
+                pageToken=params.get('pageToken')
+            ).execute()
+        return None
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down and release its port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
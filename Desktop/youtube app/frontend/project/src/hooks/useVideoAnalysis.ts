@@ -7,8 +7,16 @@
  * The hook follows the React Hooks pattern and can be used in any functional component.
  */
 
-import { useState, useEffect, useCallback } from 'react';
-import { videoApi, Video, Comment, VideoAnalysis, VideoWithAnalysis } from '../services/api';
+import { useState, useEffect, useCallback, useRef } from 'react';
+import {
+  videoApi,
+  Video,
+  Comment,
+  VideoAnalysis,
+  VideoWithAnalysis,
+  AnalysisJob,
+  PartialAnalysis,
+} from '../services/api';
 
 interface VideoAnalysisState {
   // Video data states
@@ -16,6 +24,7 @@ interface VideoAnalysisState {
   currentVideo: VideoWithAnalysis | null;
   comments: Comment[];
   analysis: VideoAnalysis | null;
+  job: AnalysisJob | null;
   
   // UI states
   isLoading: boolean;
@@ -39,6 +48,45 @@ const extractYouTubeVideoId = (url: string): string | null => {
   return (match && match[2].length === 11) ? match[2] : null;
 };
 
+/**
+ * Adds the counts of a finished chunk to a provisional analysis
+ * @param analysis - Chunks of the running job accumulated so far, if any
+ * @param partial - Counts of one chunk
+ * @returns Analysis including the chunk
+ */
+const addPartial = (analysis: VideoAnalysis | null, partial: PartialAnalysis): VideoAnalysis => {
+  const base = analysis ?? {
+    total_comments: 0,
+    positive_comments: 0,
+    negative_comments: 0,
+    neutral_comments: 0,
+    overall_sentiment: 'neutral',
+    top_topics: {},
+    recommendations: '',
+  };
+  const counts = {
+    positive: base.positive_comments + partial.sentiment_counts.positive,
+    negative: base.negative_comments + partial.sentiment_counts.negative,
+    neutral: base.neutral_comments + partial.sentiment_counts.neutral,
+  };
+  const topTopics = { ...base.top_topics };
+  Object.entries(partial.top_topics).forEach(([topic, count]) => {
+    topTopics[topic] = (topTopics[topic] ?? 0) + count;
+  });
+  const overall = (Object.keys(counts) as Array<keyof typeof counts>)
+    .reduce((best, sentiment) => (counts[sentiment] > counts[best] ? sentiment : best));
+
+  return {
+    ...base,
+    total_comments: base.total_comments + partial.total_comments,
+    positive_comments: counts.positive,
+    negative_comments: counts.negative,
+    neutral_comments: counts.neutral,
+    overall_sentiment: overall,
+    top_topics: topTopics,
+  };
+};
+
 /**
  * Custom hook for managing YouTube video analysis data and operations
  * @returns VideoAnalysisState object with data and methods
@@ -49,6 +97,14 @@ export const useVideoAnalysis = (): VideoAnalysisState => {
   const [currentVideo, setCurrentVideo] = useState<VideoWithAnalysis | null>(null);
   const [comments, setComments] = useState<Comment[]>([]);
   const [analysis, setAnalysis] = useState<VideoAnalysis | null>(null);
+  const [job, setJob] = useState<AnalysisJob | null>(null);
+  const eventSource = useRef<EventSource | null>(null);
+  // Chunks of the running job, kept apart from the stored analysis: a full
+  // re-analysis replaces the stored totals rather than adding to them
+  const partials = useRef<{ jobId: number | null; analysis: VideoAnalysis | null }>({
+    jobId: null,
+    analysis: null,
+  });
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
 
@@ -68,6 +124,44 @@ export const useVideoAnalysis = (): VideoAnalysisState => {
     }
   }, []);
 
+  /**
+   * Follows live analysis progress of a video over server-sent events,
+   * replacing any stream already open. Chunk counts are summed from zero
+   * for each job that starts analyzing and shown until the final analysis
+   * arrives. Comments are reloaded once the analysis is done.
+   * @param videoId - Internal video ID
+   */
+  const followAnalysis = useCallback((videoId: number) => {
+    eventSource.current?.close();
+    partials.current = { jobId: null, analysis: null };
+    eventSource.current = videoApi.streamEvents(videoId, {
+      onProgress: (progressJob) => {
+        if (progressJob.stage === 'analyzing' && partials.current.jobId !== progressJob.id) {
+          partials.current = { jobId: progressJob.id, analysis: null };
+        }
+        setJob(progressJob);
+      },
+      onPartial: (partial) => {
+        partials.current.analysis = addPartial(partials.current.analysis, partial);
+        setAnalysis(partials.current.analysis);
+      },
+      onAnalysis: setAnalysis,
+      onDone: async (doneJob) => {
+        setJob(doneJob);
+        try {
+          const commentsData = await videoApi.getComments(videoId);
+          setComments(commentsData);
+        } catch (err) {
+          setError(err instanceof Error ? err.message : 'Failed to fetch comments');
+        }
+      },
+      onFailed: (failedJob) => {
+        setJob(failedJob);
+        setError(failedJob.error || 'Analysis failed');
+      },
+    });
+  }, []);
+
   /**
    * Fetches detailed information about a specific video
    * @param videoId - Internal video ID
@@ -89,25 +183,17 @@ export const useVideoAnalysis = (): VideoAnalysisState => {
         setComments(videoData.comments);
       }
       
-      // Fetch analysis if not included in the response
-      if (!videoData.analysis) {
-        try {
-          const analysisData = await videoApi.getAnalysis(videoId);
-          setAnalysis(analysisData);
-        } catch (analysisErr) {
-          // Analysis might not be ready yet, which is okay
-          console.log('Analysis not ready yet');
-          setAnalysis(null);
-        }
-      } else {
-        setAnalysis(videoData.analysis);
-      }
+      // The stream starts with the current analysis and job status, then
+      // pushes updates until the analysis is done
+      setAnalysis(videoData.analysis ?? null);
+      setJob(null);
+      followAnalysis(videoId);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to fetch video details');
     } finally {
       setIsLoading(false);
     }
-  }, []);
+  }, [followAnalysis]);
 
   /**
    * Submits a new YouTube video for analysis
@@ -162,11 +248,15 @@ export const useVideoAnalysis = (): VideoAnalysisState => {
     fetchVideos();
   }, [fetchVideos]);
 
+  // Close any open event stream on unmount
+  useEffect(() => () => eventSource.current?.close(), []);
+
   return {
     videos,
     currentVideo,
     comments,
     analysis,
+    job,
     isLoading,
     error,
     submitVideo,
@@ -46,6 +46,47 @@ interface VideoAnalysis {
   recommendations: string;
 }
 
+interface AnalysisJob {
+  id: number;
+  stage: 'queued' | 'fetching' | 'analyzing' | 'complete' | 'failed';
+  pages_fetched: number;
+  comments_fetched: number;
+  total_comments: number;
+  processed_comments: number;
+  throughput: number | null;
+  eta_seconds: number | null;
+  timings: Record<string, number>;
+  // Summed over chunks: time in the models vs writing results
+  inference_seconds: number;
+  db_seconds: number;
+  error: string;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  updated_at: string;
+}
+
+interface AnalysisStatus {
+  job: AnalysisJob;
+  // Seconds the server suggests waiting before polling again (Retry-After)
+  retryAfter: number | null;
+}
+
+// Counts of one finished analysis chunk, sent before the whole video is done
+interface PartialAnalysis {
+  total_comments: number;
+  sentiment_counts: Record<'positive' | 'negative' | 'neutral', number>;
+  top_topics: Record<string, number>;
+}
+
+interface AnalysisEventHandlers {
+  onProgress?: (job: AnalysisJob) => void;
+  onPartial?: (partial: PartialAnalysis) => void;
+  onAnalysis?: (analysis: VideoAnalysis) => void;
+  onDone?: (job: AnalysisJob) => void;
+  onFailed?: (job: AnalysisJob) => void;
+}
+
 interface VideoWithAnalysis extends Video {
   analysis?: VideoAnalysis;
   comments?: Comment[];
@@ -140,6 +181,53 @@ const videoApi = {
     
     return response.json();
   },
+
+  /**
+   * Gets the progress of the latest analysis run of a video
+   * @param videoId - Internal video ID
+   * @returns Job progress and the suggested delay before polling again
+   */
+  getStatus: async (videoId: number): Promise<AnalysisStatus> => {
+    const response = await fetch(`${API_BASE_URL}/videos/${videoId}/status/`, {
+      headers: getAuthHeaders(),
+    }).then(handleApiError);
+
+    const retryAfter = response.headers.get('Retry-After');
+    return {
+      job: await response.json(),
+      retryAfter: retryAfter ? Number(retryAfter) : null,
+    };
+  },
+
+  /**
+   * Opens a server-sent event stream of a video's analysis progress.
+   * One stream replaces polling the status and analysis endpoints; it is
+   * closed automatically once the analysis is done or has failed.
+   * @param videoId - Internal video ID
+   * @param handlers - Callbacks for each event type
+   * @returns The EventSource, so callers can close it early
+   */
+  streamEvents: (videoId: number, handlers: AnalysisEventHandlers): EventSource => {
+    // EventSource cannot send headers, so the token goes in the query string
+    const token = encodeURIComponent(localStorage.getItem('authToken') || '');
+    const source = new EventSource(`${API_BASE_URL}/videos/${videoId}/events/?token=${token}`);
+
+    const listen = <T>(event: string, handler?: (data: T) => void, final = false) => {
+      source.addEventListener(event, (message) => {
+        handler?.(JSON.parse((message as MessageEvent).data));
+        if (final) {
+          source.close();
+        }
+      });
+    };
+
+    listen('progress', handlers.onProgress);
+    listen('partial', handlers.onPartial);
+    listen('analysis', handlers.onAnalysis);
+    listen('done', handlers.onDone, true);
+    listen('failed', handlers.onFailed, true);
+    return source;
+  },
 };
 
 // Auth API methods
@@ -179,4 +267,14 @@ const authApi = {
 
 // Export the API service
 export { videoApi, authApi };
-export type { Video, Comment, CommentAnalysis, VideoAnalysis, VideoWithAnalysis };
+export type {
+  Video,
+  Comment,
+  CommentAnalysis,
+  VideoAnalysis,
+  VideoWithAnalysis,
+  AnalysisJob,
+  AnalysisStatus,
+  PartialAnalysis,
+  AnalysisEventHandlers,
+};
@@ -0,0 +1,12 @@
+"""
+ASGI config for youtube_analyzer project.
+
+Needed for the async event stream views; run with e.g.
+``uvicorn youtube_analyzer.asgi:application``.
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'youtube_analyzer.settings')
+
+application = get_asgi_application()
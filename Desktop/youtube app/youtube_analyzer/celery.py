@@ -1,8 +1,44 @@
 """
 Celery configuration for handling asynchronous tasks.
+
+Tasks are routed to two queues (CELERY_TASK_ROUTES). Run a worker for each,
+with a pool suited to its work:
+
+    # fetch: I/O-bound API paging; many threads in one process
+    celery -A youtube_analyzer worker -Q fetch -P threads -c 32 -n fetch@%h
+
+The threads pool is safe for the fetch tasks because each thread builds
+its own discovery client (comments.youtube.get_youtube_client): the
+client's httplib2.Http must not be shared between threads.
+
+    # inference: CPU-bound models, plus the default queue
+    celery -A youtube_analyzer worker -Q inference,celery -P prefork -c <processes> -O fair -n inference@%h
+
+Each inference process limits its torch/OpenMP/MKL threads to
+INFERENCE_THREADS (by default its share of the cores) and can be pinned to
+its own cores with INFERENCE_CPU_AFFINITY. `manage.py calibrate_workers`
+measures which processes x threads split is fastest on a host.
+
+With ANALYSIS_PRELOAD_MODELS the models are loaded once in the prefork
+worker's parent process and shared copy-on-write by its pool processes
+instead of being loaded by each of them (see analysis.preload).
+
+Streaming (ANALYSIS_STREAMING) and incremental refreshes analyze comments
+inside the fetch task, so with those enabled the fetch workers load the
+models too; give them fewer threads.
 """
+import logging
 import os
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    celeryd_after_setup,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+)
+
+logger = logging.getLogger(__name__)
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'youtube_analyzer.settings')
@@ -15,3 +51,83 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Auto-discover tasks in all installed apps
 app.autodiscover_tasks()
+
+
+@celeryd_after_setup.connect
+def record_pool_size(instance=None, **kwargs):
+    """Pass the pool size to the worker processes, which split the cores by it."""
+    if instance is not None and instance.concurrency:
+        os.environ['INFERENCE_POOL_PROCESSES'] = str(instance.concurrency)
+
+
+@worker_init.connect
+def preload_shared_models(sender=None, **kwargs):
+    """
+    Load the models in the worker's parent process before it forks the pool,
+    so every pool process shares one copy of the weights.
+    """
+    from celery.concurrency import get_implementation
+    from celery.concurrency.prefork import TaskPool
+    from django.conf import settings
+
+    if not settings.ANALYSIS_PRELOAD_MODELS or not settings.ANALYSIS_WARMUP_MODELS:
+        return
+    # Other pools do not fork, so there is nothing to share
+    if sender is None or get_implementation(sender.pool_cls) is not TaskPool:
+        return
+
+    from analysis.preload import preload_models
+
+    preload_models(settings.ANALYSIS_WARMUP_MODELS)
+
+
+# Connected before warm_up_models, so models load with the limited thread pools
+@worker_process_init.connect
+def configure_inference_threads(**kwargs):
+    """
+    Limit each worker process's inference threads so that the pool does not
+    oversubscribe the CPU, and pin it to its own cores if configured.
+    """
+    from billiard.process import current_process
+    from django.conf import settings
+    from analysis.threads import configure_threads, threads_per_process
+
+    processes = int(os.environ.get('INFERENCE_POOL_PROCESSES') or os.cpu_count() or 1)
+    threads = threads_per_process(processes, settings.INFERENCE_THREADS)
+    applied = configure_threads(
+        threads,
+        index=getattr(current_process(), 'index', None),
+        pin=settings.INFERENCE_CPU_AFFINITY,
+    )
+    logger.info("Worker process %s inference threads: %s", os.getpid(), applied)
+
+
+@worker_process_init.connect
+def warm_up_models(**kwargs):
+    """
+    Load the NLP models in each worker process as soon as it starts, so the
+    first task a process receives does not pay the model loading cost.
+    Models preloaded by the parent are already there and are not reloaded.
+    """
+    from django.conf import settings
+    from analysis.registry import registry
+
+    if settings.ANALYSIS_WARMUP_MODELS:
+        registry.warm_up(settings.ANALYSIS_WARMUP_MODELS)
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """Record when each task is published, to measure its queue wait."""
+    from comments.queues import stamp_message
+
+    if headers is not None:
+        stamp_message(headers)
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    """Record how long the task about to run waited in its queue."""
+    from comments.queues import record_wait
+
+    record_wait(task, task.request)
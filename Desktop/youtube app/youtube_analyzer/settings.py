@@ -72,11 +72,14 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'youtube_analyzer.wsgi.application'
+# Serve with an ASGI server (uvicorn youtube_analyzer.asgi:application) so
+# that open event streams do not each hold a worker thread
+ASGI_APPLICATION = 'youtube_analyzer.asgi.application'
 
 # Database configuration
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.mysql'),
         'NAME': os.getenv('DB_NAME', 'youtube_analyzer'),
         'USER': os.getenv('DB_USER', 'root'),
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
@@ -125,6 +128,122 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Fetching (I/O-bound) and inference (CPU-bound) get their own queues, each
+# consumed by a worker pool suited to it (see youtube_analyzer/celery.py)
+CELERY_TASK_ROUTES = {
+    'comments.tasks.fetch_video_comments': {'queue': 'fetch'},
+    'comments.tasks.refresh_video_comments': {'queue': 'fetch'},
+    'comments.tasks.refresh_all_videos': {'queue': 'fetch'},
+    'comments.tasks.fetch_many_videos': {'queue': 'fetch'},
+    'comments.tasks.analyze_comments': {'queue': 'inference'},
+    'comments.tasks.analyze_comment_chunk': {'queue': 'inference'},
+    'comments.tasks.finalize_video_analysis': {'queue': 'inference'},
+}
+# Priorities (comments.queues): with Redis 0 is the highest, and each step
+# is a separate list that workers drain in order
+CELERY_TASK_DEFAULT_PRIORITY = 3
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+# Reserve one task at a time, so a backlog already prefetched by a worker
+# cannot get ahead of a higher-priority task published later
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Videos with at most this many comments are analyzed at high priority
+ANALYSIS_SMALL_VIDEO_COMMENTS = int(os.getenv('ANALYSIS_SMALL_VIDEO_COMMENTS', '1000'))
+# Redis for per-queue wait metrics (`manage.py queue_latency`); empty disables
+QUEUE_METRICS_REDIS_URL = os.getenv('QUEUE_METRICS_REDIS_URL', CELERY_BROKER_URL)
+
+# Comment ingestion settings
+# Number of fetched comments written per bulk upsert
+COMMENT_INGEST_BATCH_SIZE = int(os.getenv('COMMENT_INGEST_BATCH_SIZE', '100'))
+# Rows read per query when exporting comments (comments.export)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Analyze each fetched page immediately instead of after the last page
+ANALYSIS_STREAMING = os.getenv('ANALYSIS_STREAMING', 'False') == 'True'
+# Maximum number of fetched pages waiting for analysis in streaming mode
+ANALYSIS_STREAM_QUEUE_PAGES = int(os.getenv('ANALYSIS_STREAM_QUEUE_PAGES', '4'))
+
+# NLP analysis settings
+# Number of comments sent through each transformer pipeline per forward pass
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', '32'))
+# Number of comments per analysis task; a video is split into chunks of this
+# size that run in parallel across workers and are merged by a chord callback
+ANALYSIS_CHUNK_SIZE = int(os.getenv('ANALYSIS_CHUNK_SIZE', '500'))
+# Models loaded by each Celery worker process at startup (empty = load on first use)
+ANALYSIS_WARMUP_MODELS = [
+    name for name in os.getenv('ANALYSIS_WARMUP_MODELS', 'sentiment,zero_shot').split(',')
+    if name
+]
+# Load ANALYSIS_WARMUP_MODELS once in the prefork worker's parent process so
+# the pool processes share the weights copy-on-write (analysis.preload)
+ANALYSIS_PRELOAD_MODELS = os.getenv('ANALYSIS_PRELOAD_MODELS', 'False') == 'True'
+# Intra-op threads per Celery worker process (analysis.threads); 0 splits the
+# cores evenly over the pool's processes. Tune with `manage.py calibrate_workers`
+INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', '0'))
+# Pin each prefork worker process to its own slice of INFERENCE_THREADS cores
+INFERENCE_CPU_AFFINITY = os.getenv('INFERENCE_CPU_AFFINITY', 'False') == 'True'
+# Label spam, URL-only, emoji-only, very short and duplicate comments by rule
+# (analysis.triage) instead of running the models on them
+ANALYSIS_TRIAGE_ENABLED = os.getenv('ANALYSIS_TRIAGE_ENABLED', 'True') == 'True'
+# Sentiment decision cascade (analysis.sentiment): stages run in this order
+# and a comment stops at the first that is confident. TextBlob first
+# reproduces the original labels while skipping DistilBERT on clear cases.
+ANALYSIS_SENTIMENT_CASCADE = os.getenv('ANALYSIS_SENTIMENT_CASCADE', 'textblob,transformer').split(',')
+ANALYSIS_SENTIMENT_THRESHOLDS = {
+    'textblob_polarity': float(os.getenv('ANALYSIS_SENTIMENT_POLARITY_THRESHOLD', '0.1')),
+    'transformer_confidence': float(os.getenv('ANALYSIS_SENTIMENT_CONFIDENCE_THRESHOLD', '0.7')),
+}
+# Inference backend for the transformer models: 'pytorch' (fp32 reference),
+# 'quantized' (dynamic int8) or 'onnx' (ONNX Runtime, needs optimum); compare
+# them with `python manage.py compare_backends`
+ANALYSIS_INFERENCE_BACKEND = os.getenv('ANALYSIS_INFERENCE_BACKEND', 'pytorch')
+# Where exported ONNX models are kept so each worker does not re-export them
+ANALYSIS_ONNX_DIR = os.getenv('ANALYSIS_ONNX_DIR', os.path.join(BASE_DIR, 'onnx_models'))
+# Topic engine: 'zero_shot' (BART-MNLI, one pass per candidate label) or
+# 'embedding' (MiniLM, one pass per comment); add 'embedding' to
+# ANALYSIS_WARMUP_MODELS when switching
+ANALYSIS_TOPIC_ENGINE = os.getenv('ANALYSIS_TOPIC_ENGINE', 'zero_shot')
+# Calibration of the embedding engine, written by `manage.py calibrate_topics`
+ANALYSIS_TOPIC_CALIBRATION = os.getenv(
+    'ANALYSIS_TOPIC_CALIBRATION', os.path.join(BASE_DIR, 'analysis', 'topic_calibration.json')
+)
+# Rows streamed per query when rebuilding the analytics rollups
+# (analysis.rollups); rollups are rebuilt when a video's analysis run finishes
+ANALYTICS_ROLLUP_CHUNK_SIZE = int(os.getenv('ANALYTICS_ROLLUP_CHUNK_SIZE', '2000'))
+# Result cache for per-comment NLP output: a bounded in-process LRU, plus a
+# shared tier in the Celery broker's Redis when ANALYSIS_CACHE_SHARED is set
+ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'True') == 'True'
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '50000'))
+ANALYSIS_CACHE_REDIS_URL = (
+    CELERY_BROKER_URL if os.getenv('ANALYSIS_CACHE_SHARED', 'True') == 'True' else ''
+)
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', str(60 * 60 * 24 * 30)))
+
+# Cache used for API responses (comments.cache); Redis unless CACHE_BACKEND=locmem
+CACHES = {
+    'default': {
+        'BACKEND': (
+            'django.core.cache.backends.locmem.LocMemCache'
+            if os.getenv('CACHE_BACKEND', 'redis') == 'locmem'
+            else 'django.core.cache.backends.redis.RedisCache'
+        ),
+        'LOCATION': os.getenv('CACHE_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/1')),
+    }
+}
+# Seconds a cached API response is kept; entries are also orphaned on change
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', '600'))
+
+# Live analysis events (comments.events), relayed over the broker's Redis
+ANALYSIS_EVENTS_REDIS_URL = os.getenv('ANALYSIS_EVENTS_REDIS_URL', CELERY_BROKER_URL)
+# Seconds between keepalive comments on an idle event stream
+SSE_KEEPALIVE_SECONDS = float(os.getenv('SSE_KEEPALIVE_SECONDS', '15'))
+# Streams are closed after this long; EventSource reconnects automatically
+SSE_MAX_SECONDS = float(os.getenv('SSE_MAX_SECONDS', '3600'))
+# Reconnection delay suggested to EventSource clients, in milliseconds
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '3000'))
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
@@ -158,3 +277,12 @@ SOCIALACCOUNT_PROVIDERS = {
 
 # YouTube API settings
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+# Async client used for multi-video jobs (comments.youtube_async)
+YOUTUBE_API_BASE_URL = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3')
+YOUTUBE_API_MAX_CONNECTIONS = int(os.getenv('YOUTUBE_API_MAX_CONNECTIONS', '20'))
+YOUTUBE_API_QUOTA_PER_SECOND = float(os.getenv('YOUTUBE_API_QUOTA_PER_SECOND', '50'))
+YOUTUBE_API_MAX_RETRIES = int(os.getenv('YOUTUBE_API_MAX_RETRIES', '5'))
+# Serve synthetic comments from comments.fake_youtube instead of the real API
+YOUTUBE_FAKE_API = os.getenv('YOUTUBE_FAKE_API', 'False') == 'True'
+YOUTUBE_FAKE_COMMENT_COUNT = int(os.getenv('YOUTUBE_FAKE_COMMENT_COUNT', '1000'))
+YOUTUBE_FAKE_LATENCY = float(os.getenv('YOUTUBE_FAKE_LATENCY', '0'))